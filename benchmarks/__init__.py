@@ -0,0 +1,4 @@
+#!/usr/bin/python3
+"""
+__init__.py
+"""
@@ -0,0 +1,145 @@
+#!/usr/bin/python3
+"""
+generators.py
+
+Synthetic documents and configs for the benchmarks. Every generator is seeded so the same parameters always give the
+same data.
+"""
+import random
+from typing import Dict, List, Tuple
+
+# Prefix of the env vars that env var markers in generated documents point at. See env_var_names.
+ENV_VAR_PREFIX = "JSON2OBJ_BENCH_VAR_"
+
+_CONFIG_TYPES = ["string", "int", "float", "bool", "list.string", "list.int"]
+
+
+def _scalar(rng: random.Random, index: int):
+    kind = index % 4
+    if kind == 0:
+        return f"value_{rng.randrange(1_000_000)}"
+    if kind == 1:
+        return rng.randrange(1_000_000)
+    if kind == 2:
+        return rng.random()
+    return rng.random() < 0.5
+
+
+def generate_document(
+    width: int = 10, depth: int = 3, list_length: int = 10, env_var_share: float = 0.0, seed: int = 0
+) -> dict:
+    """Generate a nested document.
+
+    Notes:
+        Every object has width keys. Objects above the last level have one nested object and one list of list_length
+        records, and the rest of their keys are scalars. A share of the scalars is replaced with env var markers that
+        point at env_var_names(1).
+
+    Args:
+        width: Number of keys in every object.
+        depth: Number of levels of nested objects.
+        list_length: Number of records in the list of every object above the last level.
+        env_var_share: Share of scalar values, from 0 to 1, that are env var markers.
+        seed: Seed for the random values.
+
+    Returns: Generated document.
+
+    """
+    rng = random.Random(seed)
+    env_var_name = env_var_names(1)[0]
+
+    def value(index: int):
+        if env_var_share and rng.random() < env_var_share:
+            return dict(env_var=env_var_name)
+        return _scalar(rng, index)
+
+    def record() -> dict:
+        return {f"field_{i}": value(i) for i in range(width)}
+
+    def document(level: int) -> dict:
+        data = record()
+        if level < depth - 1:
+            data["field_0"] = document(level + 1)
+            if width > 1:
+                data["field_1"] = [record() for _ in range(list_length)]
+        return data
+
+    return document(0)
+
+
+def generate_records(count: int = 1000, width: int = 10, env_var_share: float = 0.0, seed: int = 0) -> List[dict]:
+    """Generate a list of flat records with the same keys.
+
+    Args:
+        count: Number of records.
+        width: Number of keys in every record.
+        env_var_share: Share of values, from 0 to 1, that are env var markers.
+        seed: Seed for the random values.
+
+    Returns: List of generated records.
+
+    """
+    return [generate_document(width, 1, 0, env_var_share, seed + i) for i in range(count)]
+
+
+def generate_config(sections: int = 5, variables: int = 20, seed: int = 0) -> Tuple[dict, dict, dict]:
+    """Generate a config template, a default config and a user config for Configurator.
+
+    Args:
+        sections: Number of variable sections.
+        variables: Number of variables in every section.
+        seed: Seed for the random values.
+
+    Returns: Tuple of the config template, the default config and a user config that sets half the variables.
+
+    """
+    rng = random.Random(seed)
+    template = dict(metadata=dict(type="custom", fields=dict(name=dict(required=True))))
+    default_config: Dict[str, dict] = dict(metadata=dict(name="benchmark"))
+    user_config: Dict[str, dict] = dict()
+
+    for s in range(sections):
+        section_name = f"section_{s}"
+        template[section_name] = dict(type="variable")
+        default_config[section_name] = dict()
+        user_config[section_name] = dict()
+        for v in range(variables):
+            name = f"variable_{v}"
+            data_type = _CONFIG_TYPES[v % len(_CONFIG_TYPES)]
+            default = _config_value(rng, data_type)
+            default_config[section_name][name] = dict(
+                type=data_type,
+                default=default,
+                description=f"{name} of {section_name}",
+                example=str(default),
+                default_none_okay=v % 3 == 0,
+            )
+            if v % 2 == 0:
+                user_config[section_name][name] = _config_value(rng, data_type)
+    return template, default_config, user_config
+
+
+def _config_value(rng: random.Random, data_type: str):
+    if data_type == "string":
+        return f"value_{rng.randrange(1000)}"
+    if data_type == "int":
+        return rng.randrange(1000)
+    if data_type == "float":
+        return rng.random()
+    if data_type == "bool":
+        return rng.random() < 0.5
+    if data_type == "list.string":
+        return [f"value_{rng.randrange(1000)}" for _ in range(5)]
+    return [rng.randrange(1000) for _ in range(5)]
+
+
+def env_var_names(count: int = 1) -> List[str]:
+    """Names of the env vars that generated env var markers point at. The benchmark runner sets them.
+
+    Args:
+        count: Number of names.
+
+    Returns: List of env var names.
+
+    """
+    return [f"{ENV_VAR_PREFIX}{i}" for i in range(count)]
@@ -0,0 +1,487 @@
+#!/usr/bin/python3
+"""
+run.py
+
+Benchmark suite for JSON2Obj, the file classes and Configurator. Every benchmark reports the best and median time over
+a number of runs and the peak memory of one run. Results can be saved as a JSON baseline and compared with a saved
+baseline to flag regressions. Nothing here needs network access.
+
+Usage:
+    python -m benchmarks.run --save baseline.json
+    python -m benchmarks.run --compare baseline.json --threshold 0.2
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from json2obj import JSON2Obj, JsonFile, YamlFile
+from json2obj.file_cache import clear_file_cache
+from json2obj.ObjectifyConfig.configurator import Configurator
+from json2obj.shared import SharedTree
+
+from .generators import env_var_names, generate_config, generate_document
+
+DEFAULT_THRESHOLD = 0.2
+FORMATS = ["json", "yaml"]
+
+
+class BenchmarkParams(NamedTuple):
+    width: int = 10
+    depth: int = 4
+    list_length: int = 20
+    env_var_share: float = 0.05
+    documents: int = 10
+    sections: int = 5
+    variables: int = 20
+    formats: tuple = tuple(FORMATS)
+
+
+class BenchmarkResult(NamedTuple):
+    name: str
+    time: float
+    median: float
+    peak_memory: int
+    runs: int
+
+
+# Benchmark setup functions by name. A setup function gets the params and a work dir and returns the function to time.
+BENCHMARKS: Dict[str, Callable[[BenchmarkParams, Path], Callable[[], Any]]] = dict()
+
+
+def benchmark(name: str):
+    def register(setup: Callable[[BenchmarkParams, Path], Callable[[], Any]]):
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+def _document(params: BenchmarkParams) -> dict:
+    return dict(
+        documents=[
+            generate_document(params.width, params.depth, params.list_length, params.env_var_share, seed=i)
+            for i in range(params.documents)
+        ]
+    )
+
+
+def _write(data: dict, path: Path) -> str:
+    if path.suffix == ".json":
+        JsonFile(str(path)).write_file(dict(data), rebase=False)
+    else:
+        YamlFile(str(path)).write_file(dict(data), rebase=False)
+    return str(path)
+
+
+def _file_class(path: str):
+    return JsonFile if path.endswith(".json") else YamlFile
+
+
+@benchmark("from_dict")
+def _from_dict(params: BenchmarkParams, work_dir: Path):
+    data = _document(params)
+    return lambda: JSON2Obj(data)
+
+
+@benchmark("from_string")
+def _from_string(params: BenchmarkParams, work_dir: Path):
+    string = json.dumps(_document(params))
+    return lambda: JSON2Obj.from_string(string)
+
+
+@benchmark("to_dict")
+def _to_dict(params: BenchmarkParams, work_dir: Path):
+    obj = JSON2Obj(_document(params))
+    return lambda: JSON2Obj.to_dict(obj)
+
+
+@benchmark("eq")
+def _eq(params: BenchmarkParams, work_dir: Path):
+    obj_1 = JSON2Obj(_document(params))
+    obj_2 = JSON2Obj(_document(params))
+    return lambda: obj_1 == obj_2
+
+
+@benchmark("eq_frozen")
+def _eq_frozen(params: BenchmarkParams, work_dir: Path):
+    # Different documents, so == returns as soon as it sees the hashes differ. One == is too quick to time.
+    obj_1 = JSON2Obj.from_dict(_document(params), frozen=True)
+    obj_2 = JSON2Obj.from_dict(_document(params._replace(width=params.width + 1)), frozen=True)
+    return lambda: [obj_1 == obj_2 for _ in range(1000)]
+
+
+# Number of lookups timed by each path benchmark.
+PATH_LOOKUPS = 10000
+
+
+def _path_document() -> JSON2Obj:
+    return JSON2Obj(dict(a=dict(b=dict(c=[dict(d=i) for i in range(5)]))))
+
+
+@benchmark("path_getattr_chain")
+def _path_getattr_chain(params: BenchmarkParams, work_dir: Path):
+    obj = _path_document()
+
+    def lookup(value):
+        # What code without compiled paths does to read a.b.c[3].d, with None handling.
+        value = getattr(getattr(getattr(value, "a", None), "b", None), "c", None)
+        if value is None or len(value) <= 3:
+            return None
+        return getattr(value[3], "d", None)
+
+    return lambda: [lookup(obj) for _ in range(PATH_LOOKUPS)]
+
+
+@benchmark("path_compiled")
+def _path_compiled(params: BenchmarkParams, work_dir: Path):
+    obj = _path_document()
+    accessor = JSON2Obj.compile_path("a.b.c[3].d")
+    return lambda: [accessor(obj, None) for _ in range(PATH_LOOKUPS)]
+
+
+@benchmark("path_get_path")
+def _path_get_path(params: BenchmarkParams, work_dir: Path):
+    obj = _path_document()
+    return lambda: [JSON2Obj.get_path(obj, "a.b.c[3].d") for _ in range(PATH_LOOKUPS)]
+
+
+# Number of records and lookups of the index benchmarks.
+INDEX_RECORDS = 10000
+INDEX_LOOKUPS = 1000
+
+
+def _index_document() -> JSON2Obj:
+    return JSON2Obj(dict(routes=[dict(name=f"route_{i}", target=i) for i in range(INDEX_RECORDS)]))
+
+
+@benchmark("index_scan")
+def _index_scan(params: BenchmarkParams, work_dir: Path):
+    obj = _index_document()
+    names = [f"route_{i}" for i in range(0, INDEX_RECORDS, INDEX_RECORDS // INDEX_LOOKUPS)]
+    return lambda: [next(r for r in obj.routes if r.name == name) for name in names]
+
+
+@benchmark("index_lookup")
+def _index_lookup(params: BenchmarkParams, work_dir: Path):
+    obj = _index_document()
+    names = [f"route_{i}" for i in range(0, INDEX_RECORDS, INDEX_RECORDS // INDEX_LOOKUPS)]
+    return lambda: [JSON2Obj.index(obj, "routes", key="name")[name] for name in names]
+
+
+def _diff_documents(params: BenchmarkParams) -> tuple:
+    """Two documents that differ in the deepest leaf."""
+    old = _document(params)
+    new = _document(params)
+    node = new["documents"][0]
+    while isinstance(node.get("field_0"), dict):
+        node = node["field_0"]
+    node["field_2"] = "changed"
+    return old, new
+
+
+@benchmark("diff")
+def _diff(params: BenchmarkParams, work_dir: Path):
+    old, new = _diff_documents(params)
+    obj_1, obj_2 = JSON2Obj(old), JSON2Obj(new)
+    return lambda: JSON2Obj.diff(obj_1, obj_2)
+
+
+@benchmark("diff_frozen")
+def _diff_frozen(params: BenchmarkParams, work_dir: Path):
+    # The digests are worked out lazily by the first diff, which is O(n) like a diff of unfrozen trees. That diff is
+    # done here, so the timed diffs only walk the path to the change.
+    old, new = _diff_documents(params)
+    obj_1, obj_2 = JSON2Obj.from_dict(old, frozen=True), JSON2Obj.from_dict(new, frozen=True)
+    JSON2Obj.diff(obj_1, obj_2)
+    return lambda: JSON2Obj.diff(obj_1, obj_2)
+
+
+def _load(file_format: str, cache: bool = False, lazy: bool = False):
+    def setup(params: BenchmarkParams, work_dir: Path):
+        path = _write(_document(params), work_dir / f"load.{file_format}")
+        file_class = _file_class(path)
+        # With the cache on every timed load is a hit, as the warm up call reads the file.
+        return lambda: file_class(path, cache=cache).load(lazy=lazy)
+
+    return setup
+
+
+def _write_file(file_format: str):
+    def setup(params: BenchmarkParams, work_dir: Path):
+        data = _document(params)
+        path = _write(data, work_dir / f"write_file.{file_format}")
+        file_class = _file_class(path)
+        return lambda: file_class(path).write_file(dict(data), rebase=True)
+
+    return setup
+
+
+@benchmark("shared_attach")
+def _shared_attach(params: BenchmarkParams, work_dir: Path):
+    # What a worker does instead of load: map the published tree and read one field.
+    path = str(work_dir / "shared_attach.shared")
+    SharedTree.write(_document(params), path)
+    return lambda: SharedTree.open(path).root.documents[0]
+
+
+def _validate_user_config(file_format: str):
+    def setup(params: BenchmarkParams, work_dir: Path):
+        template, default_config, user_config = generate_config(params.sections, params.variables)
+        default_path = _write(default_config, work_dir / f"default_config.{file_format}")
+        configurator = Configurator(template)
+        return lambda: configurator.validate_user_config({k: dict(v) for k, v in user_config.items()}, default_path)
+
+    return setup
+
+
+def _startup(file_format: str, snapshot: bool):
+    def setup(params: BenchmarkParams, work_dir: Path):
+        template, default_config, user_config = generate_config(params.sections, params.variables)
+        template_path = _write(template, work_dir / f"startup_template.{file_format}")
+        default_path = _write(default_config, work_dir / f"startup_default_config.{file_format}")
+        user_path = _write(user_config, work_dir / f"startup_user_config.{file_format}")
+        snapshot_dir = str(work_dir / "snapshots") if snapshot else None
+
+        def startup():
+            # What a new process does: read the template, then read and validate the user config.
+            clear_file_cache()
+            Configurator(template_path).validate_user_config(user_path, default_path, snapshot_dir=snapshot_dir)
+
+        return startup
+
+    return setup
+
+
+def _validate_compiled(params: BenchmarkParams, work_dir: Path):
+    template, default_config, user_config = generate_config(params.sections, params.variables)
+    validator = Configurator(template).compile(default_config)
+    return lambda: validator({k: dict(v) for k, v in user_config.items()})
+
+
+def _validate_typed(params: BenchmarkParams, work_dir: Path):
+    template, default_config, user_config = generate_config(params.sections, params.variables)
+    validator = Configurator(template).compile(default_config)
+    validator.config_class
+    return lambda: validator({k: dict(v) for k, v in user_config.items()}, typed=True)
+
+
+def _create_sample_config_file(file_format: str):
+    def setup(params: BenchmarkParams, work_dir: Path):
+        template, default_config, user_config = generate_config(params.sections, params.variables)
+        default_path = _write(default_config, work_dir / f"sample_default_config.{file_format}")
+        sample_path = str(work_dir / f"sample_config.{file_format}")
+        configurator = Configurator(template)
+        return lambda: configurator.create_sample_config_file(sample_path, default_path, overwrite=True)
+
+    return setup
+
+
+for _format in FORMATS:
+    benchmark(f"load[{_format}]")(_load(_format))
+    benchmark(f"load_cached[{_format}]")(_load(_format, cache=True))
+    benchmark(f"load_lazy[{_format}]")(_load(_format, lazy=True))
+    benchmark(f"load_lazy_cached[{_format}]")(_load(_format, cache=True, lazy=True))
+    benchmark(f"write_file[{_format}]")(_write_file(_format))
+    benchmark(f"validate_user_config[{_format}]")(_validate_user_config(_format))
+    benchmark(f"create_sample_config_file[{_format}]")(_create_sample_config_file(_format))
+    benchmark(f"startup_cold[{_format}]")(_startup(_format, snapshot=False))
+    benchmark(f"startup_snapshot[{_format}]")(_startup(_format, snapshot=True))
+benchmark("validate_compiled")(_validate_compiled)
+benchmark("validate_typed")(_validate_typed)
+
+
+def _selected(name: str, params: BenchmarkParams, only: Optional[Iterable[str]]) -> bool:
+    if "[" in name and name.split("[")[1][:-1] not in params.formats:
+        return False
+    return not only or any(o in name for o in only)
+
+
+def measure(function: Callable[[], Any], repeat: int = 5) -> tuple:
+    """Time a function and get its peak memory.
+
+    Notes:
+        The function is called once to warm up, then repeat times to be timed, then once more with tracemalloc on to
+        get the peak memory. tracemalloc slows the call down so that call is not timed.
+
+    Args:
+        function: Function to measure.
+        repeat: Number of timed calls.
+
+    Returns: Tuple of the best time, the median time and the peak memory in bytes.
+
+    """
+    function()
+    times = list()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        function()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return min(times), statistics.median(times), peak_memory
+
+
+def run_benchmarks(
+    params: BenchmarkParams = BenchmarkParams(), only: Optional[Iterable[str]] = None, repeat: int = 5
+) -> List[BenchmarkResult]:
+    """Run the benchmarks.
+
+    Args:
+        params: BenchmarkParams for the generated documents and configs.
+        only: If given only run benchmarks whose name contains one of these strings.
+        repeat: Number of timed runs of every benchmark.
+
+    Returns: List of BenchmarkResult.
+
+    """
+    for name in env_var_names(1):
+        os.environ.setdefault(name, "benchmark_value")
+
+    results = list()
+    with tempfile.TemporaryDirectory() as work_dir:
+        # Some of the code being measured prints, which would only add noise to the report.
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for name, setup in BENCHMARKS.items():
+                if not _selected(name, params, only):
+                    continue
+                best, median, peak_memory = measure(setup(params, Path(work_dir)), repeat)
+                results.append(BenchmarkResult(name, best, median, peak_memory, repeat))
+    return results
+
+
+def save_baseline(results: List[BenchmarkResult], path: str, params: BenchmarkParams = BenchmarkParams()):
+    """Save results as a JSON baseline.
+
+    Args:
+        results: List of BenchmarkResult.
+        path: Path to the baseline file.
+        params: BenchmarkParams the results were run with.
+
+    Returns: None
+
+    """
+    baseline = dict(
+        params=params._asdict(),
+        python=platform.python_version(),
+        platform=platform.platform(),
+        results={r.name: dict(time=r.time, median=r.median, peak_memory=r.peak_memory, runs=r.runs) for r in results},
+    )
+    with open(path, "w") as file:
+        json.dump(baseline, file, indent=2)
+
+
+def load_baseline(path: str) -> dict:
+    with open(path) as file:
+        return json.load(file)
+
+
+def find_regressions(
+    results: List[BenchmarkResult], baseline: dict, threshold: float = DEFAULT_THRESHOLD
+) -> List[str]:
+    """Compare results with a baseline.
+
+    Args:
+        results: List of BenchmarkResult.
+        baseline: Baseline loaded with load_baseline.
+        threshold: Allowed increase over the baseline, as a share of the baseline value.
+
+    Returns: A message for every benchmark whose best time or peak memory is over the threshold.
+
+    """
+    regressions = list()
+    for result in results:
+        base = baseline["results"].get(result.name)
+        if base is None:
+            continue
+        for metric in ["time", "peak_memory"]:
+            value = getattr(result, metric)
+            limit = base[metric] * (1 + threshold)
+            if base[metric] and value > limit:
+                change = value / base[metric] - 1
+                regressions.append(f"{result.name}: {metric} {_format(metric, value)} is {change:+.0%} over baseline")
+    return regressions
+
+
+def _format(metric: str, value) -> str:
+    if metric == "peak_memory":
+        return f"{value / 1024:.0f} KiB"
+    return f"{value * 1000:.2f} ms"
+
+
+def format_results(results: List[BenchmarkResult], baseline: Optional[dict] = None) -> str:
+    lines = [f"{'benchmark':<36}{'best':>12}{'median':>12}{'peak memory':>14}{'vs baseline':>14}"]
+    for result in results:
+        change = ""
+        base = (baseline or {}).get("results", {}).get(result.name)
+        if base and base["time"]:
+            change = f"{result.time / base['time'] - 1:+.0%}"
+        lines.append(
+            f"{result.name:<36}{_format('time', result.time):>12}{_format('time', result.median):>12}"
+            f"{_format('peak_memory', result.peak_memory):>14}{change:>14}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    defaults = BenchmarkParams()
+    parser = argparse.ArgumentParser(description="Run the JSON2Obj benchmarks.")
+    parser.add_argument("--width", type=int, default=defaults.width, help="keys in every generated object")
+    parser.add_argument("--depth", type=int, default=defaults.depth, help="levels of nested objects")
+    parser.add_argument("--list-length", type=int, default=defaults.list_length, help="records in every list")
+    parser.add_argument("--env-var-share", type=float, default=defaults.env_var_share, help="share of env var markers")
+    parser.add_argument("--documents", type=int, default=defaults.documents, help="documents in every benchmark input")
+    parser.add_argument("--sections", type=int, default=defaults.sections, help="variable sections in the config")
+    parser.add_argument("--variables", type=int, default=defaults.variables, help="variables in every config section")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=FORMATS, help="file formats to benchmark")
+    parser.add_argument("--only", nargs="+", help="only run benchmarks whose name contains one of these")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs of every benchmark")
+    parser.add_argument("--save", help="save the results as a baseline to this path")
+    parser.add_argument("--compare", help="compare the results with the baseline at this path")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed increase over baseline")
+    args = parser.parse_args(argv)
+
+    params = BenchmarkParams(
+        width=args.width,
+        depth=args.depth,
+        list_length=args.list_length,
+        env_var_share=args.env_var_share,
+        documents=args.documents,
+        sections=args.sections,
+        variables=args.variables,
+        formats=tuple(args.formats),
+    )
+    results = run_benchmarks(params, args.only, args.repeat)
+
+    baseline = load_baseline(args.compare) if args.compare else None
+    print(format_results(results, baseline))
+
+    if args.save:
+        save_baseline(results, args.save, params)
+
+    if baseline:
+        if baseline.get("params") != json.loads(json.dumps(params._asdict())):
+            print("warning: baseline was saved with different params")
+        regressions = find_regressions(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
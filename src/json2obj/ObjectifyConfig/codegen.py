@@ -0,0 +1,319 @@
+#!/usr/bin/python3
+"""
+codegen.py
+
+Typed classes for validated configs. A Python module with a slotted class for every variable section, and one for the
+whole config, is generated from a config template and a default config. Every field is typed from its ConfigTypes, so
+IDEs and type checkers know the shape of the config, and the classes are CompactObj classes, so their fields are quicker
+to read and smaller than the fields of a JSON2Obj.
+
+Generated code is cached by a hash of the template, the default config and the class name. Written modules keep the
+hash in their header, so they are only generated again when one of those changes.
+
+Usage:
+    json2obj-codegen template.yaml default_config.yaml --output config_types.py
+"""
+import argparse
+import hashlib
+import keyword
+import re
+import sys
+import types
+from typing import Dict, Iterable, List, Optional
+
+from ..compact import is_compact_shape
+from ..file_writer import write_if_changed
+from .config_class import ConfigTemplate, ConfigTypes, ConfigVariable, DefaultConfigFile
+from .snapshot import content_hash
+
+# Bump this when the generated code changes so modules written by older versions are generated again.
+CODEGEN_VERSION = 1
+
+DEFAULT_CLASS_NAME = "Config"
+
+_HASH_HEADER = "# template hash: "
+
+_TYPE_HINTS = {
+    ConfigTypes.int: "int",
+    ConfigTypes.float: "float",
+    ConfigTypes.string: "str",
+    ConfigTypes.bool: "bool",
+    ConfigTypes.list: "List[Any]",
+    ConfigTypes.string_list: "List[str]",
+    ConfigTypes.int_list: "List[int]",
+    ConfigTypes.float_list: "List[float]",
+    ConfigTypes.bool_list: "List[bool]",
+}
+
+# Typed lists are stored in an array.array or NumPy array instead of a list.
+_TYPED_LIST_HINTS = {
+    ConfigTypes.int_list: "Sequence[int]",
+    ConfigTypes.float_list: "Sequence[float]",
+    ConfigTypes.bool_list: "Sequence[bool]",
+}
+
+# Names the generated classes use themselves, so they can not be fields.
+_RESERVED_FIELDS = frozenset(["from_dict", "self"])
+
+_CODE_CACHE: Dict[str, str] = dict()
+_CLASS_CACHE: Dict[str, type] = dict()
+
+
+def template_hash(
+    config_template: ConfigTemplate, default_config: DefaultConfigFile, class_name: str = DEFAULT_CLASS_NAME
+) -> str:
+    """Get the hash generated code is cached by.
+
+    Args:
+        config_template: ConfigTemplate to generate classes for.
+        default_config: DefaultConfigFile checked against the template.
+        class_name: Name of the class of the whole config.
+
+    Returns: Hex sha256 digest.
+
+    """
+    parts = [
+        f"v{CODEGEN_VERSION}",
+        class_name,
+        content_hash(config_template._config_template),
+        content_hash(default_config._default_config),
+    ]
+    return hashlib.sha256(":".join(parts).encode("utf-8")).hexdigest()
+
+
+def generate_code(
+    config_template: ConfigTemplate, default_config: DefaultConfigFile, class_name: str = DEFAULT_CLASS_NAME
+) -> str:
+    """Generate the source of a module of typed classes for a config template and default config.
+
+    Notes:
+        The module has a class for every variable section, named after the section (like OptionsSection for
+        options), and a class of the whole config with a field for every section. Custom sections have no types in
+        the template, so they are typed Any. Every class has a from_dict class method that builds it from a validated
+        config dict. Keys that are not in the template or default config are left out.
+
+    Args:
+        config_template: ConfigTemplate to generate classes for.
+        default_config: DefaultConfigFile checked against the template.
+        class_name: Name of the class of the whole config.
+
+    Returns: Python source of the module.
+
+    Raises:
+        ValueError: if the class name, a section name or a variable name can not be used in a class.
+
+    """
+    key = template_hash(config_template, default_config, class_name)
+    return _code(key, config_template, default_config, class_name)
+
+
+def load_class(
+    config_template: ConfigTemplate, default_config: DefaultConfigFile, class_name: str = DEFAULT_CLASS_NAME
+) -> type:
+    """Get the generated class of the whole config, generating and loading its module the first time.
+
+    Args:
+        config_template: ConfigTemplate to generate classes for.
+        default_config: DefaultConfigFile checked against the template.
+        class_name: Name of the class of the whole config.
+
+    Returns: Generated class. Build it from a validated config dict with its from_dict class method.
+
+    Raises:
+        ValueError: if the class name, a section name or a variable name can not be used in a class.
+
+    """
+    key = template_hash(config_template, default_config, class_name)
+    cls = _CLASS_CACHE.get(key)
+    if cls is None:
+        module = types.ModuleType(f"json2obj_generated_{key[:16]}")
+        exec(compile(_code(key, config_template, default_config, class_name), module.__name__, "exec"), module.__dict__)
+        # Registered so instances of the generated classes can be pickled.
+        sys.modules[module.__name__] = module
+        cls = _CLASS_CACHE[key] = getattr(module, class_name)
+    return cls
+
+
+def write_code(
+    path: str,
+    config_template: ConfigTemplate,
+    default_config: DefaultConfigFile,
+    class_name: str = DEFAULT_CLASS_NAME,
+) -> bool:
+    """Write the module of typed classes for a config template and default config.
+
+    Args:
+        path: Path of the Python file to write.
+        config_template: ConfigTemplate to generate classes for.
+        default_config: DefaultConfigFile checked against the template.
+        class_name: Name of the class of the whole config.
+
+    Returns: True if the file was written, False if it was already generated from the same template hash.
+
+    """
+    key = template_hash(config_template, default_config, class_name)
+    if _written_hash(path) == key:
+        return False
+    code = _code(key, config_template, default_config, class_name)
+    return write_if_changed(path, lambda file: file.write(code))
+
+
+def clear_code_cache():
+    """Remove all cached generated code and classes."""
+    _CODE_CACHE.clear()
+    _CLASS_CACHE.clear()
+
+
+def _written_hash(path: str) -> Optional[str]:
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            for line in file:
+                if line.startswith(_HASH_HEADER):
+                    return line[len(_HASH_HEADER) :].strip()
+                if not line.startswith("#"):
+                    return None
+    except FileNotFoundError:
+        pass
+    return None
+
+
+def _code(key: str, config_template: ConfigTemplate, default_config: DefaultConfigFile, class_name: str) -> str:
+    code = _CODE_CACHE.get(key)
+    if code is None:
+        code = _CODE_CACHE[key] = _generate(key, config_template, default_config, class_name)
+    return code
+
+
+def _generate(key: str, config_template: ConfigTemplate, default_config: DefaultConfigFile, class_name: str) -> str:
+    if not class_name.isidentifier() or keyword.iskeyword(class_name):
+        raise ValueError(f"invalid class name: {class_name}")
+    _check_fields(class_name, config_template.sections)
+
+    lines = [
+        "# Generated by json2obj-codegen from a config template and default config. Do not edit.",
+        f"{_HASH_HEADER}{key}",
+        "from typing import Any, List, Optional, Sequence",
+        "",
+        "from json2obj.compact import CompactObj, convert_value",
+    ]
+    used_names = {class_name}
+    section_hints = dict()
+    section_values = dict()
+    for section_name, section in config_template.sections.items():
+        if section.section_type != "variable":
+            section_hints[section_name] = "Any"
+            section_values[section_name] = f'convert_value(data.get("{section_name}"))'
+            continue
+        section_class = _section_class_name(section_name, used_names)
+        variables: Dict[str, ConfigVariable] = default_config.sections.get(section_name) or dict()
+        _check_fields(section_class, variables)
+        section_hints[section_name] = section_class
+        section_values[section_name] = f'{section_class}.from_dict(data.get("{section_name}") or dict())'
+        lines.extend(
+            _class_lines(
+                section_class,
+                f"Variables of the {section_name} section.",
+                {name: _type_hint(variable) for name, variable in variables.items()},
+                {name: f'convert_value(data.get("{name}"))' for name in variables},
+                {name: variable.description for name, variable in variables.items()},
+            )
+        )
+    lines.extend(_class_lines(class_name, "Validated config.", section_hints, section_values, dict()))
+    return "\n".join(lines) + "\n"
+
+
+def _class_lines(
+    class_name: str,
+    docstring: str,
+    hints: Dict[str, str],
+    values: Dict[str, str],
+    descriptions: Dict[str, Optional[str]],
+) -> List[str]:
+    fields = tuple(hints)
+    lines = ["", "", f"class {class_name}(CompactObj):", f"    {_docstring(docstring)}", ""]
+    # Field names are identifiers, so they can be quoted as they are.
+    names = "".join(f'"{name}", ' for name in fields)
+    names = f"({names[:-2] if len(fields) > 1 else names[:-1]})"
+    lines.append(f"    __slots__ = {names}")
+    lines.append(f"    _fields = {names}")
+    if fields:
+        lines.append("")
+    for name, hint in hints.items():
+        if descriptions.get(name):
+            lines.append(f"    #: {' '.join(str(descriptions[name]).split())}")
+        lines.append(f"    {name}: {hint}")
+
+    arguments = "".join(f", {name}: {hint}" for name, hint in hints.items())
+    lines.extend(["", f"    def __init__(self{arguments}):"])
+    lines.extend(f"        self.{name} = {name}" for name in fields)
+    if not fields:
+        lines.append("        pass")
+
+    lines.extend(["", "    @classmethod", f'    def from_dict(cls, data: dict) -> "{class_name}":'])
+    if fields:
+        lines.append("        return cls(")
+        lines.extend(f"            {value}," for value in values.values())
+        lines.append("        )")
+    else:
+        lines.append("        return cls()")
+    return lines
+
+
+def _docstring(text: str) -> str:
+    return '"""' + text.replace("\\", "\\\\").replace('"', '\\"') + '"""'
+
+
+def _type_hint(variable: ConfigVariable) -> str:
+    hint = _TYPE_HINTS[variable.data_type]
+    if variable.typed_list is not None:
+        hint = _TYPED_LIST_HINTS.get(variable.data_type, hint)
+    # Fields with no default can be missing from a user config, and are None if they are.
+    if variable.default_value is None or variable.default_none_okay:
+        hint = f"Optional[{hint}]"
+    return hint
+
+
+def _section_class_name(section_name: str, used_names: set) -> str:
+    """Class name for a section, like OptionsSection for options or ServerListSection for server-list."""
+    words = re.split(r"[^0-9a-zA-Z]+", section_name)
+    name = "".join(word[:1].upper() + word[1:] for word in words) + "Section"
+    if not name[0].isalpha():
+        name = f"Section{name}"
+    unique_name = name
+    count = 1
+    while unique_name in used_names:
+        count += 1
+        unique_name = f"{name}{count}"
+    used_names.add(unique_name)
+    return unique_name
+
+
+def _check_fields(class_name: str, fields: Iterable[str]):
+    fields = tuple(fields)
+    invalid = [f for f in fields if not is_compact_shape((f,)) or keyword.iskeyword(f) or f in _RESERVED_FIELDS]
+    if invalid:
+        raise ValueError(f"unable to generate {class_name}: invalid field name(s): {invalid}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from .configurator import Configurator
+
+    parser = argparse.ArgumentParser(description="Generate typed config classes from a config template.")
+    parser.add_argument("config_template", help="path to the config template file")
+    parser.add_argument("default_config", help="path to the default config file")
+    parser.add_argument("--output", "-o", help="path of the Python file to write. If not set the code is printed")
+    parser.add_argument("--class-name", default=DEFAULT_CLASS_NAME, help="name of the class of the whole config")
+    args = parser.parse_args(argv)
+
+    configurator = Configurator(args.config_template)
+    if not args.output:
+        print(configurator.generate_code(args.default_config, class_name=args.class_name), end="")
+    elif configurator.write_code(args.output, args.default_config, class_name=args.class_name):
+        print(f"wrote {args.output}")
+    else:
+        print(f"{args.output} is up to date")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
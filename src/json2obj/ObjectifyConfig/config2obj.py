@@ -29,11 +29,13 @@ class Config2Obj:
             self.__config_template = JsonFile(config_template, env_var_function).load()
 
     def update_user_config_from_template(self, update: bool = True, save: bool = False):
-        user_config_dict = JSON2Obj.to_dict(self.__user_config)
-        config_template_dict = JSON2Obj.to_dict(self.__config_template)
-        config_template_dict.update(user_config_dict)
         if update:
-            self.__user_config = JSON2Obj(config_template_dict)
+            # The loaded user config, with any changes made to it, is deep merged over the loaded template.
+            self.__user_config = JSON2Obj.from_layers(
+                JSON2Obj.to_dict(self.__config_template),
+                JSON2Obj.to_dict(self.__user_config),
+                env_var_function=self.__env_var_function,
+            )
 
         if save:
 
@@ -4,11 +4,10 @@ config_class
 """
 
 import logging
+from array import array
 from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, List, Union
-
-from ruamel.yaml.comments import CommentedMap, CommentedSeq
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
 
 from ..files import FileTypes, get_file_objects, get_file_type, read_raw_file, write_dict_to_file, write_object_to_file
 from ..json2obj import JSON2Obj
@@ -29,60 +28,160 @@ class ConfigTypes(str, Enum):
     bool_list = "list.bool"
 
 
-def check_value(value: Any, data_type: ConfigTypes):
-    def check_bool(v):
-        if isinstance(bool, v):
-            return value
-        if str(v).lower() in ["yes", "y", "true"]:
-            return True
-        if str(v).lower() in ["no", "n", "false"]:
-            return False
-        raise TypeError("value is not a boolean")
-
-    def check_list(v):
-        if not isinstance(v, list):
-            raise TypeError("value is not type list")
+def _check_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if str(value).lower() in ["yes", "y", "true"]:
         return True
+    if str(value).lower() in ["no", "n", "false"]:
+        return False
+    raise TypeError(f"value is not a boolean: {value}")
+
+
+def _check_list(value: Any) -> list:
+    if not isinstance(value, list):
+        raise TypeError("value is not type list")
+    return value
+
+
+_VALUE_CHECKERS: Dict[ConfigTypes, Callable[[Any], Any]] = {
+    ConfigTypes.int: int,
+    ConfigTypes.float: float,
+    ConfigTypes.string: str,
+    ConfigTypes.bool: _check_bool,
+    ConfigTypes.list: _check_list,
+    ConfigTypes.string_list: lambda value: [str(s) for s in _check_list(value)],
+    ConfigTypes.bool_list: lambda value: [_check_bool(b) for b in _check_list(value)],
+    ConfigTypes.int_list: lambda value: [int(i) for i in _check_list(value)],
+    ConfigTypes.float_list: lambda value: [float(f) for f in _check_list(value)],
+}
+
+
+class TypedListModes(str, Enum):
+    ARRAY = "array"
+    NUMPY = "numpy"
+
 
-    if data_type is ConfigTypes.int:
-        return int(value)
+class BoolArray(array):
+    """array.array of bools. Items are stored as bytes and read back as bool."""
 
-    if data_type is ConfigTypes.float:
-        return float(value)
+    def __new__(cls, values: Iterable[bool] = ()):
+        return super().__new__(cls, "b", values)
 
-    if data_type is ConfigTypes.string:
-        return str(value)
+    def __getitem__(self, index):
+        item = super().__getitem__(index)
+        if isinstance(index, slice):
+            return BoolArray(item)
+        return bool(item)
 
-    if data_type is ConfigTypes.bool:
-        if isinstance(value, bool):
-            return value
-        if str(value).lower() in ["yes", "y", "true"]:
-            return True
-        if str(value).lower() in ["no", "n", "false"]:
-            return False
-        raise TypeError(f"value is not a boolean: {value}")
+    def __iter__(self):
+        return (bool(item) for item in super().__iter__())
 
-    if data_type is ConfigTypes.list:
-        if check_list(value):
-            return value
+    def __eq__(self, other):
+        if isinstance(other, array):
+            return self.tolist() == other.tolist()
+        return self.tolist() == other
 
-    if data_type is ConfigTypes.string_list:
-        check_list(value)
-        return [str(s) for s in value]
+    def __repr__(self):
+        return f"BoolArray({self.tolist()})"
 
+    # array.array copies and pickles as a plain array, so these keep the BoolArray type.
+    def __copy__(self):
+        return BoolArray(self.tobytes())
+
+    def __deepcopy__(self, memo):
+        return BoolArray(self.tobytes())
+
+    def __reduce_ex__(self, protocol):
+        return BoolArray, (self.tolist(),)
+
+    def tolist(self) -> List[bool]:
+        return [bool(item) for item in super().tolist()]
+
+
+# array.array type codes for typed lists. Values that do not fit the type code raise a ValueError.
+_ARRAY_TYPE_CODES = {ConfigTypes.int_list: ("q", int), ConfigTypes.float_list: ("d", float)}
+
+
+def _to_array(data_type: ConfigTypes) -> Callable[[Any], array]:
     if data_type is ConfigTypes.bool_list:
-        check_list(value)
-        return [check_bool(b) for b in value]
+        return lambda value: BoolArray(_check_bool(b) for b in _check_list(value))
+
+    type_code, convert = _ARRAY_TYPE_CODES[data_type]
+
+    def to_array(value: Any) -> array:
+        _check_list(value)
+        try:
+            try:
+                # array converts a list of the right type in C without calling convert for each item.
+                return array(type_code, value)
+            except TypeError:
+                return array(type_code, map(convert, value))
+        except OverflowError:
+            raise ValueError(f"value out of range for {data_type.value}")
+
+    return to_array
+
+
+def _to_numpy(data_type: ConfigTypes) -> Callable[[Any], Any]:
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("numpy is required for typed lists with mode numpy")
+
+    if data_type is ConfigTypes.bool_list:
+        return lambda value: numpy.array([_check_bool(b) for b in _check_list(value)], dtype=bool)
+
+    dtype = numpy.int64 if data_type is ConfigTypes.int_list else numpy.float64
+
+    def to_numpy(value: Any):
+        _check_list(value)
+        try:
+            return numpy.array(value, dtype=dtype)
+        except OverflowError:
+            raise ValueError(f"value out of range for {data_type.value}")
+
+    return to_numpy
+
+
+_TYPED_LIST_CHECKERS: Dict[TypedListModes, Dict[ConfigTypes, Callable[[Any], Any]]] = dict()
+
+
+def get_value_checker(data_type: ConfigTypes, typed_list: Optional[TypedListModes] = None) -> Callable[[Any], Any]:
+    """Get the function that checks and converts values of a data type.
+
+    Notes:
+        With typed_list list.int, list.float and list.bool values are stored in an array.array or NumPy array instead
+        of a list. JSON2Obj.to_dict and file writes output them as plain lists.
+
+    Args:
+        data_type: ConfigTypes of the value.
+        typed_list: TypedListModes to store list.int, list.float and list.bool values with. If None values are stored
+            in a list.
+
+    Returns: Function that takes a value and returns it converted to the data type.
+
+    Raises:
+        TypeError: if the data type is unknown.
+
+    """
+    if typed_list is not None and data_type in [ConfigTypes.int_list, ConfigTypes.float_list, ConfigTypes.bool_list]:
+        checkers = _TYPED_LIST_CHECKERS.setdefault(typed_list, dict())
+        checker = checkers.get(data_type)
+        if checker is None:
+            to_typed_list = _to_array if typed_list is TypedListModes.ARRAY else _to_numpy
+            checker = to_typed_list(data_type)
+            checkers[data_type] = checker
+        return checker
 
-    if data_type is ConfigTypes.int_list:
-        check_list(value)
-        return [int(i) for i in value]
+    checker = _VALUE_CHECKERS.get(data_type)
+    if checker is None:
+        raise TypeError("unknown data type")
+    return checker
 
-    if data_type is ConfigTypes.float_list:
-        check_list(value)
-        return [float(f) for f in value]
 
-    raise TypeError("unknown data type")
+def check_value(value: Any, data_type: ConfigTypes, typed_list: Optional[TypedListModes] = None):
+    return get_value_checker(data_type, typed_list)(value)
 
 
 class ConfigVariable:
@@ -96,6 +195,7 @@ class ConfigVariable:
         required: bool = False,
         example: str = None,
         metadata: dict = None,
+        typed_list: Union[bool, str] = False,
         **kwargs,
     ):
         self.name = name
@@ -106,6 +206,9 @@ class ConfigVariable:
         self.required = required
         self.example = example
         self.metadata = JSON2Obj(metadata, None)
+        self.typed_list: Optional[TypedListModes] = None
+        if typed_list:
+            self.typed_list = TypedListModes.ARRAY if typed_list is True else TypedListModes(typed_list)
         self._value = None
 
     @property
@@ -117,7 +220,7 @@ class ConfigVariable:
         self.value = self.check_value(value)
 
     def check_value(self, value: Any) -> Any:
-        return check_value(value, self.data_type)
+        return check_value(value, self.data_type, self.typed_list)
 
     def to_dict(self):
         data = dict(name=self.name, type=self.data_type.value,)
@@ -125,6 +228,8 @@ class ConfigVariable:
             data.update(dict(required=self.required))
         if self.default_none_okay:
             data.update(dict(default=self.default_value, default_none_okay=self.default_none_okay))
+        if self.typed_list:
+            data.update(dict(typed_list=self.typed_list.value))
         for key, val in dict(description=self.description, default=self.default_value, example=self.example).items():
             if val is None:
                 continue
@@ -175,6 +280,7 @@ class DefaultConfigFile:
     def __init__(self, default_config: Union[str, dict], config_template: ConfigTemplate):
         if isinstance(default_config, str):
             default_config = read_raw_file(default_config)
+        self._default_config = default_config
 
         self.sections = dict()
 
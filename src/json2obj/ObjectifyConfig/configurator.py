@@ -2,16 +2,20 @@
 """
 configurator.py	
 """
-import logging
 from pathlib import Path
-from typing import Dict, Union
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Union
 
-from ruamel.yaml.comments import CommentedMap
-
-from ..files import FileTypes, get_file_objects, get_file_type, read_raw_file, write_object_to_file
+from .. import instrumentation
+from ..compact import CompactObj
+from ..files import FileTypes, get_file_type, read_raw_file, write_object_to_file
 from ..json2obj import JSON2Obj
-from ..yaml_file import YamlFile
+from ..yaml_file import YamlFile, YamlModes
 from .config_class import ConfigTemplate, DefaultConfigFile, ConfigVariable
+from .snapshot import content_hash, validate_with_snapshot
+from .validator import CompiledValidator, ValidationReport, get_user_config
+
+if TYPE_CHECKING:
+    from ruamel.yaml.comments import CommentedMap
 
 
 class Configurator:
@@ -28,6 +32,8 @@ class Configurator:
             self.config_template = ConfigTemplate(config=config_template)
         if isinstance(config_template, ConfigTemplate):
             self.config_template = config_template
+        # Generated config classes by the content hash of their default config, for typed snapshot loads.
+        self.__config_classes: Dict[str, type] = dict()
 
     def check_default_config(self, default_config: Union[str, dict]):
         """Check the default config against the base config template.
@@ -71,6 +77,83 @@ class Configurator:
         default_config = DefaultConfigFile(default_config, self.config_template)
         return default_config
 
+    def compile(self, default_config: Union[str, dict]) -> CompiledValidator:
+        """Compile a validator for the default config that can be reused for many user configs.
+
+        Notes:
+            The default config is read and checked once and the checker and default of every field is worked out up
+            front, so each user config only has the per-field work done on it.
+
+        Args:
+            default_config: Dict of default config or path to JSON or YAML file.
+
+        Returns: CompiledValidator that takes a user config and returns the validated user config as a JSON2Obj
+
+        """
+        return CompiledValidator(self.config_template, self.read_default_config(default_config))
+
+    def generate_code(self, default_config: Union[str, dict], class_name: str = "Config") -> str:
+        """Generate a Python module of typed, slotted classes for validated configs of the template.
+
+        Notes:
+            See codegen.generate_code. The code is cached by a hash of the template, default config and class name.
+
+        Args:
+            default_config: Dict of default config or path to JSON or YAML file.
+            class_name: Name of the class of the whole config.
+
+        Returns: Python source of the module.
+
+        """
+        from .codegen import generate_code
+
+        return generate_code(self.config_template, self.read_default_config(default_config), class_name)
+
+    def write_code(self, path: str, default_config: Union[str, dict], class_name: str = "Config") -> bool:
+        """Write the Python module of typed classes for validated configs of the template.
+
+        Args:
+            path: Path of the Python file to write.
+            default_config: Dict of default config or path to JSON or YAML file.
+            class_name: Name of the class of the whole config.
+
+        Returns: True if the file was written, False if it was already generated from the same template hash.
+
+        """
+        from .codegen import write_code
+
+        return write_code(path, self.config_template, self.read_default_config(default_config), class_name)
+
+    def validate_many(
+        self,
+        paths: Iterable[str],
+        default_config: Union[str, dict],
+        workers: Optional[int] = None,
+        executor: str = "process",
+        add_missing: bool = True,
+        ignore_required: bool = False,
+    ) -> ValidationReport:
+        """Validate many user config files against the same default config.
+
+        Notes:
+            The template and default config are read once and the files are parsed and validated across a pool of
+            workers. See CompiledValidator.validate_many.
+
+        Args:
+            paths: Paths to JSON or YAML user config files.
+            default_config: Dict of default config or path to JSON or YAML file.
+            workers: Number of workers. If None the number of CPUs is used.
+            executor: process or thread.
+            add_missing: If True add the default values to the user config if they are missing.
+            ignore_required: If True ignore required values.
+
+        Returns: ValidationReport with a ValidationResult for every path in the order they were given.
+
+        """
+        return self.compile(default_config).validate_many(
+            paths, workers=workers, executor=executor, add_missing=add_missing, ignore_required=ignore_required
+        )
+
     @staticmethod
     def get_user_config(user_config: Union[str, dict]) -> dict:
         """Get user_config from an object as a dict
@@ -81,11 +164,7 @@ class Configurator:
         Returns:
 
         """
-        if isinstance(user_config, str):
-            user_config = JSON2Obj.to_dict(get_file_objects(user_config).load())
-        if isinstance(user_config, dict):
-            return user_config
-        raise TypeError("invalid type for user config")
+        return get_user_config(user_config)
 
     def validate_user_config(
         self,
@@ -93,78 +172,55 @@ class Configurator:
         default_config: Union[str, dict],
         add_missing: bool = True,
         ignore_required: bool = False,
-    ) -> JSON2Obj:
+        snapshot_dir: Optional[str] = None,
+        typed: bool = False,
+    ) -> Union[JSON2Obj, CompactObj]:
         """Validate the user config based off of the default config.
 
         Notes:
             This will also add default values to the user_config from the default_config if they are missing and not
-            marked as required.
+            marked as required. Use compile to validate many user configs against the same default config.
 
         Args:
             user_config: Dict of user config or path to JSON or YAML file.
             default_config: Dict of default config or path to JSON or YAML file.
             add_missing: If True add the default values to the user config if they are missing.
             ignore_required: If True ignore required values. This is used for updating a config file.
+            snapshot_dir: Directory to keep snapshots of validated configs in. If the template, default config and user
+                config have not changed since the last validation the snapshot is loaded instead of reading and
+                validating them again. Env vars are never stored in a snapshot and are resolved on every load.
+            typed: If True return an instance of the class generated for the template (see generate_code) instead of
+                a JSON2Obj. Its fields are slots with static types.
 
-        Returns: Validated user config as a JSON2Obj
+        Returns: Validated user config as a JSON2Obj, or as the generated class if typed is True
 
         """
-        user_config = self.get_user_config(user_config)
-        default_config = self.read_default_config(default_config)
+        with instrumentation.operation("validate", user_config if isinstance(user_config, str) else None):
+            if snapshot_dir is not None:
+                with instrumentation.phase("snapshot"):
+                    config = validate_with_snapshot(
+                        self, user_config, default_config, add_missing, ignore_required, snapshot_dir
+                    )
+                if typed:
+                    return self.__config_class(default_config).from_dict(config)
+                return JSON2Obj(config)
+            with instrumentation.phase("read_user_config"):
+                user_config = self.get_user_config(user_config)
+            with instrumentation.phase("compile"):
+                validator = self.compile(default_config)
+            return validator.validate(
+                user_config, add_missing=add_missing, ignore_required=ignore_required, typed=typed
+            )
 
-        for section_name, section_info in JSON2Obj.to_dict(default_config.get_obj()).items():
-            if (
-                section_name not in user_config
-                and self.config_template.sections[section_name].section_type == "variable"
-            ):
-                var_config: Dict[str, ConfigVariable] = JSON2Obj.to_dict(
-                    JSON2Obj.get(default_config.get_obj(), section_name)
-                )
-                any_required = any(val.required is True for key, val in var_config.items())
-
-                if (add_missing and not any_required) or ignore_required:
-                    user_config[section_name] = dict()
-                else:
-                    if any_required:
-                        raise KeyError(f"user config file missing section: {section_name}")
-                    else:
-                        user_config[section_name] = dict()
+    def __config_class(self, default_config: Union[str, dict]) -> type:
+        """Get the generated class for a default config without compiling a validator again for the same content."""
+        key = content_hash(default_config)
+        config_class = self.__config_classes.get(key)
+        if config_class is None:
+            config_class = self.__config_classes[key] = self.compile(default_config).config_class
+        return config_class
 
-            if self.config_template.sections[section_name].section_type == "custom":
-                # NOTE: We do not validate here because some things like metadata may only need to be in the plugin
-                #  config and not in the user config. Below is code to validate this if it were to change in the future.
-
-                # for sub_name, sub_val in self.config_template.sections[section_name].fields.items():
-                #     if sub_val.required and sub_name not in user_config.get(section_name, {}):
-                #         raise KeyError(f"user_config section: {section_name} missing required field: {sub_val.name}")
-                pass
-            elif self.config_template.sections[section_name].section_type == "variable":
-                var_config: Dict[str, ConfigVariable] = JSON2Obj.to_dict(
-                    JSON2Obj.get(default_config.get_obj(), section_name)
-                )
-                for sub_name, sub_val in var_config.items():
-                    value = user_config.get(section_name, {}).get(sub_name)
-                    if add_missing:
-                        if value and sub_val.default_none_okay is not False:
-                            value = sub_val.check_value(value)
-                        if value is None and sub_val.default_none_okay is not True:
-                            value = sub_val.default_value
-                    else:
-                        value = sub_val.check_value(value)
-                        if value:
-                            logging.debug(f"value {value} is valid for {sub_val.data_type}")
-                        elif ignore_required:
-                            logging.warning(
-                                f"value {sub_val.default_value} added to field {sub_name} but is marked as required."
-                            )
-                            value = sub_val.default_value
-                        elif sub_val.required and not sub_val.default_none_okay:
-                            raise ValueError(f"missing required value: {sub_name}")
-                    user_config[section_name].update({sub_name: value})
-
-        return JSON2Obj(user_config)
-
-    def _add_comments_and_examples(self, sample_config: YamlFile, default_config: str) -> CommentedMap:
+    def _add_comments_and_examples(self, sample_config: YamlFile, default_config: str) -> "CommentedMap":
         """Add comments and examples for the sample config file.
 
         Args:
@@ -176,7 +232,7 @@ class Configurator:
         """
         default_config = self.read_default_config(default_config)
         default_config_dict = JSON2Obj.to_dict(default_config.get_obj())
-        sample_config_raw: CommentedMap = sample_config.read_file()
+        sample_config_raw: "CommentedMap" = sample_config.read_file(YamlModes.ROUND_TRIP)
         for section_name, section_info in default_config_dict.items():
             if self.config_template.sections[section_name].section_type == "custom":
                 continue
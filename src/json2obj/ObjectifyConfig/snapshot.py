@@ -0,0 +1,355 @@
+#!/usr/bin/python3
+"""
+snapshot.py
+
+Snapshots of validated user configs so a process can start without parsing and validating unchanged config files again.
+
+A snapshot is keyed by content hashes of the config template, the default config and the user config. It stores the
+validated config with every env var reference put back in place of its value, so no secret is written to disk.
+References are resolved again, and the values checked again, each time a snapshot is loaded.
+
+Snapshots are written with marshal, which is fast and can only hold plain data, so loading a snapshot can not run code.
+"""
+import hashlib
+import json
+import logging
+import marshal
+import os
+import tempfile
+from array import array
+from pathlib import Path
+from typing import Any, Callable, List, NamedTuple, Optional, Tuple, Union
+
+from ..env_vars import check_for_env_vars, find_env_var_references
+from ..files import read_raw_file
+from .config_class import BoolArray, ConfigTypes, TypedListModes, get_value_checker
+from .validator import CompiledField, CompiledValidator
+
+# Bump this when the way configs are validated changes so old snapshots are not used.
+SNAPSHOT_VERSION = 1
+
+_MAGIC = b"J2OSNAP"
+_ARRAY_TAG = "__array__"
+_BOOL_ARRAY_TAG = "__bool_array__"
+_NUMPY_TAG = "__numpy__"
+_PLAIN_TYPES = (bool, str, int, float)
+
+
+class Snapshot(NamedTuple):
+    config: dict
+    # (path, reference) of every env var reference in the user config.
+    references: Tuple[Tuple[tuple, dict], ...]
+    # (section name, field) of every variable field with a reference in it. These are checked again after loading.
+    fields: Tuple[Tuple[str, CompiledField], ...]
+
+
+def content_hash(source: Any) -> str:
+    """Hash a config source.
+
+    Args:
+        source: Path to a file, which is hashed by its bytes, or data, which is hashed as sorted JSON.
+
+    Returns: Hex sha256 digest.
+
+    """
+    digest = hashlib.sha256()
+    if isinstance(source, (str, Path)):
+        with open(source, "rb") as file:
+            for chunk in iter(lambda: file.read(64 * 1024), b""):
+                digest.update(chunk)
+    else:
+        digest.update(json.dumps(source, sort_keys=True, default=repr).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def snapshot_key(
+    config_template: Any, default_config: Any, user_config: Any, add_missing: bool, ignore_required: bool
+) -> str:
+    """Get the snapshot key for a validation.
+
+    Args:
+        config_template: Path to the config template or the template data.
+        default_config: Path to the default config or the default config data.
+        user_config: Path to the user config or the user config data.
+        add_missing: add_missing of the validation.
+        ignore_required: ignore_required of the validation.
+
+    Returns: Hex sha256 digest of the inputs.
+
+    """
+    parts = [
+        f"v{SNAPSHOT_VERSION}",
+        content_hash(config_template),
+        content_hash(default_config),
+        content_hash(user_config),
+        str(add_missing),
+        str(ignore_required),
+    ]
+    return hashlib.sha256(":".join(parts).encode("utf-8")).hexdigest()
+
+
+def create_snapshot(validator: CompiledValidator, raw_user_config: dict, config: dict) -> Snapshot:
+    """Create a snapshot of a validated user config.
+
+    Args:
+        validator: CompiledValidator the config was validated with.
+        raw_user_config: User config as it was read, before env vars were resolved.
+        config: Validated user config.
+
+    Returns: Snapshot with every env var reference of the user config put back in place of its value.
+
+    """
+    raw_user_config = _plain(raw_user_config)
+    references = tuple(find_env_var_references(raw_user_config))
+    config = _plain(config)
+
+    # A field with a reference in it is stored as it was in the user config, since checking the value may have changed
+    # its shape (like a list turned into an array). It is checked again after the references are resolved.
+    variable_fields = {(s.name, f.name): f for s in validator.sections for f in s.fields}
+    fields = dict()
+    for path, reference in references:
+        if path[:2] in variable_fields:
+            section_name, field_name = path[:2]
+            config[section_name][field_name] = raw_user_config[section_name][field_name]
+            fields[path[:2]] = (section_name, variable_fields[path[:2]])
+        else:
+            _set_path(config, path, reference)
+    return Snapshot(config=config, references=references, fields=tuple(fields.values()))
+
+
+def restore_snapshot(
+    snapshot: Snapshot,
+    add_missing: bool,
+    ignore_required: bool,
+    env_var_function: Optional[Callable] = check_for_env_vars,
+) -> dict:
+    """Resolve the env var references of a snapshot and check the fields they are in again.
+
+    Args:
+        snapshot: Snapshot to restore.
+        add_missing: add_missing of the validation.
+        ignore_required: ignore_required of the validation.
+        env_var_function: Function to use for resolving env vars.
+
+    Returns: Validated user config.
+
+    Raises:
+        KeyError: if an env var is not set.
+
+    """
+    config = snapshot.config
+    for path, reference in snapshot.references:
+        _set_path(config, path, env_var_function(reference) if env_var_function else reference)
+    for section_name, field in snapshot.fields:
+        section = config[section_name]
+        section[field.name] = field.validate(section.get(field.name), add_missing, ignore_required)
+    return config
+
+
+class SnapshotCache:
+    def __init__(self, directory: Union[str, Path]):
+        """Directory of snapshot files.
+
+        Args:
+            directory: Directory to keep snapshots in. It is created if it does not exist.
+        """
+        self.directory = Path(directory)
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}.snapshot"
+
+    def load(self, key: str) -> Optional[Snapshot]:
+        """Load a snapshot.
+
+        Args:
+            key: Snapshot key from snapshot_key.
+
+        Returns: Snapshot, or None if there is no snapshot for the key or it can not be read.
+
+        """
+        try:
+            with open(self.path(key), "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            return None
+        try:
+            return _decode(data)
+        except (ValueError, EOFError, TypeError, KeyError) as e:
+            logging.warning(f"ignoring unreadable config snapshot {self.path(key)}: {e}")
+            return None
+
+    def save(self, key: str, snapshot: Snapshot) -> bool:
+        """Save a snapshot. The file is written to a temp file and renamed so readers never see part of a snapshot.
+
+        Args:
+            key: Snapshot key from snapshot_key.
+            snapshot: Snapshot to save.
+
+        Returns: True if the snapshot was saved, False if the config has values a snapshot can not hold.
+
+        """
+        try:
+            data = _encode(snapshot)
+        except ValueError as e:
+            logging.warning(f"unable to snapshot config: {e}")
+            return False
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        handle, temp_path = tempfile.mkstemp(dir=self.directory, prefix=".snapshot-")
+        try:
+            with os.fdopen(handle, "wb") as file:
+                file.write(data)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, self.path(key))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return True
+
+    def clear(self):
+        """Remove all snapshots."""
+        for path in self.directory.glob("*.snapshot"):
+            path.unlink()
+
+
+def validate_with_snapshot(
+    configurator,
+    user_config: Union[str, dict],
+    default_config: Union[str, dict],
+    add_missing: bool,
+    ignore_required: bool,
+    snapshot_dir: Union[str, Path],
+) -> dict:
+    """Validate a user config, using a snapshot if the template, default config and user config have not changed.
+
+    Args:
+        configurator: Configurator to validate with.
+        user_config: Dict of user config or path to JSON or YAML file.
+        default_config: Dict of default config or path to JSON or YAML file.
+        add_missing: If True add the default values to the user config if they are missing.
+        ignore_required: If True ignore required values.
+        snapshot_dir: Directory to keep snapshots in.
+
+    Returns: Validated user config as a dict
+
+    """
+    cache = SnapshotCache(snapshot_dir)
+    key = snapshot_key(
+        configurator.config_template._config_template, default_config, user_config, add_missing, ignore_required
+    )
+    snapshot = cache.load(key)
+    if snapshot is not None:
+        return restore_snapshot(snapshot, add_missing, ignore_required)
+
+    raw_user_config = read_raw_file(user_config) if isinstance(user_config, str) else _plain(user_config)
+    validator = configurator.compile(default_config)
+    config = validator.validate_dict(user_config, add_missing=add_missing, ignore_required=ignore_required)
+    cache.save(key, create_snapshot(validator, raw_user_config, config))
+    return config
+
+
+def _plain(data: Any) -> Any:
+    """Copy data with dict and list subclasses (like ruamel CommentedMap) turned into dicts and lists."""
+    if isinstance(data, dict):
+        return {k: _plain(v) for k, v in data.items()}
+    if isinstance(data, list):
+        return [_plain(v) for v in data]
+    return data
+
+
+def _set_path(data: Any, path: tuple, value: Any):
+    for key in path[:-1]:
+        data = data[key]
+    data[path[-1]] = value
+
+
+def _encode_value(value: Any) -> Any:
+    """Turn a value into something marshal can write. Arrays are written as tagged tuples; JSON data has no tuples."""
+    if isinstance(value, dict):
+        return {k: _encode_value(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_encode_value(v) for v in value]
+    if isinstance(value, BoolArray):
+        return _BOOL_ARRAY_TAG, array.tobytes(value)
+    if isinstance(value, array):
+        return _ARRAY_TAG, value.typecode, value.tobytes()
+    if type(value).__module__ == "numpy" and hasattr(value, "tolist"):
+        return _NUMPY_TAG, str(value.dtype), _encode_value(value.tolist())
+    if value is None or type(value) in _PLAIN_TYPES:
+        return value
+    # marshal only writes the exact built in types, so subclasses like the ruamel scalar types are converted.
+    for plain_type in _PLAIN_TYPES:
+        if isinstance(value, plain_type):
+            return plain_type(value)
+    raise ValueError(f"unsupported value type: {type(value).__name__}")
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _decode_value(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_decode_value(v) for v in value]
+    if isinstance(value, tuple):
+        if value[0] == _BOOL_ARRAY_TAG:
+            items = array("b")
+            items.frombytes(value[1])
+            return BoolArray(items)
+        if value[0] == _ARRAY_TAG:
+            items = array(value[1])
+            items.frombytes(value[2])
+            return items
+        if value[0] == _NUMPY_TAG:
+            import numpy
+
+            return numpy.array(value[2], dtype=value[1])
+        raise ValueError(f"unknown snapshot tag: {value[0]}")
+    return value
+
+
+def _encode(snapshot: Snapshot) -> bytes:
+    fields = [
+        (
+            section_name,
+            field.name,
+            field.data_type.value,
+            field.default_value,
+            field.default_none_okay,
+            field.required,
+            field.typed_list.value if field.typed_list else None,
+        )
+        for section_name, field in snapshot.fields
+    ]
+    references = [[list(path), reference] for path, reference in snapshot.references]
+    payload = dict(
+        version=SNAPSHOT_VERSION,
+        config=_encode_value(snapshot.config),
+        references=_encode_value(references),
+        fields=[_encode_value(list(f)) for f in fields],
+    )
+    return _MAGIC + marshal.dumps(payload)
+
+
+def _decode(data: bytes) -> Snapshot:
+    if not data.startswith(_MAGIC):
+        raise ValueError("not a config snapshot")
+    payload = marshal.loads(data[len(_MAGIC) :])
+    if payload["version"] != SNAPSHOT_VERSION:
+        raise ValueError(f"snapshot version {payload['version']} is not {SNAPSHOT_VERSION}")
+
+    fields: List[Tuple[str, CompiledField]] = list()
+    for section_name, name, data_type, default_value, default_none_okay, required, typed_list in payload["fields"]:
+        data_type = ConfigTypes(data_type)
+        typed_list = TypedListModes(typed_list) if typed_list else None
+        field = CompiledField(
+            name=name,
+            checker=get_value_checker(data_type, typed_list),
+            data_type=data_type,
+            default_value=_decode_value(default_value),
+            default_none_okay=default_none_okay,
+            required=required,
+            typed_list=typed_list,
+        )
+        fields.append((section_name, field))
+    references = tuple((tuple(path), reference) for path, reference in payload["references"])
+    return Snapshot(config=_decode_value(payload["config"]), references=references, fields=tuple(fields))
@@ -0,0 +1,334 @@
+#!/usr/bin/python3
+"""
+validator.py
+
+Validator for user configs that is compiled once from a config template and a default config. Everything that only
+depends on the template and the default config (section types, field checkers and defaults) is worked out up front so
+validating a user config only does the per-field work.
+"""
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from .. import instrumentation
+from ..files import get_file_objects
+from ..compact import CompactObj
+from ..json2obj import JSON2Obj
+from .config_class import ConfigTemplate, ConfigTypes, DefaultConfigFile, TypedListModes, get_value_checker
+
+
+class CompiledField(NamedTuple):
+    name: str
+    checker: Callable[[Any], Any]
+    data_type: ConfigTypes
+    default_value: Any
+    default_none_okay: Any
+    required: bool
+    typed_list: Optional[TypedListModes] = None
+
+    def validate(self, value: Any, add_missing: bool = True, ignore_required: bool = False) -> Any:
+        """Check a user config value of this field, the same way for every field of a section.
+
+        Args:
+            value: Value from the user config, or None if it is missing.
+            add_missing: If True use the default value if the value is missing.
+            ignore_required: If True ignore required values.
+
+        Returns: The checked value.
+
+        """
+        if add_missing:
+            if value and self.default_none_okay is not False:
+                value = self.checker(value)
+            if value is None and self.default_none_okay is not True:
+                value = self.default_value
+        else:
+            value = self.checker(value)
+            if value:
+                logging.debug(f"value {value} is valid for {self.data_type}")
+            elif ignore_required:
+                logging.warning(f"value {self.default_value} added to field {self.name} but is marked as required.")
+                value = self.default_value
+            elif self.required and not self.default_none_okay:
+                raise ValueError(f"missing required value: {self.name}")
+        return value
+
+
+class CompiledSection(NamedTuple):
+    name: str
+    fields: Tuple[CompiledField, ...]
+    any_required: bool
+
+
+class CompiledValidator:
+    def __init__(self, config_template: ConfigTemplate, default_config: DefaultConfigFile):
+        """Compile a validator.
+
+        Args:
+            config_template: ConfigTemplate the default config was checked against.
+            default_config: DefaultConfigFile to validate user configs with.
+        """
+        self.config_template = config_template
+        self.default_config = default_config
+        self.sections: List[CompiledSection] = list()
+        self.__config_class: Optional[type] = None
+
+        for section_name, section_info in default_config.sections.items():
+            if config_template.sections[section_name].section_type != "variable":
+                continue
+            fields = tuple(
+                CompiledField(
+                    name=sub_name,
+                    checker=get_value_checker(sub_val.data_type, sub_val.typed_list),
+                    data_type=sub_val.data_type,
+                    default_value=sub_val.default_value,
+                    default_none_okay=sub_val.default_none_okay,
+                    required=sub_val.required,
+                    typed_list=sub_val.typed_list,
+                )
+                for sub_name, sub_val in section_info.items()
+            )
+            any_required = any(f.required is True for f in fields)
+            self.sections.append(CompiledSection(name=section_name, fields=fields, any_required=any_required))
+
+    def __call__(
+        self,
+        user_config: Union[str, dict],
+        add_missing: bool = True,
+        ignore_required: bool = False,
+        typed: bool = False,
+    ) -> Union[JSON2Obj, CompactObj]:
+        return self.validate(user_config, add_missing=add_missing, ignore_required=ignore_required, typed=typed)
+
+    @property
+    def config_class(self) -> type:
+        """Generated typed class of validated configs. It is generated once and cached by template hash."""
+        if self.__config_class is None:
+            from .codegen import load_class
+
+            self.__config_class = load_class(self.config_template, self.default_config)
+        return self.__config_class
+
+    def validate(
+        self,
+        user_config: Union[str, dict],
+        add_missing: bool = True,
+        ignore_required: bool = False,
+        typed: bool = False,
+    ) -> Union[JSON2Obj, CompactObj]:
+        """Validate a user config.
+
+        Notes:
+            Gives the same result as Configurator.validate_user_config with the default config this validator was
+            compiled with. Like validate_user_config, a user config dict is updated in place.
+
+        Args:
+            user_config: Dict of user config or path to JSON or YAML file.
+            add_missing: If True add the default values to the user config if they are missing.
+            ignore_required: If True ignore required values. This is used for updating a config file.
+            typed: If True return an instance of the generated config_class instead of a JSON2Obj.
+
+        Returns: Validated user config as a JSON2Obj, or as a config_class if typed is True
+
+        """
+        with instrumentation.operation("validate", user_config if isinstance(user_config, str) else None):
+            config = self.validate_dict(user_config, add_missing=add_missing, ignore_required=ignore_required)
+            if typed:
+                return self.config_class.from_dict(config)
+            return JSON2Obj(config)
+
+    def validate_dict(
+        self, user_config: Union[str, dict], add_missing: bool = True, ignore_required: bool = False
+    ) -> dict:
+        """Validate a user config and return it as a dict.
+
+        Args:
+            user_config: Dict of user config or path to JSON or YAML file.
+            add_missing: If True add the default values to the user config if they are missing.
+            ignore_required: If True ignore required values. This is used for updating a config file.
+
+        Returns: Validated user config as a dict
+
+        """
+        with instrumentation.phase("read_user_config"):
+            user_config = get_user_config(user_config)
+
+        with instrumentation.phase("validate"):
+            self.__validate_sections(user_config, add_missing, ignore_required)
+        return user_config
+
+    def __validate_sections(self, user_config: dict, add_missing: bool, ignore_required: bool):
+        for section in self.sections:
+            if section.name not in user_config:
+                if section.any_required and not ignore_required:
+                    raise KeyError(f"user config file missing section: {section.name}")
+                user_config[section.name] = dict()
+            user_section: dict = user_config[section.name]
+
+            for field in section.fields:
+                user_section[field.name] = field.validate(user_section.get(field.name), add_missing, ignore_required)
+
+    def validate_many(
+        self,
+        paths: Iterable[str],
+        workers: Optional[int] = None,
+        executor: str = "process",
+        add_missing: bool = True,
+        ignore_required: bool = False,
+    ) -> "ValidationReport":
+        """Validate many user config files.
+
+        Notes:
+            With the process executor each worker process compiles the validator once from the template and default
+            config and then parses and validates its share of the files. A file that fails does not stop the others;
+            its error is recorded in the report.
+
+        Args:
+            paths: Paths to JSON or YAML user config files.
+            workers: Number of workers. If None the number of CPUs is used. With 1 worker the files are validated in
+                this process.
+            executor: process or thread. Parsing and validation are CPU bound so process scales with cores, thread
+                avoids starting processes for small batches.
+            add_missing: If True add the default values to the user config if they are missing.
+            ignore_required: If True ignore required values.
+
+        Returns: ValidationReport with a ValidationResult for every path in the order they were given.
+
+        Raises:
+            ValueError: if the executor is not process or thread.
+
+        """
+        if executor not in ["process", "thread"]:
+            raise ValueError(f"unknown executor: {executor}")
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+        paths = [str(path) for path in paths]
+        workers = min(workers or os.cpu_count() or 1, len(paths))
+
+        if workers <= 1:
+            outputs = [_validate_file(self, path, add_missing, ignore_required) for path in paths]
+        elif executor == "thread":
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                outputs = list(pool.map(lambda path: _validate_file(self, path, add_missing, ignore_required), paths))
+        else:
+            initargs = (self.config_template._config_template, self.default_config._default_config)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+                args = [(path, add_missing, ignore_required) for path in paths]
+                chunk_size = max(1, len(paths) // (workers * 4))
+                outputs = list(pool.map(_validate_file_in_worker, args, chunksize=chunk_size))
+
+        return ValidationReport([_to_result(output) for output in outputs])
+
+
+def get_user_config(user_config: Union[str, dict]) -> dict:
+    """Get user_config from an object as a dict
+
+    Args:
+        user_config: Dict of user config or path to JSON or YAML file.
+
+    Returns: User config as a dict
+
+    """
+    if isinstance(user_config, str):
+        user_config = JSON2Obj.to_dict(get_file_objects(user_config).load())
+    if isinstance(user_config, dict):
+        return user_config
+    raise TypeError("invalid type for user config")
+
+
+class ValidationResult(NamedTuple):
+    path: str
+    config: Optional[JSON2Obj]
+    error_type: Optional[str]
+    error: Optional[str]
+    duration: float
+
+    @property
+    def ok(self) -> bool:
+        return self.error_type is None
+
+
+class ValidationReport:
+    def __init__(self, results: List[ValidationResult]):
+        """Results of validating many user configs.
+
+        Args:
+            results: ValidationResult for every user config in the order they were given.
+        """
+        self.results = results
+
+    def __iter__(self) -> Iterator[ValidationResult]:
+        return iter(self.results)
+
+    def __len__(self):
+        return len(self.results)
+
+    @property
+    def ok(self) -> bool:
+        return all(result.ok for result in self.results)
+
+    @property
+    def passed(self) -> List[ValidationResult]:
+        return [result for result in self.results if result.ok]
+
+    @property
+    def failed(self) -> List[ValidationResult]:
+        return [result for result in self.results if not result.ok]
+
+    @property
+    def configs(self) -> Dict[str, JSON2Obj]:
+        """Validated configs keyed by path for every user config that passed."""
+        return {result.path: result.config for result in self.results if result.ok}
+
+    def to_dict(self) -> dict:
+        """Output the report as a dict that can be written to a JSON or YAML file.
+
+        Returns: Dict with counts and the error of every user config that failed.
+
+        """
+        return dict(
+            total=len(self.results),
+            passed=len(self.passed),
+            failed=[
+                dict(path=result.path, error_type=result.error_type, error=result.error, duration=result.duration)
+                for result in self.failed
+            ],
+        )
+
+
+# Validator for each worker process. It is compiled once per process by _init_worker.
+_worker_validator: Optional[CompiledValidator] = None
+
+
+def _init_worker(config_template: dict, default_config: dict):
+    global _worker_validator
+    from .configurator import Configurator
+
+    _worker_validator = Configurator(config_template).compile(default_config)
+
+
+def _validate_file(
+    validator: CompiledValidator, path: str, add_missing: bool, ignore_required: bool
+) -> Tuple[str, Optional[dict], Optional[str], Optional[str], float]:
+    start = time.perf_counter()
+    try:
+        config = validator.validate_dict(path, add_missing=add_missing, ignore_required=ignore_required)
+    except Exception as e:
+        return path, None, type(e).__name__, str(e), time.perf_counter() - start
+    return path, config, None, None, time.perf_counter() - start
+
+
+def _validate_file_in_worker(args: Tuple[str, bool, bool]):
+    return _validate_file(_worker_validator, *args)
+
+
+def _to_result(output: Tuple[str, Optional[dict], Optional[str], Optional[str], float]) -> ValidationResult:
+    path, config, error_type, error, duration = output
+    return ValidationResult(
+        path=path,
+        config=None if config is None else JSON2Obj(config),
+        error_type=error_type,
+        error=error,
+        duration=duration,
+    )
@@ -0,0 +1,179 @@
+#!/usr/bin/python3
+"""
+compact.py
+
+Compact slotted objects for JSON data. Every distinct set of keys gets one generated __slots__ class that is cached by
+shape, so large lists of records that share the same keys share one layout and one precomputed field tuple.
+"""
+from typing import Callable, Dict, Optional, Tuple
+
+from .env_vars import RESOLVE, check_for_env_vars, get_env_var_plan
+
+_SHAPE_CACHE: Dict[Tuple[str, ...], type] = dict()
+
+
+class CompactObj:
+    __slots__ = ()
+    _fields: Tuple[str, ...] = ()
+
+    def __eq__(self, other):
+        if isinstance(other, CompactObj):
+            return CompactObj.to_dict(self) == CompactObj.to_dict(other)
+        return CompactObj.to_dict(self) == other
+
+    def __repr__(self):
+        return str(CompactObj.to_dict(self))
+
+    @staticmethod
+    def to_dict(compact_object: "CompactObj") -> dict:
+        """Output CompactObj as a dict.
+
+        Returns: Dict of data stored in the object.
+
+        """
+        from .json2obj import JSON2Obj
+
+        return JSON2Obj.to_dict(compact_object)
+
+    @staticmethod
+    def get(compact_object: "CompactObj", key, default=None):
+        """Simple get function.
+
+        Args:
+            compact_object: CompactObj object to get the value for.
+            key: Key to get value for.
+            default: Default value if key is missing. (Default=None)
+
+        Returns: Attribute of the object with the provided key or the default value.
+
+        """
+        return getattr(compact_object, key, default)
+
+
+def is_compact_shape(fields: Tuple[str, ...]) -> bool:
+    """Check if a set of keys can be stored in a slotted class.
+
+    Args:
+        fields: Keys of the input dict.
+
+    Returns: True if every key is a public identifier that does not clash with a CompactObj attribute.
+
+    """
+    return all(
+        isinstance(f, str) and f.isidentifier() and not f.startswith("_") and not hasattr(CompactObj, f) for f in fields
+    )
+
+
+def compact_class(fields: Tuple[str, ...]) -> type:
+    """Get the slotted class for a set of keys, creating and caching it the first time the shape is seen.
+
+    Args:
+        fields: Keys of the input dict.
+
+    Returns: CompactObj subclass with one slot per key.
+
+    """
+    cls = _SHAPE_CACHE.get(fields)
+    if cls is None:
+        attributes = {"__slots__": fields, "_fields": fields, "__reduce__": _reduce}
+        cls = _SHAPE_CACHE[fields] = type("CompactObj", (CompactObj,), attributes)
+    return cls
+
+
+def clear_shape_cache():
+    """Remove all cached slotted classes."""
+    _SHAPE_CACHE.clear()
+
+
+def from_dict(input_data: dict, env_var_function: Optional[Callable] = check_for_env_vars):
+    """Build a compact object from a dict.
+
+    Notes:
+        Dicts with keys that can not be used as slots (not identifiers, private names or names like get) are built as
+        a JSON2Obj instead.
+
+    Args:
+        input_data: Input data for object.
+        env_var_function: Function to use for checking for env vars.
+
+    Returns: CompactObj, or JSON2Obj if the keys can not be slotted.
+
+    """
+    env_var_plan = None
+    if env_var_function is check_for_env_vars:
+        env_var_plan = get_env_var_plan(input_data)
+    return _from_dict(input_data, env_var_function, env_var_plan)
+
+
+def convert_value(value, env_var_function: Optional[Callable] = check_for_env_vars):
+    """Build the compact form of a value, like a field of a compact object is built.
+
+    Args:
+        value: Input value.
+        env_var_function: Function to use for checking for env vars.
+
+    Returns: The value with env vars resolved and dicts built as compact objects.
+
+    """
+    return _convert_value(value, env_var_function, None)
+
+
+def _reduce(compact_object: CompactObj) -> tuple:
+    """Pickle a shape class object. Shape classes are generated and can not be imported, so it is rebuilt by shape."""
+    fields = compact_object._fields
+    return _rebuild, (fields, tuple(getattr(compact_object, f) for f in fields))
+
+
+def _rebuild(fields: Tuple[str, ...], values: tuple) -> CompactObj:
+    obj = compact_class(fields)()
+    for key, value in zip(fields, values):
+        setattr(obj, key, value)
+    return obj
+
+
+def _from_dict(input_data: dict, env_var_function: Optional[Callable], env_var_plan: Optional[dict]):
+    fields = tuple(input_data)
+    if not is_compact_shape(fields):
+        from .json2obj import JSON2Obj
+
+        return JSON2Obj(input_data, env_var_function=env_var_function)
+
+    obj = compact_class(fields)()
+    for key, value in input_data.items():
+        value_plan = None if env_var_plan is None else env_var_plan.get(key, _NO_ENV_VARS)
+        setattr(obj, key, _convert_value(value, env_var_function, value_plan))
+    return obj
+
+
+def _from_list(input_list: list, env_var_function: Optional[Callable], env_var_plan: Optional[dict]) -> list:
+    """Build the compact form of every item in a list.
+
+    Args:
+        input_list: input list to be parsed.
+        env_var_function: Function to use for checking for env vars.
+        env_var_plan: Env var plan for the list. If None env_var_function is called for every item.
+
+    Returns: A list of parsed data.
+
+    """
+    output_list = list()
+    for index, item in enumerate(input_list):
+        item_plan = None if env_var_plan is None else env_var_plan.get(index, _NO_ENV_VARS)
+        output_list.append(_convert_value(item, env_var_function, item_plan))
+    return output_list
+
+
+def _convert_value(value, env_var_function: Optional[Callable], env_var_plan):
+    if env_var_function and (env_var_plan is None or env_var_plan is RESOLVE):
+        value = env_var_function(value)
+        if env_var_plan is RESOLVE:
+            env_var_plan = _NO_ENV_VARS
+    if isinstance(value, dict):
+        return _from_dict(value, env_var_function, env_var_plan)
+    if isinstance(value, list):
+        return _from_list(value, env_var_function, env_var_plan)
+    return value
+
+
+# Env var plan for values that have no env var references in them.
+_NO_ENV_VARS: dict = dict()
@@ -0,0 +1,281 @@
+#!/usr/bin/python3
+"""
+diff.py
+
+Path level diffs between config trees and patches that apply them. Changes are JSON Patch (RFC 6902) style dicts, like
+{"op": "replace", "path": "/logging/level", "value": "debug"}, using add, remove and replace.
+
+Frozen trees keep a content digest of every object and list once it has been worked out, so the diff of two frozen
+trees skips every subtree that is the same in both without looking inside it. Only the objects and lists on the path to
+a change are walked. Digests are worked out lazily, so the first diff of a freshly frozen tree still reads all of it.
+"""
+import hashlib
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .compact import CompactObj
+from .frozen import FrozenList, FrozenObj
+from .json2obj import _SCALAR_TYPES, JSON2Obj, _get_private, _set_private
+from .layered import LayeredDict
+from .layered import to_dict as _layered_to_dict
+
+_DIGEST_SIZE = 16
+
+_OPS = ("add", "remove", "replace")
+
+
+def diff(old: Any, new: Any) -> List[dict]:
+    """Get the changes that turn one tree into another.
+
+    Args:
+        old: JSON2Obj, CompactObj or dict to compare from.
+        new: JSON2Obj, CompactObj or dict to compare to.
+
+    Returns: List of changes. Applying them in order to old with apply_patch makes it equal to new.
+
+    """
+    changes: List[dict] = list()
+    stack: List[Tuple[Tuple, Any, Any]] = [((), old, new)]
+    while stack:
+        path, old_value, new_value = stack.pop()
+        if old_value is new_value:
+            continue
+        if path and type(old_value) in _SCALAR_TYPES and type(new_value) in _SCALAR_TYPES:
+            if not _same_value(old_value, new_value):
+                changes.append(dict(op="replace", path=format_pointer(path), value=new_value))
+            continue
+        old_digest = digest(old_value)
+        if old_digest is not None and old_digest == digest(new_value):
+            continue
+
+        old_fields = _fields(old_value)
+        new_fields = _fields(new_value)
+        if old_fields is not None and new_fields is not None:
+            children = list()
+            for key in old_fields:
+                if key not in new_fields:
+                    changes.append(dict(op="remove", path=format_pointer(path + (key,))))
+            for key, value in new_fields.items():
+                if key in old_fields:
+                    children.append((path + (key,), old_fields[key], value))
+                else:
+                    changes.append(dict(op="add", path=format_pointer(path + (key,)), value=_plain(value)))
+            # Reversed so the stack gives back the fields in order.
+            stack.extend(reversed(children))
+            continue
+
+        old_items = _items(old_value)
+        new_items = _items(new_value)
+        if old_items is not None and new_items is not None:
+            common = min(len(old_items), len(new_items))
+            # Extra old items are removed from the end first, so the indexes of the ones before them do not move.
+            for index in range(len(old_items) - 1, common - 1, -1):
+                changes.append(dict(op="remove", path=format_pointer(path + (index,))))
+            for index in range(common, len(new_items)):
+                changes.append(dict(op="add", path=format_pointer(path + (index,)), value=_plain(new_items[index])))
+            stack.extend((path + (index,), old_items[index], new_items[index]) for index in range(common - 1, -1, -1))
+            continue
+
+        if not _same_value(old_value, new_value):
+            if not path:
+                raise TypeError("unable to diff: both values must be objects")
+            changes.append(dict(op="replace", path=format_pointer(path), value=_plain(new_value)))
+    return changes
+
+
+def apply_patch(obj: JSON2Obj, patch: List[dict]):
+    """Apply changes to a JSON2Obj in place.
+
+    Notes:
+        The changes are applied in order and are not rolled back if one fails.
+
+    Args:
+        obj: JSON2Obj object to change.
+        patch: List of add, remove and replace changes, like the ones diff returns.
+
+    Raises:
+        KeyError: if the path of a change is missing.
+        ValueError: if a change has an unsupported op or an invalid path.
+        TypeError: if a change is to a read only object.
+
+    """
+    for change in patch:
+        op = change.get("op")
+        if op not in _OPS:
+            raise ValueError(f"unsupported patch op: {op}")
+        path = parse_pointer(change.get("path", ""))
+        if not path:
+            raise ValueError(f"unable to {op} the root of the tree")
+        parent = obj
+        for segment in path[:-1]:
+            parent = _child(parent, segment, path)
+        key = path[-1]
+
+        if isinstance(parent, list):
+            if key == "-" and op == "add":
+                parent.append(_node(change["value"]))
+                continue
+            index = _list_index(parent, key, path, allow_end=op == "add")
+            if op == "add":
+                parent.insert(index, _node(change["value"]))
+            elif op == "remove":
+                del parent[index]
+            else:
+                parent[index] = _node(change["value"])
+        elif isinstance(parent, JSON2Obj):
+            if op != "add" and key not in parent.__dict_fields__():
+                raise KeyError(f"missing path segment: {format_pointer(path)}")
+            if op == "remove":
+                # A lazy field is built first, so it is in __dict__ to delete.
+                getattr(parent, key)
+                delattr(parent, key)
+            else:
+                setattr(parent, key, _node(change["value"]))
+            _forget_raw(parent, key)
+        else:
+            raise KeyError(f"missing path segment: {format_pointer(path)}")
+
+
+def digest(value: Any) -> Optional[bytes]:
+    """Get the content digest of a frozen object or list, working it out and keeping it the first time.
+
+    Args:
+        value: Value to get the digest of.
+
+    Returns: Digest of the value, or None if it is not a FrozenObj or FrozenList. Values with the same digest are equal.
+
+    """
+    if not isinstance(value, (FrozenObj, FrozenList)):
+        return None
+    cached = _cached_digest(value)
+    if cached is not None:
+        return cached
+
+    # Find the objects and lists without a digest, parents before children, then work them out children first.
+    order = list()
+    stack = [value]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        for child in node if isinstance(node, FrozenList) else _fields(node).values():
+            if isinstance(child, (FrozenObj, FrozenList)) and _cached_digest(child) is None:
+                stack.append(child)
+
+    for node in reversed(order):
+        if _cached_digest(node) is not None:
+            continue
+        content = hashlib.blake2b(digest_size=_DIGEST_SIZE)
+        if isinstance(node, FrozenList):
+            content.update(b"l")
+            for child in node:
+                content.update(_value_digest(child))
+        else:
+            content.update(b"o")
+            for key, child in sorted(_fields(node).items()):
+                content.update(_scalar_digest(key))
+                content.update(_value_digest(child))
+        # Every thread that gets here first works out the same digest, so there is no need to lock.
+        _set_private(node, "digest", content.digest())
+    return _cached_digest(value)
+
+
+def format_pointer(path: Tuple) -> str:
+    """Format path segments as a JSON pointer, like ("routes", 0, "name") as /routes/0/name."""
+    return "".join("/" + str(segment).replace("~", "~0").replace("/", "~1") for segment in path)
+
+
+def parse_pointer(pointer: str) -> Tuple[str, ...]:
+    """Parse a JSON pointer, like /routes/0/name, into its segments. List indexes are left as strings.
+
+    Raises:
+        ValueError: if the pointer is not empty and does not start with /.
+
+    """
+    if not pointer:
+        return ()
+    if not pointer.startswith("/"):
+        raise ValueError(f"invalid path: {pointer}")
+    return tuple(segment.replace("~1", "/").replace("~0", "~") for segment in pointer[1:].split("/"))
+
+
+def _cached_digest(value: Any) -> Optional[bytes]:
+    return _get_private(value, "digest")
+
+
+def _value_digest(value: Any) -> bytes:
+    if isinstance(value, (FrozenObj, FrozenList)):
+        return _cached_digest(value)
+    return _scalar_digest(value)
+
+
+def _scalar_digest(value: Any) -> bytes:
+    """Digest of a scalar. The type is part of it, so 1, 1.0, True and "1" all have different digests."""
+    encoded = f"{type(value).__name__}:{value!r}".encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=_DIGEST_SIZE).digest()
+
+
+def _fields(value: Any) -> Optional[Dict[str, Any]]:
+    """Fields of an object as a dict, or None if the value is not an object."""
+    if isinstance(value, dict):
+        return value
+    if isinstance(value, LayeredDict):
+        return dict(value.items())
+    if isinstance(value, JSON2Obj):
+        return {field: getattr(value, field) for field in value.__dict_fields__()}
+    if isinstance(value, CompactObj):
+        return {field: getattr(value, field) for field in value._fields}
+    return None
+
+
+def _items(value: Any) -> Optional[List[Any]]:
+    """Items of a list (or tuple or array), or None if the value is not a list."""
+    if isinstance(value, (list, tuple)):
+        return value
+    to_list: Optional[Callable] = getattr(value, "tolist", None)
+    if to_list is None:
+        return None
+    # Arrays (and shared lists) have tolist. Scalars like numpy numbers have it too but it does not give a list.
+    items = to_list()
+    return items if isinstance(items, list) else None
+
+
+def _same_value(old_value: Any, new_value: Any) -> bool:
+    # True == 1 in python, but a change from true to 1 is a change in JSON.
+    return old_value == new_value and isinstance(old_value, bool) == isinstance(new_value, bool)
+
+
+def _plain(value: Any) -> Any:
+    return _layered_to_dict(JSON2Obj.to_dict(value))
+
+
+def _node(value: Any) -> Any:
+    """Build the value of a change the way JSON2Obj builds the values of its fields."""
+    if type(value) in _SCALAR_TYPES:
+        return value
+    return JSON2Obj(dict(value=value), env_var_function=None).value
+
+
+def _child(parent: Any, segment: str, path: Tuple[str, ...]) -> Any:
+    if isinstance(parent, list):
+        return parent[_list_index(parent, segment, path)]
+    if isinstance(parent, JSON2Obj) and segment in parent.__dict_fields__():
+        return getattr(parent, segment)
+    raise KeyError(f"missing path segment: {format_pointer(path)}")
+
+
+def _list_index(items: list, segment: str, path: Tuple[str, ...], allow_end: bool = False) -> int:
+    if not segment.isdigit() or (segment != "0" and segment.startswith("0")):
+        raise ValueError(f"invalid list index {segment} in path: {format_pointer(path)}")
+    index = int(segment)
+    if index > len(items) or (index == len(items) and not allow_end):
+        raise KeyError(f"missing path segment: {format_pointer(path)}")
+    return index
+
+
+def _forget_raw(obj: JSON2Obj, key: str):
+    """Drop a key from the raw dict of a lazy or deferred object, so its old raw value is not built or output later."""
+    raw = _get_private(obj, "raw")
+    if isinstance(raw, (dict, LayeredDict)) and key in raw:
+        # The raw dict may be the caller's input data, so it is copied rather than changed.
+        raw = dict(raw)
+        del raw[key]
+        _set_private(obj, "raw", raw)
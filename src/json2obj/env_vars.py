@@ -2,26 +2,245 @@
 """
 env_vars.py	
 """
+import logging
 import os
+import time
 from base64 import b64decode
-from typing import Union
+from contextvars import copy_context
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Set, Tuple, Union
+
+from . import instrumentation
+
+# Seconds to keep decrypted KMS values in memory.
+KMS_CACHE_TTL = 300
+# Max number of threads used to decrypt the enc_env_vars of a document.
+KMS_MAX_WORKERS = 8
+
+_kms_client = None
+_kms_lock = Lock()
+_kms_cache: Dict[str, Tuple[str, float]] = dict()
+
+
+def get_kms_client():
+    """Get the shared KMS client, creating it the first time it is needed.
+
+    Returns: boto3 KMS client or the client set with set_kms_client.
+
+    """
+    global _kms_client
+    if _kms_client is None:
+        with _kms_lock:
+            if _kms_client is None:
+                try:
+                    import boto3
+                except ImportError:
+                    raise ImportError("Missing bot3 package required for KMS.")
+                _kms_client = boto3.client("kms")
+    return _kms_client
+
+
+def set_kms_client(client):
+    """Set the KMS client used to decrypt enc_env_vars. This can be any object with a boto3 style decrypt method.
+
+    Args:
+        client: KMS client to use. If None a boto3 client is created the next time one is needed.
+
+    Returns: None
+
+    """
+    global _kms_client
+    with _kms_lock:
+        _kms_client = client
+
+
+def clear_kms_cache():
+    """Remove all decrypted values from the KMS cache."""
+    with _kms_lock:
+        _kms_cache.clear()
 
 
 def decode_kms(ciphertext_blob: str) -> str:
     """Decode a secret using the IAM role of the lambda function.
 
+    Notes:
+        Decoded values are cached in memory for KMS_CACHE_TTL seconds.
+
     Args:
         ciphertext_blob: ciphertext_blob to decode
 
     Returns: Decoded KMS data
 
     """
-    try:
-        import boto3
-    except ImportError:
-        raise ImportError("Missing bot3 package required for KMS.")
+    now = time.monotonic()
+    cached = _kms_cache.get(ciphertext_blob)
+    if cached is not None and cached[1] > now:
+        return cached[0]
+
+    instrumentation.count("kms_calls")
+    plaintext = get_kms_client().decrypt(CiphertextBlob=b64decode(ciphertext_blob))["Plaintext"].decode("utf-8")
+    with _kms_lock:
+        _kms_cache[ciphertext_blob] = (plaintext, now + KMS_CACHE_TTL)
+    return plaintext
+
+
+_SCALAR_TYPES = frozenset([str, int, float, bool, type(None)])
+
+# Marks a value in an env var plan that has to be passed to the env var function.
+RESOLVE = "__resolve__"
+
+
+def is_env_var_reference(value: Any) -> bool:
+    """Check if a value is an env_var or enc_env_var reference, using the same rules as check_for_env_vars.
+
+    Args:
+        value: input value to check.
+
+    Returns: True if the value is a reference.
+
+    """
+    return isinstance(value, dict) and ("env_var" in value or "enc_env_var" in value)
+
+
+def find_env_var_references(data: Any) -> List[Tuple[tuple, dict]]:
+    """Find all env_var and enc_env_var references in a document in one pass.
+
+    Notes:
+        The top level value is not checked, only the values nested in it.
+
+    Args:
+        data: Document to search.
+
+    Returns: List of (path, reference) where path is a tuple of the dict keys and list indexes to the reference.
+
+    """
+    references = list()
+    # Paths are kept as (key, parent path) pairs while searching and only turned into tuples for references.
+    stack = [(data, None)]
+    while stack:
+        value, parent = stack.pop()
+        items = value.items() if isinstance(value, dict) else enumerate(value)
+        for key, child in items:
+            child_type = type(child)
+            if child_type in _SCALAR_TYPES:
+                continue
+            if (child_type is dict or isinstance(child, dict)) and ("env_var" in child or "enc_env_var" in child):
+                references.append((_path_tuple((key, parent)), child))
+            elif isinstance(child, (dict, list)):
+                stack.append((child, (key, parent)))
+    return references
+
+
+def _path_tuple(path: tuple) -> tuple:
+    keys = list()
+    while path is not None:
+        keys.append(path[0])
+        path = path[1]
+    return tuple(reversed(keys))
+
+
+def build_env_var_plan(references: List[Tuple[tuple, dict]]) -> dict:
+    """Build a plan of where the env var function has to be called.
+
+    Args:
+        references: Output of find_env_var_references.
+
+    Returns: Nested dict of dict keys and list indexes that leads to RESOLVE for each reference. An empty dict means
+        there is nothing to resolve.
+
+    """
+    plan = dict()
+    for path, _ in references:
+        node = plan
+        for key in path[:-1]:
+            node = node.setdefault(key, dict())
+        node[path[-1]] = RESOLVE
+    return plan
+
+
+def get_env_var_plan(data: Any, prefetch: bool = True) -> dict:
+    """Scan a document and build its env var plan, decrypting any enc_env_vars it finds at the same time.
+
+    Args:
+        data: Document to scan.
+        prefetch: If True decrypt the enc_env_vars found in the document.
+
+    Returns: The env var plan for the document.
+
+    """
+    references = find_env_var_references(data)
+    if not references:
+        return dict()
+    if prefetch:
+        prefetch_kms_var_names(r["enc_env_var"] for _, r in references if "env_var" not in r)
+    return build_env_var_plan(references)
+
+
+def find_enc_env_vars(data: Any) -> Set[str]:
+    """Find the names of all enc_env_vars in a document.
+
+    Args:
+        data: Document to search.
+
+    Returns: Set of env var names.
+
+    """
+    return {r["enc_env_var"] for _, r in find_env_var_references(data) if "env_var" not in r}
+
+
+def prefetch_kms_vars(data: Any, max_workers: int = None):
+    """Decrypt all enc_env_vars in a document at the same time so later lookups are served from the KMS cache.
+
+    Notes:
+        Missing env vars and decrypt errors are skipped here. They are raised when the value is looked up.
+
+    Args:
+        data: Document to search for enc_env_vars.
+        max_workers: Max number of threads to use. (Default=KMS_MAX_WORKERS)
+
+    Returns: None
+
+    """
+    prefetch_kms_var_names(find_enc_env_vars(data), max_workers)
+
+
+def prefetch_kms_var_names(var_names: Iterable[str], max_workers: int = None):
+    """Decrypt enc_env_vars at the same time so later lookups are served from the KMS cache.
+
+    Args:
+        var_names: Names of the enc_env_vars.
+        max_workers: Max number of threads to use. (Default=KMS_MAX_WORKERS)
+
+    Returns: None
+
+    """
+    now = time.monotonic()
+    ciphertexts = set()
+    for var_name in var_names:
+        ciphertext_blob = os.environ.get(var_name)
+        cached = _kms_cache.get(ciphertext_blob)
+        if ciphertext_blob is not None and (cached is None or cached[1] <= now):
+            ciphertexts.add(ciphertext_blob)
+
+    if len(ciphertexts) < 2:
+        # Nothing to do in parallel. A single value is decrypted when it is looked up.
+        return
+
+    def decode(ciphertext_blob: str):
+        try:
+            decode_kms(ciphertext_blob)
+        except Exception as e:
+            logging.debug(f"unable to prefetch enc env var: {e}")
+
+    from concurrent.futures import ThreadPoolExecutor
 
-    return boto3.client("kms").decrypt(CiphertextBlob=b64decode(ciphertext_blob))["Plaintext"].decode("utf-8")
+    # Create the client before starting the threads so it is only created once.
+    get_kms_client()
+    with ThreadPoolExecutor(max_workers=min(max_workers or KMS_MAX_WORKERS, len(ciphertexts))) as executor:
+        # Each thread runs in a copy of this context so KMS calls are counted against the current operation.
+        futures = [executor.submit(copy_context().run, decode, c) for c in ciphertexts]
+        for future in futures:
+            future.result()
 
 
 def get_kms_var(var_name: str) -> str:
@@ -42,14 +261,16 @@ def check_for_env_vars(value: Union[str, dict]):
         KeyError: if the env var is not set for what you're tying to get.
 
     """
-    if type(value) is dict and "env_var" in value:
+    if isinstance(value, dict) and "env_var" in value:
         var_name = value["env_var"]
+        instrumentation.count("env_vars_resolved")
         try:
             return get_var(var_name)
         except KeyError:
             raise KeyError(f"missing env var: {value['env_var']}")
-    if type(value) is dict and "enc_env_var" in value:
+    if isinstance(value, dict) and "enc_env_var" in value:
         var_name = value["enc_env_var"]
+        instrumentation.count("env_vars_resolved")
         try:
             return get_kms_var(var_name)
         except KeyError:
@@ -0,0 +1,152 @@
+#!/usr/bin/python3
+"""
+file_cache.py
+
+Process-wide cache of parsed files. Entries are keyed on the resolved path and checked against the file's mtime, size
+and inode before use, so a changed file is always re-read. Callers get their own copy of the cached data, unless they
+only read it and ask for the cached data itself.
+"""
+import copy
+import os
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import Any, Callable, Hashable, Tuple
+
+DEFAULT_MAX_SIZE = 128
+
+_SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
+def copy_tree(data: Any) -> Any:
+    """Copy parsed file data.
+
+    Notes:
+        Plain dicts and lists are copied with a simple walk which is much faster than copy.deepcopy. Anything else (like
+        ruamel CommentedMap) is copied with copy.deepcopy so comments and other metadata are kept.
+
+    Args:
+        data: Parsed file data.
+
+    Returns: Copy of the data that shares no mutable state with the input.
+
+    """
+    # Walked with a stack rather than recursion so deeply nested files do not hit the recursion limit.
+    root = [data]
+    stack = [(root, 0, data)]
+    while stack:
+        parent, key, value = stack.pop()
+        value_type = type(value)
+        if value_type is dict:
+            value_copy = dict(value)
+            stack.extend((value_copy, k, v) for k, v in value.items() if type(v) not in _SCALAR_TYPES)
+        elif value_type is list:
+            value_copy = list(value)
+            stack.extend((value_copy, i, v) for i, v in enumerate(value) if type(v) not in _SCALAR_TYPES)
+        else:
+            value_copy = copy.deepcopy(value)
+        parent[key] = value_copy
+    return root[0]
+
+
+class FileCache:
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE):
+        """
+
+        Args:
+            max_size: Max number of parsed files to keep. The least recently used file is removed first.
+        """
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[Hashable, str], Tuple[tuple, Any]]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _signature(path: str) -> tuple:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def read(self, file_path: str, kind: Hashable, loader: Callable[[], Any], copy: bool = True) -> Any:
+        """Get the parsed data for a file, calling loader if the file is not cached or has changed.
+
+        Args:
+            file_path: Path to the file.
+            kind: Key for how the file is parsed (for example json or yaml) so the same file parsed two ways is
+                cached twice.
+            loader: Function that reads and parses the file.
+            copy: If False return the cached data itself rather than a copy. It is shared with every other caller, so
+                it must not be changed. Use this when the data is only read, like when it is built into a JSON2Obj.
+
+        Returns: Copy of the parsed data, or the cached data if copy is False.
+
+        """
+        path = str(Path(file_path).resolve())
+        key = (kind, path)
+        signature = self._signature(path)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy_tree(entry[1]) if copy else entry[1]
+            self.misses += 1
+
+        data = loader()
+
+        # Only cache the data if the file did not change while it was being read.
+        if self.max_size > 0 and self._signature(path) == signature:
+            with self._lock:
+                self._entries[key] = (signature, data)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+            return copy_tree(data) if copy else data
+        return data
+
+    def invalidate(self, file_path: str):
+        """Remove every cached entry for a file.
+
+        Args:
+            file_path: Path to the file.
+
+        Returns: None
+
+        """
+        path = str(Path(file_path).resolve())
+        with self._lock:
+            for key in [k for k in self._entries if k[1] == path]:
+                del self._entries[key]
+
+    def clear(self):
+        """Remove all cached files."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def resize(self, max_size: int):
+        """Change the max number of cached files. A max_size of 0 turns the cache off.
+
+        Args:
+            max_size: Max number of parsed files to keep.
+
+        Returns: None
+
+        """
+        with self._lock:
+            self.max_size = max_size
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+file_cache = FileCache()
+
+
+def clear_file_cache():
+    """Remove all files from the process-wide file cache."""
+    file_cache.clear()
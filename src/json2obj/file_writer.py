@@ -0,0 +1,77 @@
+#!/usr/bin/python3
+"""
+file_writer.py
+
+Atomic, change-aware file writes. The new content is streamed to a temp file next to the target, compared with the
+target, and only renamed over it if it is different. Readers see the old file or the new file and never part of one,
+and a write with unchanged content leaves the file (and its mtime) alone.
+"""
+import os
+import stat
+from pathlib import Path
+from typing import IO, Callable
+
+_CHUNK_SIZE = 64 * 1024
+
+# The umask can only be read by setting it, which changes it for every thread, so it is read once on import.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def write_if_changed(file_path: str, dump: Callable[[IO], None], binary: bool = False) -> bool:
+    """Write a file atomically if its content changed.
+
+    Args:
+        file_path: Path to the file.
+        dump: Function that writes the content to the file it is given.
+        binary: If True dump is given a binary file, otherwise a UTF-8 text file.
+
+    Returns: True if the file was written, False if it already had the same content.
+
+    """
+    # Imported here as it imports a lot of modules that reading files does not need.
+    import tempfile
+
+    path = Path(file_path)
+    handle, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with (os.fdopen(handle, "wb") if binary else os.fdopen(handle, "w", encoding="utf-8")) as file:
+            dump(file)
+            file.flush()
+            changed = not _same_content(temp_path, path)
+            if changed:
+                os.fsync(file.fileno())
+        if not changed:
+            os.unlink(temp_path)
+            return False
+        os.chmod(temp_path, _file_mode(path))
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    return True
+
+
+def _same_content(new_path: str, old_path: Path) -> bool:
+    try:
+        if os.path.getsize(new_path) != os.path.getsize(old_path):
+            return False
+        with open(new_path, "rb") as new_file, open(old_path, "rb") as old_file:
+            while True:
+                new_chunk = new_file.read(_CHUNK_SIZE)
+                if new_chunk != old_file.read(_CHUNK_SIZE):
+                    return False
+                if not new_chunk:
+                    return True
+    except FileNotFoundError:
+        return False
+
+
+def _file_mode(path: Path) -> int:
+    """Mode for the new file: the mode of the file it replaces, or the default mode for a new file."""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        # mkstemp creates the temp file as 0600, so give a new file the mode open() would have.
+        return 0o666 & ~_UMASK
@@ -7,10 +7,12 @@ from .json_file import JsonFile
 from .yaml_file import YamlFile
 from .json2obj import JSON2Obj
 from .env_vars import check_for_env_vars
-from typing import Union, Callable, Optional
-from ruamel.yaml.comments import CommentedMap
+from typing import TYPE_CHECKING, Union, Callable, Optional
 from enum import Enum
 
+if TYPE_CHECKING:
+    from ruamel.yaml.comments import CommentedMap
+
 
 class FileTypes(str, Enum):
     JSON = "json"
@@ -26,20 +28,30 @@ def get_file_type(file_path: str) -> FileTypes:
 
 
 def write_object_to_file(
-    data: JSON2Obj, file_path: str, rebase: bool = True, env_var_function: Optional[Callable] = check_for_env_vars
-):
+    data: JSON2Obj,
+    file_path: str,
+    rebase: bool = True,
+    env_var_function: Optional[Callable] = check_for_env_vars,
+    original: Optional[dict] = None,
+) -> bool:
     data_dict = JSON2Obj.to_dict(data)
-    write_dict_to_file(data=data_dict, file_path=file_path, rebase=rebase, env_var_function=env_var_function)
+    return write_dict_to_file(
+        data=data_dict, file_path=file_path, rebase=rebase, env_var_function=env_var_function, original=original
+    )
 
 
 def write_dict_to_file(
-    data: dict, file_path: str, rebase: bool = True, env_var_function: Optional[Callable] = check_for_env_vars
-):
+    data: dict,
+    file_path: str,
+    rebase: bool = True,
+    env_var_function: Optional[Callable] = check_for_env_vars,
+    original: Optional[dict] = None,
+) -> bool:
     file_type = get_file_type(file_path)
     if file_type == FileTypes.JSON:
-        JsonFile(file_path, env_var_function).write_file(data, rebase=rebase)
+        return JsonFile(file_path, env_var_function).write_file(data, rebase=rebase, original=original)
     elif file_type == FileTypes.YAML:
-        YamlFile(file_path, env_var_function).write_file(data, rebase=rebase)
+        return YamlFile(file_path, env_var_function).write_file(data, rebase=rebase, original=original)
     else:
         raise TypeError(f"unknown file type: {file_path}")
 
@@ -54,5 +66,5 @@ def get_file_objects(file_path: str) -> Union[JsonFile, YamlFile]:
     raise TypeError(f"unknown file type: {file_path}")
 
 
-def read_raw_file(file_path: str) -> Union[dict, CommentedMap]:
+def read_raw_file(file_path: str) -> Union[dict, "CommentedMap"]:
     return get_file_objects(file_path).read_file()
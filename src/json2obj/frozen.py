@@ -0,0 +1,177 @@
+#!/usr/bin/python3
+"""
+frozen.py
+
+Immutable JSON2Obj trees. A frozen object can not be changed, its lists are tuples, and its hash is worked out once when
+it is frozen, so frozen objects can be dict keys and lru_cache arguments and can be shared between threads without
+copying or locking.
+"""
+from typing import Any, Callable, Optional
+
+from .compact import CompactObj
+from .env_vars import check_for_env_vars
+from .json2obj import _SCALAR_TYPES, JSON2Obj, _get_private, _new_node, _private_name, _set_private
+from .layered import LayeredDict
+
+# Name of the cached hash in __dict__. It is read on every hash and ==, so the name is only worked out once.
+_HASH = _private_name("hash")
+
+
+class FrozenObj(JSON2Obj):
+    """Immutable JSON2Obj made by JSON2Obj.freeze. Setting or deleting a field raises TypeError."""
+
+    def __init__(
+        self,
+        json_data: dict = None,
+        env_var_function: Optional[Callable] = check_for_env_vars,
+        lazy: bool = False,
+        defer_env_vars: bool = False,
+    ):
+        """Build a frozen object from a dict, the same as JSON2Obj.freeze(JSON2Obj(json_data)).
+
+        Args:
+            json_data: Input data for object.
+            env_var_function: Function to use for checking for env vars.
+            lazy: Frozen objects are always fully built, so this must be False.
+            defer_env_vars: Frozen objects resolve env vars when they are built, so this must be False.
+
+        Raises:
+            ValueError: if lazy or defer_env_vars is True.
+            TypeError: if a value can not be hashed.
+        """
+        if lazy or defer_env_vars:
+            raise ValueError("frozen objects can not be lazy or defer env vars")
+        frozen = freeze(JSON2Obj(json_data, env_var_function=env_var_function))
+        # The new object takes the state of the frozen copy, as __setattr__ can not be used.
+        self.__dict__.update(frozen.__dict__)
+
+    def __setattr__(self, key, value):
+        raise TypeError(f"can not set {key}: FrozenObj is read only")
+
+    def __delattr__(self, key):
+        raise TypeError(f"can not delete {key}: FrozenObj is read only")
+
+    def __hash__(self):
+        return self.__dict__[_HASH]
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if isinstance(other, FrozenObj) and self.__dict__[_HASH] != other.__dict__[_HASH]:
+            return False
+        return JSON2Obj.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        output = _get_private(self, "repr")
+        if output is None:
+            # Every thread that gets here first works out the same string, so there is no need to lock.
+            output = JSON2Obj.__repr__(self)
+            _set_private(self, "repr", output)
+        return output
+
+    def __copy__(self):
+        return self
+
+    def __reduce__(self):
+        # The cached hash depends on the process (str hashes are salted), so unpickling freezes the data again.
+        return freeze, (JSON2Obj.to_dict(self),)
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class FrozenList(tuple):
+    """Tuple a list is frozen into. Unlike a plain tuple it can cache its content digest for JSON2Obj.diff."""
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return FrozenList, (tuple(self),)
+
+
+def freeze(value: Any) -> Any:
+    """Make an immutable copy of a value.
+
+    Notes:
+        JSON2Obj and CompactObj objects (and dicts) become FrozenObj, lists become FrozenList tuples and arrays become
+        FrozenList tuples of their values. Frozen values are used as they are, so freezing a frozen tree copies
+        nothing. This uses an explicit stack instead of recursion so there is no limit on how deeply nested the value
+        can be.
+
+    Args:
+        value: Value to freeze.
+
+    Returns: Frozen value.
+
+    Raises:
+        TypeError: if a value in the tree can not be hashed.
+
+    """
+    if not _is_node(value):
+        hash(value)
+        return value
+
+    # Find every object and list, parents before children, then freeze them children first.
+    nodes = list()
+    stack = [value]
+    while stack:
+        node = stack.pop()
+        items = _items(node)
+        nodes.append((node, items))
+        for item in items.values() if isinstance(items, dict) else items:
+            if _is_node(item):
+                stack.append(item)
+
+    frozen = dict()
+    for node, items in reversed(nodes):
+        if id(node) in frozen:
+            continue
+        if isinstance(items, dict):
+            fields = {k: _frozen_value(v, frozen) for k, v in items.items()}
+            frozen[id(node)] = _frozen_obj(fields)
+        else:
+            frozen[id(node)] = FrozenList(_frozen_value(v, frozen) for v in items)
+    return frozen[id(value)]
+
+
+def _is_node(value: Any) -> bool:
+    """Check if a value is an object or list that needs to be frozen."""
+    if type(value) in _SCALAR_TYPES or isinstance(value, (FrozenObj, FrozenList)):
+        return False
+    return isinstance(value, (JSON2Obj, CompactObj, dict, LayeredDict, list, tuple)) or hasattr(type(value), "tolist")
+
+
+def _items(node: Any):
+    """Fields of an object as a dict, or items of a list as a list."""
+    if isinstance(node, JSON2Obj):
+        return {f: getattr(node, f) for f in node.__dict_fields__()}
+    if isinstance(node, CompactObj):
+        return {f: getattr(node, f) for f in node._fields}
+    if isinstance(node, (dict, list, tuple)):
+        return node
+    if isinstance(node, LayeredDict):
+        # Read once, so the children found here are the ones frozen below.
+        return dict(node.items())
+    # array.array and NumPy arrays.
+    return node.tolist()
+
+
+def _frozen_value(value: Any, frozen: dict) -> Any:
+    if _is_node(value):
+        return frozen[id(value)]
+    hash(value)
+    return value
+
+
+def _frozen_obj(fields: dict) -> FrozenObj:
+    obj = _new_node(FrozenObj, fields)
+    # Field order does not matter for ==, so it does not for the hash either.
+    _set_private(obj, "hash", hash(frozenset(fields.items())))
+    return obj
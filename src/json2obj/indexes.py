@@ -0,0 +1,102 @@
+#!/usr/bin/python3
+"""
+indexes.py
+
+Hash indexes over list fields, like routes or tenants, so records can be found by key without scanning the list. An
+index is built the first time it is asked for and kept for the object it was built for until the list is replaced.
+"""
+import collections.abc
+import weakref
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple, Union
+
+from . import paths
+
+# Indexes of each object by the id of the object, with a weak reference to it. They are kept beside the objects rather
+# than in them, so frozen and shared objects are not changed. Frozen objects are equal by content, so they can not be
+# the keys of a WeakKeyDictionary: two equal objects would share the indexes of records that belong to one of them.
+_INDEXES: Dict[int, Tuple[weakref.ref, Dict[Tuple[str, Tuple[str, ...]], Tuple]]] = dict()
+
+_NOT_FOUND = object()
+
+
+def build_index(records: Sequence, keys: Tuple[str, ...]) -> Dict[Any, Any]:
+    """Build a hash index of records.
+
+    Args:
+        records: List of records.
+        keys: Paths of the key fields in each record, like name or match.host.
+
+    Returns: Dict of key value, or tuple of key values if there is more than one key, to the first record with it.
+        Records that are missing a key are left out.
+
+    Raises:
+        TypeError: if a key value can not be hashed.
+
+    """
+    accessors = [paths.compile_path(key) for key in keys]
+    index = dict()
+    for record in records:
+        values = tuple(accessor(record, _NOT_FOUND) for accessor in accessors)
+        if any(value is _NOT_FOUND for value in values):
+            continue
+        try:
+            index.setdefault(values[0] if len(values) == 1 else values, record)
+        except TypeError:
+            raise TypeError(f"unable to index {'.'.join(keys)}: key value {values} can not be hashed") from None
+    return index
+
+
+def get_index(obj: Any, field: str, key: Union[str, Sequence[str]]) -> Mapping[Any, Any]:
+    """Get the index of a list field, building it if it is not cached or the list was replaced.
+
+    Args:
+        obj: Object with the list field.
+        field: Path of the list field, like routes or settings.routes.
+        key: Path of the key field in each record, or a list of paths for a key of more than one field.
+
+    Returns: Read only mapping of key value to record.
+
+    Raises:
+        KeyError: if the field is missing.
+        TypeError: if the field is not a list or a key value can not be hashed.
+
+    """
+    keys = (key,) if isinstance(key, str) else tuple(key)
+    records = paths.compile_path(field)(obj)
+    if not isinstance(records, collections.abc.Sequence) or isinstance(records, str):
+        raise TypeError(f"unable to index {field}: it is not a list")
+
+    indexes = _object_indexes(obj)
+    if indexes is None:
+        return MappingProxyType(build_index(records, keys))
+
+    entry = indexes.get((field, keys))
+    # The list is checked by identity, so replacing it rebuilds the index. A change in length (like an append) does
+    # too. Changing a record's key in place is not seen.
+    if entry is None or entry[0] is not records or entry[1] != len(records):
+        entry = (records, len(records), build_index(records, keys))
+        indexes[(field, keys)] = entry
+    return MappingProxyType(entry[2])
+
+
+def _object_indexes(obj: Any) -> Optional[Dict[Tuple[str, Tuple[str, ...]], Tuple]]:
+    """Get the cached indexes of an object, or None if it can not be weakly referenced (like a CompactObj)."""
+    object_id = id(obj)
+    entry = _INDEXES.get(object_id)
+    if entry is not None and entry[0]() is obj:
+        return entry[1]
+    try:
+        ref = weakref.ref(obj, lambda dead_ref: _forget(object_id, dead_ref))
+    except TypeError:
+        return None
+    indexes = dict()
+    _INDEXES[object_id] = (ref, indexes)
+    return indexes
+
+
+def _forget(object_id: int, dead_ref: weakref.ref):
+    # The id may already have been given to a newer object, so only its own entry is removed.
+    entry = _INDEXES.get(object_id)
+    if entry is not None and entry[0] is dead_ref:
+        del _INDEXES[object_id]
@@ -0,0 +1,263 @@
+#!/usr/bin/python3
+"""
+instrumentation.py
+
+Opt-in timing and counters for loads and validations. Register a callback with add_callback, or collect metrics for a
+block of code with collect_metrics, to get a Metrics for every load or validate with the time spent in each phase,
+bytes read, nodes built, env vars resolved and KMS calls made.
+
+When nothing is registered every hook is a check of one module-level flag.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# True when a callback is registered or collect_metrics is in use. Hooks check it before doing anything else.
+enabled = False
+
+_callbacks: List[Callable[["Metrics"], Any]] = list()
+_collectors: List[List["Metrics"]] = list()
+_registry_lock = Lock()
+_current: ContextVar[Optional["Metrics"]] = ContextVar("json2obj_metrics", default=None)
+
+
+class Metrics:
+    def __init__(self, operation: str, target: Optional[str] = None):
+        """Metrics of one load or validate.
+
+        Args:
+            operation: Name of the operation, like load or validate.
+            target: File path the operation is for, if there is one.
+        """
+        self.operation = operation
+        self.target = target
+        self.duration = 0.0
+        self.phases: Dict[str, float] = dict()
+        self.bytes_read = 0
+        self.nodes = 0
+        self.env_vars_resolved = 0
+        self.kms_calls = 0
+        self.error: Optional[str] = None
+        self._lock = Lock()
+
+    def add(self, counter: str, count: int = 1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + count)
+
+    def add_phase(self, name: str, duration: float):
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + duration
+
+    def to_dict(self) -> dict:
+        """Output the metrics as a dict that can be sent to a metrics pipeline.
+
+        Returns: Dict of the metrics. Phase durations are in seconds.
+
+        """
+        return dict(
+            operation=self.operation,
+            target=self.target,
+            duration=self.duration,
+            phases=dict(self.phases),
+            bytes_read=self.bytes_read,
+            nodes=self.nodes,
+            env_vars_resolved=self.env_vars_resolved,
+            kms_calls=self.kms_calls,
+            error=self.error,
+        )
+
+    def __repr__(self):
+        return f"Metrics({self.to_dict()})"
+
+
+def _update_enabled():
+    global enabled
+    enabled = bool(_callbacks or _collectors)
+
+
+def add_callback(callback: Callable[[Metrics], Any]):
+    """Register a function to call with the Metrics of every load or validate.
+
+    Args:
+        callback: Function that takes a Metrics. It is called in the thread that did the load or validate.
+
+    Returns: None
+
+    """
+    with _registry_lock:
+        _callbacks.append(callback)
+        _update_enabled()
+
+
+def remove_callback(callback: Callable[[Metrics], Any]):
+    """Unregister a function added with add_callback.
+
+    Args:
+        callback: Function to remove.
+
+    Returns: None
+
+    Raises:
+        ValueError: if the function is not registered.
+
+    """
+    with _registry_lock:
+        _callbacks.remove(callback)
+        _update_enabled()
+
+
+@contextmanager
+def collect_metrics() -> Iterator[List[Metrics]]:
+    """Collect the Metrics of every load or validate that finishes while the block runs.
+
+    Examples:
+        with collect_metrics() as metrics:
+            JsonFile("config.json").load()
+        print(metrics[0].phases)
+
+    Returns: List that the Metrics are added to.
+
+    """
+    collected: List[Metrics] = list()
+    with _registry_lock:
+        _collectors.append(collected)
+        _update_enabled()
+    try:
+        yield collected
+    finally:
+        with _registry_lock:
+            _collectors.remove(collected)
+            _update_enabled()
+
+
+class _NullContext:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *args):
+        return False
+
+
+_NULL_CONTEXT = _NullContext()
+
+
+class _Operation:
+    def __init__(self, name: str, target: Optional[str]):
+        self.metrics = Metrics(name, target)
+        self.token = None
+        self.start = 0.0
+
+    def __enter__(self) -> Metrics:
+        self.token = _current.set(self.metrics)
+        self.start = time.perf_counter()
+        return self.metrics
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.metrics.duration = time.perf_counter() - self.start
+        _current.reset(self.token)
+        if exc_type is not None:
+            self.metrics.error = f"{exc_type.__name__}: {exc_value}"
+        _report(self.metrics)
+        return False
+
+
+class _Phase:
+    def __init__(self, metrics: Metrics, name: str):
+        self.metrics = metrics
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self.metrics
+
+    def __exit__(self, *args):
+        self.metrics.add_phase(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def operation(name: str, target: Optional[str] = None):
+    """Context manager around a load or validate. The Metrics are reported when the block exits.
+
+    Notes:
+        An operation inside another operation adds to the outer operation's Metrics instead of reporting its own.
+
+    Args:
+        name: Name of the operation.
+        target: File path the operation is for, if there is one.
+
+    Returns: Context manager that gives the Metrics, or None when instrumentation is off.
+
+    """
+    if not enabled or _current.get() is not None:
+        return _NULL_CONTEXT
+    return _Operation(name, None if target is None else str(target))
+
+
+def phase(name: str):
+    """Context manager that adds the time spent in the block to a phase of the current operation.
+
+    Args:
+        name: Name of the phase, like read, parse, build or env_vars.
+
+    Returns: Context manager.
+
+    """
+    if not enabled:
+        return _NULL_CONTEXT
+    metrics = _current.get()
+    if metrics is None:
+        return _NULL_CONTEXT
+    return _Phase(metrics, name)
+
+
+def count(counter: str, value: int = 1):
+    """Add to a counter of the current operation.
+
+    Args:
+        counter: bytes_read, nodes, env_vars_resolved or kms_calls.
+        value: Amount to add.
+
+    Returns: None
+
+    """
+    if not enabled:
+        return
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.add(counter, value)
+
+
+def count_nodes(data: Any) -> int:
+    """Count the objects, lists and values in parsed data.
+
+    Args:
+        data: Parsed data.
+
+    Returns: Number of nodes, including data itself.
+
+    """
+    nodes = 0
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        nodes += 1
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+    return nodes
+
+
+def _report(metrics: Metrics):
+    for collected in list(_collectors):
+        collected.append(metrics)
+    for callback in list(_callbacks):
+        try:
+            callback(metrics)
+        except Exception as e:
+            # A broken metrics pipeline should not break loading config.
+            logging.warning(f"instrumentation callback failed: {e}")
@@ -4,21 +4,103 @@ JSON2Obj
 
 Read a JSON object into a python object
 """
-import json
-from typing import Callable, Optional
-
-from .env_vars import check_for_env_vars
+from typing import Any, Callable, Iterator, List, Mapping, Optional, Sequence, Union
+
+from . import compact as _compact
+from . import layered as _layered
+from . import indexes, instrumentation, parsers, paths
+from .compact import CompactObj
+from .env_vars import (
+    RESOLVE,
+    check_for_env_vars,
+    find_env_var_references,
+    get_env_var_plan,
+    is_env_var_reference,
+    prefetch_kms_var_names,
+)
+from .file_cache import copy_tree
+from .parsers import JsonInput
 
 
 class JSON2Obj:
-    def __init__(self, json_data: dict = None, env_var_function: Optional[Callable] = check_for_env_vars):
-        if not isinstance(json_data, dict) and json_data is not None:
+    def __init__(
+        self,
+        json_data: dict = None,
+        env_var_function: Optional[Callable] = check_for_env_vars,
+        lazy: bool = False,
+        defer_env_vars: bool = False,
+    ):
+        """
+
+        Args:
+            json_data: Input data for object.
+            env_var_function: Function to use for checking for env vars.
+            lazy: If True keep the raw dict and only build attributes when they are first accessed.
+            defer_env_vars: If True env vars are resolved the first time they are accessed instead of when the object is
+                built. Missing env vars are raised on that access. With a custom env_var_function every value is
+                deferred.
+        """
+        if isinstance(json_data, _layered.LayeredDict):
+            # Lazy objects read a LayeredDict as their raw dict. Anything else builds every field, so it is merged once.
+            if not lazy:
+                json_data = _layered.to_dict(json_data)
+        elif not isinstance(json_data, dict) and json_data is not None:
             raise TypeError("json_data must by type dict. If using a string call JSON2Obj.from_string().")
 
-        self.__env_var_function: Callable = env_var_function
+        # With the default env var function only env var references are resolved. They are found while the object is
+        # built, or for deferred objects by scanning the document for an env var plan up front. Any other env var
+        # function is called for every value.
+        env_var_plan = None
+        if json_data and env_var_function is check_for_env_vars and not lazy:
+            env_var_plan = get_env_var_plan(json_data, prefetch=False) if defer_env_vars else _FIND_ENV_VARS
 
+        options = (env_var_function, lazy, defer_env_vars)
+        self.__set_options(options, env_var_plan, json_data)
         if json_data:
-            self.__from_dict(json_data)
+            if lazy:
+                self.__check_keys(json_data)
+                self.__build_shadowed_fields()
+            else:
+                references = list()
+                with instrumentation.phase("build"):
+                    JSON2Obj.__build([(self, json_data, env_var_plan, self)], references)
+                if references:
+                    with instrumentation.phase("env_vars"):
+                        JSON2Obj.__resolve_references(references, env_var_function)
+            if instrumentation.enabled:
+                instrumentation.count("nodes", instrumentation.count_nodes(json_data))
+
+    def __set_options(self, options: tuple, env_var_plan: Optional[dict], json_data: Optional[dict]):
+        """Set the private state of the object.
+
+        Args:
+            options: (env_var_function, lazy, defer_env_vars). The same tuple is shared by every object in a tree.
+            env_var_plan: Env var plan for the object.
+            json_data: Input data for object.
+        """
+        self.__options: tuple = options
+        self.__env_var_plan: Optional[dict] = env_var_plan
+        # The raw dict keeps the field order and the values that have not been built yet of lazy and deferred objects.
+        self.__raw: dict = json_data if json_data and (options[1] or options[2]) else _EMPTY_RAW
+
+    def __build_shadowed_fields(self):
+        """Keys that shadow class attributes (like get) would never reach __getattr__, so build them now."""
+        for key in _CLASS_ATTRIBUTES:
+            if key in self.__raw:
+                self.__getattr__(key)
+
+    def __getattr__(self, item):
+        """Build a field from the raw dict the first time it is accessed in lazy mode.
+
+        This is only called when the normal attribute lookup fails, so fields that have already been built are read
+        straight from the instance.
+        """
+        raw = self.__dict__.get("_JSON2Obj__raw")
+        if not raw or item not in raw:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{item}'")
+        value = self.__convert_value(item, raw[item])
+        setattr(self, item, value)
+        return value
 
     def __eq__(self, other):
         if isinstance(other, JSON2Obj):
@@ -27,65 +109,194 @@ class JSON2Obj:
 
     def __dict_fields__(self):
         """Returns a list of fields to get for the to_dict function."""
-        fields = list(self.__dict__.keys())
+        raw = self.__raw
+        fields = list(raw.keys())
+        fields.extend(f for f in self.__dict__.keys() if f not in raw)
         return [f for f in fields if not f.startswith("__") and not f.startswith("_JSON2Obj")]
 
     @classmethod
-    def from_string(cls, string: str, env_var_function: Optional[Callable] = check_for_env_vars) -> "JSON2Obj":
+    def from_string(
+        cls,
+        string: str,
+        env_var_function: Optional[Callable] = check_for_env_vars,
+        lazy: bool = False,
+        compact: bool = False,
+        parser: Optional[str] = None,
+        frozen: bool = False,
+    ) -> "JSON2Obj":
         """Create a JSON2Obj from a string of a JSON object.
 
         Args:
             string: JSON input string.
             env_var_function: Function to use for checking for env vars.
+            lazy: If True only build attributes when they are first accessed.
+            compact: If True build shape-cached slotted CompactObj objects instead.
+            parser: Name of the JSON parser backend to use. If None the fastest installed backend is used.
+            frozen: If True return an immutable, hashable FrozenObj. See JSON2Obj.freeze.
 
         Returns:
 
         """
-        input_dict = json.loads(string)
-        return cls(input_dict, env_var_function=env_var_function)
+        with instrumentation.operation("from_string"):
+            if instrumentation.enabled:
+                # str input is counted by its UTF-8 size, the same as the bytes of a file.
+                size = len(string.encode("utf-8", "surrogatepass")) if isinstance(string, str) else len(string)
+                instrumentation.count("bytes_read", size)
+            with instrumentation.phase("parse"):
+                input_dict = parsers.loads(string, parser)
+            if compact or frozen:
+                return JSON2Obj.from_dict(
+                    input_dict, env_var_function=env_var_function, lazy=lazy, compact=compact, frozen=frozen
+                )
+            return cls(input_dict, env_var_function=env_var_function, lazy=lazy)
 
     @classmethod
-    def __from_list(cls, input_list: list, env_var_function: Optional[Callable] = check_for_env_vars) -> list:
-        """Function for parsing info from a list of data.
+    def from_bytes(
+        cls,
+        data: JsonInput,
+        env_var_function: Optional[Callable] = check_for_env_vars,
+        lazy: bool = False,
+        compact: bool = False,
+        parser: Optional[str] = None,
+        frozen: bool = False,
+    ) -> "JSON2Obj":
+        """Create a JSON2Obj from the bytes of a JSON object without decoding them to a string first.
 
         Args:
-            input_list: input list to be parsed.
+            data: JSON input as bytes, bytearray or memoryview.
+            env_var_function: Function to use for checking for env vars.
+            lazy: If True only build attributes when they are first accessed.
+            compact: If True build shape-cached slotted CompactObj objects instead.
+            parser: Name of the JSON parser backend to use. If None the fastest installed backend is used.
+            frozen: If True return an immutable, hashable FrozenObj. See JSON2Obj.freeze.
 
-        Returns: A list of parsed data.
+        Returns:
 
         """
-        output_list = list()
-        for item in input_list:
-            if isinstance(item, JSON2Obj):
-                output_list.append(item.to_dict())
-            elif isinstance(item, dict):
-                output_list.append(JSON2Obj.from_dict(item, env_var_function))
-            elif isinstance(item, list):
-                output_list.append(cls.__from_list(item))
-            else:
-                output_list.append(item)
-        return output_list
+        return cls.from_string(
+            data, env_var_function=env_var_function, lazy=lazy, compact=compact, parser=parser, frozen=frozen
+        )
+
+    @classmethod
+    def iter_from_file(
+        cls,
+        file_path: str,
+        env_var_function: Optional[Callable] = check_for_env_vars,
+        stream_format: Optional[str] = None,
+        lazy: bool = False,
+        parser: Optional[str] = None,
+    ) -> Iterator["JSON2Obj"]:
+        """Read an NDJSON file or a file with a top-level JSON array one record at a time.
+
+        Args:
+            file_path: Full path to file.
+            env_var_function: Function to use for checking for env vars.
+            stream_format: ndjson, array or stream. If None the format is picked from the file extension and contents.
+            lazy: If True only build attributes when they are first accessed.
+            parser: Name of the JSON parser backend to use for NDJSON lines. If None the fastest installed backend is
+                used. Array and stream files can only be read with json.
+
+        Returns: Iterator of JSON2Obj records.
+
+        Raises:
+            TypeError: if a record is not a JSON object.
+
+        """
+        from . import streaming
+
+        with open(file_path) as file:
+            if stream_format is None:
+                stream_format = streaming.get_stream_format(file_path, file)
+            for record in streaming.iter_records(file, streaming.StreamFormats(stream_format), parser=parser):
+                if not isinstance(record, dict):
+                    raise TypeError(f"record in {file_path} is not a JSON object: {record!r}")
+                yield cls(record, env_var_function=env_var_function, lazy=lazy)
 
     @staticmethod
-    def from_dict(input_data: dict, env_var_function: Optional[Callable] = check_for_env_vars):
+    def from_dict(
+        input_data: dict,
+        env_var_function: Optional[Callable] = check_for_env_vars,
+        lazy: bool = False,
+        compact: bool = False,
+        frozen: bool = False,
+    ):
         """
 
         Args:
             input_data: Input data for object.
             env_var_function: Function to use for checking for env vars.
+            lazy: If True only build attributes when they are first accessed.
+            compact: If True build shape-cached slotted CompactObj objects instead. Can not be used with lazy.
+            frozen: If True return an immutable, hashable FrozenObj. See JSON2Obj.freeze. Can not be used with lazy
+                or compact.
 
         Returns:
 
         """
-        return JSON2Obj(env_var_function=env_var_function).__from_dict(input_data)
+        if frozen:
+            if lazy or compact:
+                raise ValueError("frozen objects can not be lazy or compact")
+            return JSON2Obj.freeze(JSON2Obj(input_data, env_var_function=env_var_function))
+        if compact:
+            if lazy:
+                raise ValueError("compact objects can not be lazy")
+            return _compact.from_dict(input_data, env_var_function=env_var_function)
+        return JSON2Obj(input_data, env_var_function=env_var_function, lazy=lazy)
+
+    @staticmethod
+    def freeze(json_object: "JSON2Obj") -> "JSON2Obj":
+        """Make an immutable copy of a JSON2Obj.
 
-    def __from_dict(self, input_data: dict):
-        """Set data from a dict.
+        Notes:
+            The copy is a FrozenObj: setting or deleting a field raises TypeError and lists are tuples. Its hash is
+            worked out once when it is frozen, so it can be used as a dict key or lru_cache argument, and == returns
+            straight away for the same object or objects with different hashes. Nothing in a frozen tree changes after
+            it is built, so it can be shared between threads without copying or locking. Freezing a FrozenObj
+            returns it as it is.
 
         Args:
-            input_data: dict of input data to set.
+            json_object: JSON2Obj or CompactObj object to freeze. Lazy and deferred values are built first.
 
-        Returns: None
+        Returns: FrozenObj of the data stored in the object.
+
+        Raises:
+            TypeError: if a value can not be hashed.
+
+        """
+        from .frozen import freeze
+
+        return freeze(json_object)
+
+    @staticmethod
+    def from_layers(*layers: dict, env_var_function: Optional[Callable] = check_for_env_vars) -> "JSON2Obj":
+        """Create a JSON2Obj that deep merges config layers, like defaults, site config, user config and overrides.
+
+        Notes:
+            Nothing is copied up front. A field is looked up in the layers, from the top, the first time it is accessed,
+            and a subtree that only one layer has is shared with that layer. Setting a field changes the object and not
+            the layers.
+
+        Args:
+            *layers: Dicts to merge, lowest priority first.
+            env_var_function: Function to use for checking for env vars.
+
+        Returns: Lazy JSON2Obj of the merged layers.
+
+        Raises:
+            TypeError: if a layer is not a dict.
+
+        """
+        return JSON2Obj(_layered.merge_layers(*layers), env_var_function=env_var_function, lazy=True)
+
+    @staticmethod
+    def __check_keys(input_data: dict):
+        """Check input_data for keys that would clash with JSON2Obj internals.
+
+        Args:
+            input_data: dict of input data to check.
+
+        Raises:
+            KeyError: if an invalid key is found.
 
         """
         invalid_keys = ["__from_dict", "__to_dict"]
@@ -93,47 +304,268 @@ class JSON2Obj:
             if k in input_data:
                 raise KeyError(f"invalid input key: {k} in input_data from json")
 
-        for key, value in input_data.items():
+    def __convert_value(self, key, value):
+        """Convert a raw value into the value stored on the object.
+
+        Args:
+            key: key of the value in the input data.
+            value: raw value from the input data.
+
+        Returns: The converted value.
 
-            # Check for env_vars here if we have any.
-            if self.__env_var_function:
-                value = self.__env_var_function(value)
+        """
+        env_var_plan = self.__env_var_plan
+        value_plan = None if env_var_plan is None else env_var_plan.get(key, _NO_ENV_VARS)
+        stack = list()
+        value = self.__convert(value, value_plan, stack)
+        JSON2Obj.__build(stack)
+        return value
+
+    def __convert(self, value, env_var_plan, stack: list):
+        """Convert one raw value. Dicts and lists are created empty and added to the stack to be filled by __build.
+
+        Args:
+            value: raw value from the input data.
+            env_var_plan: RESOLVE if the value is an env var reference, the env var plan of the value, or None to call
+                the env var function on every value.
+            stack: Stack of objects and lists that still need to be filled.
+
+        Returns: The converted value.
 
-            # If its a dict, make a new JSON2Obj.
-            if isinstance(value, dict):
-                value = JSON2Obj(value)
+        """
+        options = self.__options
+
+        # Check for env_vars here if we have any.
+        env_var_function = options[0]
+        if env_var_function and (env_var_plan is None or env_var_plan is RESOLVE):
+            value = env_var_function(value)
+            if env_var_plan is RESOLVE:
+                env_var_plan = _NO_ENV_VARS
+
+        # If its a dict, make a new JSON2Obj with the same options.
+        if isinstance(value, _DICT_TYPES):
+            child = JSON2Obj.__new__(JSON2Obj)
+            child.__set_options(options, env_var_plan, value)
+            if options[1]:
+                child.__check_keys(value)
+                child.__build_shadowed_fields()
+            else:
+                stack.append((child, value, env_var_plan, child))
+            return child
 
-            # Go though a list for any new values.
-            if isinstance(value, list):
-                value = JSON2Obj.__from_list(value)
+        # Go though a list for any new values.
+        if isinstance(value, list):
+            output_list = list()
+            stack.append((output_list, value, env_var_plan, self))
+            return output_list
 
-            setattr(self, key, value)
+        return value
 
     @staticmethod
-    def to_dict(json_object: "JSON2Obj") -> dict:
+    def __build(stack: list, references: Optional[list] = None):
+        """Fill JSON2Obj objects and lists from their input data.
+
+        Notes:
+            This uses an explicit stack instead of recursion so there is no limit on how deeply nested the input can be.
+
+        Args:
+            stack: List of (target, input data, env var plan, owner). target is the JSON2Obj or list to fill, and owner
+                is the JSON2Obj whose options are used to convert the values.
+            references: List to add (target, key, reference) to for each env var reference found in values with the
+                _FIND_ENV_VARS plan. The reference is stored as the value until it is resolved.
+
+        Returns: None
+
+        """
+        while stack:
+            target, input_data, env_var_plan, owner = stack.pop()
+            find_env_vars = env_var_plan is _FIND_ENV_VARS
+            # Values only need the env var plan if the env var function is going to be called for something in them.
+            planned = not find_env_vars and (env_var_plan is None or len(env_var_plan) > 0)
+            if owner.__options[0] is None:
+                planned = find_env_vars = False
+            child_plan = _FIND_ENV_VARS if find_env_vars else _NO_ENV_VARS
+
+            if not planned and not owner.__options[1]:
+                # Build plain dicts and lists straight away, only checking dicts for env var references if needed.
+                options = owner.__options
+                target_is_list = type(target) is list
+                if target_is_list:
+                    # Scalars are copied as they are and everything else is replaced below.
+                    target.extend(input_data)
+                    items = enumerate(input_data)
+                else:
+                    target.__check_keys(input_data)
+                    items = input_data.items()
+                for key, value in items:
+                    value_type = type(value)
+                    if value_type in _SCALAR_TYPES:
+                        if not target_is_list:
+                            setattr(target, key, value)
+                        continue
+                    if value_type is dict or (value_type is not list and isinstance(value, dict)):
+                        if find_env_vars and ("env_var" in value or "enc_env_var" in value):
+                            # Stored as it is until __resolve_references replaces it.
+                            references.append((target, key, value))
+                        else:
+                            child = JSON2Obj.__new__(JSON2Obj)
+                            child.__set_options(options, child_plan, value)
+                            stack.append((child, value, child_plan, child))
+                            value = child
+                    elif value_type is list:
+                        output_list = list()
+                        stack.append((output_list, value, child_plan, owner))
+                        value = output_list
+                    else:
+                        value = owner.__convert(value, child_plan, stack)
+                    if target_is_list:
+                        target[key] = value
+                    else:
+                        setattr(target, key, value)
+                continue
+
+            if type(target) is list:
+                append = target.append
+                for index, item in enumerate(input_data):
+                    if not planned and type(item) in _SCALAR_TYPES:
+                        append(item)
+                        continue
+                    item_plan = None if env_var_plan is None else env_var_plan.get(index, _NO_ENV_VARS)
+                    append(owner.__convert(item, item_plan, stack))
+                continue
+
+            target.__check_keys(input_data)
+            defer_env_vars = owner.__options[2] and planned
+            for key, value in input_data.items():
+                value_plan = None if env_var_plan is None else env_var_plan.get(key, _NO_ENV_VARS)
+                if (
+                    defer_env_vars
+                    and (value_plan is None or value_plan is RESOLVE or (value_plan and isinstance(value, list)))
+                    and key not in _CLASS_ATTRIBUTES
+                ):
+                    # Left in the raw dict and resolved by __getattr__ on first access.
+                    continue
+                setattr(target, key, target.__convert(value, value_plan, stack))
+
+    @staticmethod
+    def __resolve_references(references: list, env_var_function: Callable):
+        """Resolve the env var references found by __build.
+
+        Args:
+            references: List of (target, key, reference).
+            env_var_function: Function to use for resolving the references.
+
+        Returns: None
+
+        """
+        prefetch_kms_var_names(r["enc_env_var"] for _, _, r in references if "env_var" not in r)
+        for target, key, reference in references:
+            value = env_var_function(reference)
+            if type(target) is list:
+                target[key] = value
+            else:
+                setattr(target, key, value)
+
+    @staticmethod
+    def to_dict(json_object: "JSON2Obj", resolve_env_vars: bool = True) -> dict:
         """Output JSON2Obj as a dict.
 
+        Args:
+            json_object: JSON2Obj object to output.
+            resolve_env_vars: If False env var references are output as they are in the input data instead of their
+                values. This is only possible for values the object still has the input data for, which are values of
+                lazy objects and env vars of objects built with defer_env_vars.
+
         Returns: Dict of data stored in the object.
 
         """
-        return json_object.__to_dict()
+        return JSON2Obj.__to_builtin(json_object, resolve_env_vars)
 
-    def __to_dict(self) -> dict:
+    def __to_dict(self, resolve_env_vars: bool = True) -> dict:
         """Output JSON2Obj as a dict.
 
+        Args:
+            resolve_env_vars: If False output env var references instead of their values.
+
         Returns: Dict of data stored in the object.
 
         """
-        output = dict()
-        fields = self.__dict_fields__()
-        for f in fields:
-            value = getattr(self, f)
-            if isinstance(value, JSON2Obj):
-                output[f] = JSON2Obj.to_dict(value)
-            else:
-                output[f] = value
+        return JSON2Obj.__to_builtin(self, resolve_env_vars)
+
+    @staticmethod
+    def __to_builtin(value, resolve_env_vars: bool = True):
+        """Convert JSON2Obj and CompactObj objects, and the lists they are in, to dicts and lists.
+
+        Notes:
+            This uses an explicit stack instead of recursion so there is no limit on how deeply nested the data can be.
+
+        Args:
+            value: Value to convert.
+            resolve_env_vars: If False output env var references instead of their values.
+
+        Returns: The converted value.
+
+        """
+        stack = list()
+        output = JSON2Obj.__output(value, stack)
+        while stack:
+            target, source = stack.pop()
+
+            if type(target) is list:
+                append = target.append
+                for item in source:
+                    if type(item) in _SCALAR_TYPES:
+                        append(item)
+                    else:
+                        append(JSON2Obj.__output(item, stack))
+                continue
+
+            if isinstance(source, CompactObj):
+                for f in source._fields:
+                    target[f] = JSON2Obj.__output(getattr(source, f), stack)
+                continue
+
+            raw = source.__raw
+            fields = source.__dict__
+            if raw is _EMPTY_RAW:
+                # Fully built object, so every field is in __dict__.
+                for f, value in fields.items():
+                    if f[0] == "_" and (f.startswith("__") or f.startswith("_JSON2Obj")):
+                        continue
+                    if type(value) in _SCALAR_TYPES:
+                        target[f] = value
+                    else:
+                        target[f] = JSON2Obj.__output(value, stack)
+                continue
+
+            for f in source.__dict_fields__():
+                if not resolve_env_vars and f in raw:
+                    raw_value = raw[f]
+                    if f not in fields or _has_env_var_references(raw_value):
+                        # Copied, as the raw dict may be shared with the file cache or the caller's input data.
+                        target[f] = copy_tree(_layered.to_dict(raw_value))
+                        continue
+                target[f] = JSON2Obj.__output(getattr(source, f), stack)
         return output
 
+    @staticmethod
+    def __output(value, stack: list):
+        """Convert one value for __to_builtin. Objects and lists are created empty and added to the stack to be filled.
+        """
+        if isinstance(value, (JSON2Obj, CompactObj)):
+            output = dict()
+            stack.append((output, value))
+            return output
+        if isinstance(value, (list, tuple)):
+            # Frozen objects keep their lists as tuples.
+            output = list()
+            stack.append((output, value))
+            return output
+        if hasattr(type(value), "tolist"):
+            # array.array and NumPy arrays are output as lists.
+            return value.tolist()
+        return value
+
     def __repr__(self):
         return str(self.__to_dict())
 
@@ -150,3 +582,169 @@ class JSON2Obj:
 
         """
         return getattr(json_object, key, default)
+
+    @staticmethod
+    def compile_path(path: str) -> Callable[..., Any]:
+        """Compile a path like a.b.c[3].d into a reusable accessor.
+
+        Notes:
+            The accessor is called as accessor(json_object) or accessor(json_object, default) and does the same lookups
+            as json_object.a.b.c[3].d. If an attribute is not set, an index is out of range or a value on the way is
+            None, the default is returned, or KeyError is raised if no default was given. Compiled paths are cached.
+
+        Args:
+            path: Dotted attribute names with list indexes in brackets.
+
+        Returns: Accessor function.
+
+        Raises:
+            ValueError: if the path is not valid.
+
+        """
+        return paths.compile_path(path)
+
+    @staticmethod
+    def get_path(json_object: "JSON2Obj", path: str, default=None):
+        """Get the value at a path like a.b.c[3].d.
+
+        Notes:
+            Each call looks the compiled path up by its string, which costs a little more than the getattr chain. In a
+            hot loop keep the accessor from JSON2Obj.compile_path and call it instead, which costs less than the chain.
+
+        Args:
+            json_object: JSON2Obj object to get the value for.
+            path: Dotted attribute names with list indexes in brackets. It is compiled once and cached.
+            default: Default value if a segment of the path is missing. (Default=None)
+
+        Returns: Value at the path or the default value.
+
+        """
+        return paths.get_path(json_object, path, default)
+
+    @staticmethod
+    def index(json_object: "JSON2Obj", field: str, key: Union[str, Sequence[str]]) -> Mapping[Any, "JSON2Obj"]:
+        """Get a hash index of the records in a list field, like JSON2Obj.index(config, "routes", key="name").
+
+        Notes:
+            The index is built the first time it is asked for and kept for the object, without changing it. It is
+            rebuilt if the list is replaced or its length changes. If there are records with the same key the first one
+            is indexed, the same one a scan of the list would find.
+
+        Args:
+            json_object: JSON2Obj object with the list field.
+            field: Path of the list field, like routes or settings.routes.
+            key: Path of the key field in each record, or a list of paths to index by a tuple of their values.
+
+        Returns: Read only mapping of key value to record. Records that are missing a key are not in it.
+
+        Raises:
+            KeyError: if the field is missing.
+            TypeError: if the field is not a list or a key value can not be hashed.
+
+        """
+        return indexes.get_index(json_object, field, key)
+
+    @staticmethod
+    def diff(old: "JSON2Obj", new: "JSON2Obj") -> List[dict]:
+        """Get the path level changes between two objects, as JSON Patch style add, remove and replace changes.
+
+        Notes:
+            Frozen objects keep a content digest of every subtree once one diff has worked it out, so later diffs of
+            frozen objects skip the subtrees that are the same in both and only walk the path to each change. The
+            digests are worked out lazily, so the first diff of a freshly frozen object is still O(n) in its size.
+            Other objects are compared field by field.
+
+        Args:
+            old: JSON2Obj object to compare from.
+            new: JSON2Obj object to compare to.
+
+        Returns: List of changes, like [{"op": "replace", "path": "/logging/level", "value": "debug"}]. Applying them
+            to old with JSON2Obj.apply_patch makes it equal to new.
+
+        """
+        from . import diff
+
+        return diff.diff(old, new)
+
+    @staticmethod
+    def apply_patch(json_object: "JSON2Obj", patch: List[dict]):
+        """Apply JSON Patch style add, remove and replace changes, like the ones JSON2Obj.diff returns, in place.
+
+        Args:
+            json_object: JSON2Obj object to change.
+            patch: List of changes. They are applied in order and are not rolled back if one fails.
+
+        Raises:
+            KeyError: if the path of a change is missing.
+            ValueError: if a change has an unsupported op or an invalid path.
+            TypeError: if the object is read only.
+
+        """
+        from . import diff
+
+        diff.apply_patch(json_object, patch)
+
+
+def _has_env_var_references(value) -> bool:
+    """Check if a raw value is an env var reference or a list with env var references in it."""
+    return is_env_var_reference(value) or (isinstance(value, list) and bool(find_env_var_references(value)))
+
+
+def _new_node(cls: type, fields: dict, raw: Any = None) -> JSON2Obj:
+    """Make a read-only JSON2Obj subclass object without calling __init__ or __setattr__.
+
+    Args:
+        cls: JSON2Obj subclass to make, like FrozenObj.
+        fields: Built fields of the object.
+        raw: Raw values still to be read, or None if every field is in fields.
+
+    Returns: New object whose values are already resolved, so it has no env var function and is not lazy.
+
+    """
+    obj = cls.__new__(cls)
+    state = obj.__dict__
+    state[_private_name("options")] = _BUILT_OPTIONS
+    state[_private_name("env_var_plan")] = None
+    state[_private_name("raw")] = _EMPTY_RAW if raw is None else raw
+    state.update(fields)
+    return obj
+
+
+def _private_name(name: str) -> str:
+    """Name in __dict__ of a piece of private state. Names that start with _JSON2Obj are never output as fields."""
+    return _PRIVATE_PREFIX + name
+
+
+def _get_private(obj: Any, name: str, default: Any = None) -> Any:
+    """Get a piece of private state, like the raw dict or a cached hash, of an object."""
+    return obj.__dict__.get(_PRIVATE_PREFIX + name, default)
+
+
+def _set_private(obj: Any, name: str, value: Any):
+    """Set a piece of private state of an object, even a read-only one."""
+    obj.__dict__[_PRIVATE_PREFIX + name] = value
+
+
+# Env var plan for values that have no env var references in them.
+_NO_ENV_VARS: dict = dict()
+
+# Env var plan for values whose env var references are found while they are built.
+_FIND_ENV_VARS: dict = dict()
+
+# Values that are stored as they are.
+_SCALAR_TYPES = frozenset([str, int, float, bool, type(None)])
+
+# Types of raw values that are built as objects. A LayeredDict is a Mapping and not a dict.
+_DICT_TYPES = (dict, _layered.LayeredDict)
+
+# Raw dict of objects that are fully built. It is shared so those objects do not each hold an empty dict.
+_EMPTY_RAW: dict = dict()
+
+# Public class attributes that a lazy object's raw keys could shadow.
+_CLASS_ATTRIBUTES = tuple(a for a in dir(JSON2Obj) if not a.startswith("_"))
+
+# Prefix of the names of private state in __dict__, which are JSON2Obj's name-mangled attributes.
+_PRIVATE_PREFIX = "_JSON2Obj__"
+
+# Options of a node made by _new_node: no env var function, not lazy and nothing deferred.
+_BUILT_OPTIONS = (None, False, False)
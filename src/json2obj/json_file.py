@@ -3,39 +3,119 @@
 yaml_file.py
 """
 
-from typing import Callable, Optional
+from typing import Callable, Iterator, Optional
 
 import json
 
+from . import instrumentation, parsers
 from .env_vars import check_for_env_vars
+from .file_cache import file_cache
+from .file_writer import write_if_changed
 from .json2obj import JSON2Obj
 
 
 class JsonFile:
-    def __init__(self, file_path: str, env_var_function: Optional[Callable] = check_for_env_vars):
+    def __init__(
+        self,
+        file_path: str,
+        env_var_function: Optional[Callable] = check_for_env_vars,
+        parser: Optional[str] = None,
+        cache: bool = True,
+    ):
         """
 
         Args:
             file_path: Full path to file.
             env_var_function: Function to use for checking for env vars.
+            parser: Name of the JSON parser backend to use. If None the fastest installed backend is used.
+            cache: If True use the process-wide parsed file cache.
         """
         self.file_path = file_path
         self.env_var_function = env_var_function
+        self.parser = parser
+        self.cache = cache
 
 
-    def load(self) -> JSON2Obj:
-        data = self.read_file()
-        return JSON2Obj(data, env_var_function=self.env_var_function)
+    def load(self, lazy: bool = False, defer_env_vars: bool = False, frozen: bool = False) -> JSON2Obj:
+        """Load the file into a JSON2Obj.
 
+        Args:
+            lazy: If True only build attributes when they are first accessed.
+            defer_env_vars: If True env vars are resolved the first time they are accessed.
+            frozen: If True return an immutable, hashable FrozenObj. See JSON2Obj.freeze.
+
+        Returns: JSON2Obj of the file data.
+
+        """
+        with instrumentation.operation("load", self.file_path):
+            # Loads never change the data: eager and frozen loads build new objects and lists from it, and lazy and
+            # deferred objects only read their raw dict. So they use the cached data itself.
+            data = self.read_file(copy=False)
+            if frozen:
+                return JSON2Obj.from_dict(data, env_var_function=self.env_var_function, frozen=True)
+            return JSON2Obj(data, env_var_function=self.env_var_function, lazy=lazy, defer_env_vars=defer_env_vars)
+
+
+    def iter_objects(self, stream_format: Optional[str] = None, lazy: bool = False) -> Iterator[JSON2Obj]:
+        """Read the file one record at a time, yielding a JSON2Obj for each record.
+
+        Notes:
+            Memory use is bounded by the largest record and not by the size of the file.
+
+        Args:
+            stream_format: ndjson, array or stream. If None the format is picked from the file extension and contents.
+            lazy: If True only build attributes when they are first accessed.
+
+        Returns: Iterator of JSON2Obj records.
+
+        """
+        return JSON2Obj.iter_from_file(
+            self.file_path,
+            env_var_function=self.env_var_function,
+            stream_format=stream_format,
+            lazy=lazy,
+            parser=self.parser,
+        )
 
-    def read_file(self) -> dict:
-        with open(self.file_path) as file:
-            return json.load(file)
+    def read_file(self, copy: bool = True) -> dict:
+        """Read the file without resolving env vars.
 
-    def write_file(self, data: dict, rebase=True):
+        Notes:
+            Copying cached JSON costs about as much as parsing it again, so only reads with copy False use the file
+            cache. Other reads parse the file.
+
+        Args:
+            copy: If False and the file cache is used, return the cached data itself. It must not be changed.
+
+        Returns: dict of the file data.
+
+        """
+        if self.cache and not copy:
+            return file_cache.read(self.file_path, "json", self._read_file, copy=False)
+        return self._read_file()
+
+    def _read_file(self) -> dict:
+        with instrumentation.phase("read"), open(self.file_path, "rb") as file:
+            data = file.read()
+        instrumentation.count("bytes_read", len(data))
+        with instrumentation.phase("parse"):
+            return parsers.loads(data, self.parser)
+
+    def write_file(self, data: dict, rebase=True, original: Optional[dict] = None) -> bool:
+        """Write data to the file. The file is replaced atomically and is not touched if its content is the same.
+
+        Args:
+            data: Data to write.
+            rebase: If True the values of the original file are added to data.
+            original: Already parsed original file to rebase on. If None the file is read.
+
+        Returns: True if the file was written, False if it already had the same content.
+
+        """
         if rebase:
-            org_file = self.read_file()
-            data.update(org_file)
+            data.update(self.read_file() if original is None else original)
 
-        with open(self.file_path, 'w') as file:
-            json.dump(data, file)
+        written = write_if_changed(self.file_path, lambda file: json.dump(data, file))
+        if written:
+            file_cache.invalidate(self.file_path)
+        return written
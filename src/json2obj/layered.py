@@ -0,0 +1,171 @@
+#!/usr/bin/python3
+"""
+layered.py
+
+Read-only deep merge of config layers (like defaults, site config, user config and environment overrides). Nothing is
+copied: looking up a key walks the layers from the top, so it costs one dict lookup per layer, and a subtree that only
+one layer has is returned as it is.
+"""
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Sequence
+
+from .env_vars import is_env_var_reference
+
+_MISSING = object()
+
+
+class LayeredDict(Mapping):
+    """Deep merge of dicts, where each layer overrides the layers before it.
+
+    Notes:
+        Dicts are merged key by key. Any other value, including a list or an env var reference, replaces the values of
+        the layers before it. The layers are not copied or changed, so changes to a layer show up in the view.
+
+        It is a read only Mapping and not a dict, so code that only takes dicts (like json.dumps) raises TypeError
+        instead of seeing an empty dict. Use to_dict to copy it into plain dicts. A merged subtree is kept once it has
+        been looked up, so looking up the same key again gives the same object while the layers have not changed.
+    """
+
+    __slots__ = ("_layers", "_children")
+
+    def __init__(self, layers: Sequence[dict]):
+        """
+
+        Args:
+            layers: Dicts to merge, lowest priority first.
+        """
+        self._layers = tuple(layers)
+        self._children: Dict[Any, "LayeredDict"] = dict()
+
+    @property
+    def layers(self) -> tuple:
+        return self._layers
+
+    def __lookup(self, key) -> Any:
+        merge: List[dict] = list()
+        for layer in reversed(self._layers):
+            value = layer.get(key, _MISSING)
+            if value is _MISSING:
+                continue
+            if not isinstance(value, dict) or is_env_var_reference(value):
+                # A value that is not a dict hides every layer below it.
+                if merge:
+                    break
+                return value
+            merge.append(value)
+        if not merge:
+            return _MISSING
+        if len(merge) == 1:
+            return merge[0]
+        merge.reverse()
+        layers = tuple(merge)
+        child = self._children.get(key)
+        # The layers are checked by identity, so a layer replaced by an equal dict is not read through the old one.
+        if child is None or not _same_layers(child._layers, layers):
+            child = self._children[key] = LayeredDict(layers)
+        return child
+
+    def __getitem__(self, key) -> Any:
+        value = self.__lookup(key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None) -> Any:
+        value = self.__lookup(key)
+        return default if value is _MISSING else value
+
+    def __contains__(self, key) -> bool:
+        return any(key in layer for layer in self._layers)
+
+    def __iter__(self) -> Iterator:
+        # Keys are in the order a chain of dict.update calls would give: the first layer's keys, then new keys of each
+        # layer after it.
+        if len(self._layers) == 1:
+            yield from self._layers[0]
+            return
+        seen = set()
+        for layer in self._layers:
+            for key in layer:
+                if key not in seen:
+                    seen.add(key)
+                    yield key
+
+    def __len__(self) -> int:
+        if len(self._layers) == 1:
+            return len(self._layers[0])
+        return sum(1 for _ in self)
+
+    def __bool__(self) -> bool:
+        return any(self._layers)
+
+    def __eq__(self, other) -> bool:
+        return to_dict(self) == (to_dict(other) if isinstance(other, LayeredDict) else other)
+
+    def __ne__(self, other) -> bool:
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"LayeredDict({to_dict(self)})"
+
+    def copy(self) -> dict:
+        return to_dict(self)
+
+    def __reduce__(self):
+        return LayeredDict, (self._layers,)
+
+
+def merge_layers(*layers: dict) -> LayeredDict:
+    """Deep merge dicts without copying them.
+
+    Args:
+        *layers: Dicts (or LayeredDicts) to merge, lowest priority first.
+
+    Returns: LayeredDict view of the merged dicts.
+
+    Raises:
+        TypeError: if a layer is not a dict.
+
+    """
+    flat_layers = list()
+    for layer in layers:
+        if isinstance(layer, LayeredDict):
+            flat_layers.extend(layer.layers)
+        elif isinstance(layer, dict):
+            flat_layers.append(layer)
+        else:
+            raise TypeError(f"config layers must be type dict, not {type(layer).__name__}")
+    return LayeredDict(flat_layers)
+
+
+def to_dict(data: Any) -> Any:
+    """Copy a LayeredDict, and any LayeredDict in it, into plain dicts.
+
+    Notes:
+        This uses an explicit stack instead of recursion so there is no limit on how deeply nested the data can be.
+
+    Args:
+        data: LayeredDict or a value from one.
+
+    Returns: The merged data with no LayeredDict in it. Values only one layer has are not copied.
+
+    """
+    if not isinstance(data, LayeredDict):
+        return data
+    output = dict()
+    stack = [(output, data)]
+    while stack:
+        target, source = stack.pop()
+        for key, value in source.items():
+            if isinstance(value, LayeredDict):
+                child = target[key] = dict()
+                stack.append((child, value))
+            else:
+                target[key] = value
+    return output
+
+
+def _same_layers(layers_1: tuple, layers_2: tuple) -> bool:
+    return len(layers_1) == len(layers_2) and all(a is b for a, b in zip(layers_1, layers_2))
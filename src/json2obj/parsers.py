@@ -0,0 +1,139 @@
+#!/usr/bin/python3
+"""
+parsers.py
+
+Registry of JSON parser backends. The fastest installed backend is used by default and the stdlib json module is always
+available as a fallback. Every backend accepts str, bytes, bytearray and memoryview input.
+"""
+import json
+from importlib.util import find_spec
+from typing import Any, Callable, Dict, List, Optional, Union
+
+JsonInput = Union[str, bytes, bytearray, memoryview]
+
+# Backends in order of preference. Each entry is a factory that imports the backend and returns its loads function,
+# so a backend is only imported when it is first used.
+_PARSER_FACTORIES: Dict[str, Callable[[], Callable[[JsonInput], Any]]] = dict()
+_PARSER_MODULES: Dict[str, Optional[str]] = dict()
+_PARSERS: Dict[str, Callable[[JsonInput], Any]] = dict()
+_default_parser: Optional[str] = None
+_fastest_parser: Optional[str] = None
+
+
+def _json_factory() -> Callable[[JsonInput], Any]:
+    def loads(data: JsonInput) -> Any:
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+    return loads
+
+
+def _orjson_factory() -> Callable[[JsonInput], Any]:
+    import orjson
+
+    def loads(data: JsonInput) -> Any:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson is stricter than json (NaN, ints over 64 bits) so let json decide if the document is valid.
+            return _get_loads("json")(data)
+
+    return loads
+
+
+def register_parser(name: str, factory: Callable[[], Callable[[JsonInput], Any]], module: Optional[str] = None):
+    """Register a JSON parser backend.
+
+    Args:
+        name: Name of the backend.
+        factory: Function that returns the loads function of the backend. It is called the first time the backend is
+            used.
+        module: Module the backend needs. If it is not installed the backend is skipped when picking the default.
+
+    Returns: None
+
+    """
+    global _fastest_parser
+    _PARSER_FACTORIES[name] = factory
+    _PARSER_MODULES[name] = module
+    _PARSERS.pop(name, None)
+    _fastest_parser = None
+
+
+def available_parsers() -> List[str]:
+    """List the registered backends that are installed, in order of preference."""
+    preferred = [name for name in _PARSER_FACTORIES if name != "json"]
+    return [name for name in preferred + ["json"] if _is_installed(name)]
+
+
+def set_default_parser(name: Optional[str]):
+    """Set the backend used when no parser is given. None picks the fastest installed backend.
+
+    Args:
+        name: Name of the backend.
+
+    Returns: None
+
+    Raises:
+        KeyError: if the backend is not registered.
+
+    """
+    global _default_parser
+    if name is not None and name not in _PARSER_FACTORIES:
+        raise KeyError(f"unknown json parser: {name}")
+    _default_parser = name
+
+
+def get_parser(name: Optional[str] = None) -> Callable[[JsonInput], Any]:
+    """Get the loads function for a backend.
+
+    Args:
+        name: Name of the backend. If None the default backend is used.
+
+    Returns: Function that parses str, bytes, bytearray or memoryview input.
+
+    Raises:
+        KeyError: if the backend is not registered.
+
+    """
+    global _fastest_parser
+    if name is None:
+        name = _default_parser
+    if name is None:
+        if _fastest_parser is None:
+            _fastest_parser = available_parsers()[0]
+        name = _fastest_parser
+    return _get_loads(name)
+
+
+def loads(data: JsonInput, parser: Optional[str] = None) -> Any:
+    """Parse a JSON document.
+
+    Args:
+        data: JSON document.
+        parser: Name of the backend to use. If None the default backend is used.
+
+    Returns: Parsed data.
+
+    """
+    return get_parser(parser)(data)
+
+
+def _get_loads(name: str) -> Callable[[JsonInput], Any]:
+    parser = _PARSERS.get(name)
+    if parser is None:
+        if name not in _PARSER_FACTORIES:
+            raise KeyError(f"unknown json parser: {name}")
+        parser = _PARSER_FACTORIES[name]()
+        _PARSERS[name] = parser
+    return parser
+
+
+def _is_installed(name: str) -> bool:
+    module = _PARSER_MODULES.get(name)
+    return module is None or find_spec(module) is not None
+
+
+register_parser("orjson", _orjson_factory, module="orjson")
+register_parser("json", _json_factory)
@@ -0,0 +1,142 @@
+#!/usr/bin/python3
+"""
+paths.py
+
+Compiled accessors for paths like a.b.c[3].d. A path is parsed once and turned into a function that does the same
+attribute and index lookups as writing obj.a.b.c[3].d by hand, so reading it in a hot loop costs no more than the
+hand-written chain and a missing segment is handled in one place.
+"""
+import keyword
+import re
+from typing import Any, Callable, Dict, Tuple, Union
+
+# Max number of compiled paths kept by compile_path.
+PATH_CACHE_SIZE = 1024
+
+MISSING = object()
+
+# Compiled accessors by path. A plain dict rather than functools.lru_cache, so get_path finds a compiled path with one
+# dict lookup.
+_ACCESSORS: Dict[str, Callable[..., Any]] = dict()
+
+_SEGMENT = re.compile(r"(?:^|\.)([^.\[\]]+)|\[(-?\d+)\]")
+
+
+def parse_path(path: str) -> Tuple[Union[str, int], ...]:
+    """Split a path into its segments.
+
+    Args:
+        path: Dotted attribute names with list indexes in brackets, like a.b.c[3].d or [0].name.
+
+    Returns: Tuple of attribute names (str) and list indexes (int).
+
+    Raises:
+        ValueError: if the path is empty or not valid.
+
+    """
+    segments = list()
+    position = 0
+    for match in _SEGMENT.finditer(path):
+        if match.start() != position:
+            break
+        name, index = match.groups()
+        segments.append(name if index is None else int(index))
+        position = match.end()
+    if not segments or position != len(path):
+        raise ValueError(f"invalid path: {path!r}")
+    return tuple(segments)
+
+
+def format_path(segments: Tuple[Union[str, int], ...]) -> str:
+    return "".join(f"[{s}]" if isinstance(s, int) else f".{s}" for s in segments).lstrip(".")
+
+
+def compile_path(path: str) -> Callable[..., Any]:
+    """Compile a path into an accessor function.
+
+    Notes:
+        The accessor is called as accessor(obj) or accessor(obj, default). A segment is missing if the attribute is not
+        set, the index is out of range, or the value before it is None or can not be indexed. If a segment is missing
+        the default is returned, or KeyError is raised if no default was given. A value that is set to None is
+        returned as None.
+
+        Compiled paths are cached, so compiling the same path again returns the same accessor. Up to PATH_CACHE_SIZE
+        paths are kept, and the cache starts over once it is full.
+
+    Args:
+        path: Dotted attribute names with list indexes in brackets, like a.b.c[3].d.
+
+    Returns: Accessor function. Its path and segments attributes hold the path it was compiled from.
+
+    Raises:
+        ValueError: if the path is not valid.
+
+    """
+    accessor = _ACCESSORS.get(path)
+    if accessor is None:
+        accessor = _compile(path)
+        if len(_ACCESSORS) >= PATH_CACHE_SIZE:
+            # Paths built on the fly could fill it without end, so it starts over once it is full.
+            _ACCESSORS.clear()
+        _ACCESSORS[path] = accessor
+    return accessor
+
+
+def _compile(path: str) -> Callable[..., Any]:
+    segments = parse_path(path)
+    expression = "obj"
+    for segment in segments:
+        if isinstance(segment, int):
+            expression += f"[{segment}]"
+        elif segment.isidentifier() and not keyword.iskeyword(segment):
+            expression += f".{segment}"
+        else:
+            # Names that can not be written as attributes, like my-key, are read with getattr.
+            expression = f"getattr({expression}, {segment!r})"
+    source = (
+        "def accessor(obj, default=MISSING):\n"
+        "    try:\n"
+        f"        return {expression}\n"
+        "    except (AttributeError, IndexError, TypeError) as e:\n"
+        "        return missing(obj, segments, default, e)\n"
+    )
+    namespace = dict(MISSING=MISSING, missing=_missing, segments=segments, getattr=getattr)
+    exec(source, namespace)
+    accessor = namespace["accessor"]
+    accessor.path = path
+    accessor.segments = segments
+    return accessor
+
+
+def get_path(obj: Any, path: str, default: Any = None) -> Any:
+    """Get the value at a path, compiling the path the first time it is used.
+
+    Notes:
+        Each call still looks the path up before doing the lookups. In a hot loop keep the accessor from compile_path
+        and call it instead.
+
+    Args:
+        obj: Object to get the value from.
+        path: Dotted attribute names with list indexes in brackets, like a.b.c[3].d.
+        default: Value to return if a segment of the path is missing.
+
+    Returns: The value at the path or the default.
+
+    """
+    accessor = _ACCESSORS.get(path)
+    if accessor is None:
+        accessor = compile_path(path)
+    return accessor(obj, default)
+
+
+def _missing(obj: Any, segments: tuple, default: Any, error: Exception) -> Any:
+    """Handle a failed lookup. The error is raised again if it did not come from a missing segment."""
+    value = obj
+    for position, segment in enumerate(segments):
+        try:
+            value = value[segment] if isinstance(segment, int) else getattr(value, segment)
+        except (AttributeError, IndexError, TypeError):
+            if default is MISSING:
+                raise KeyError(f"missing path segment: {format_path(segments[: position + 1])}") from None
+            return default
+    raise error
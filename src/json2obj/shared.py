@@ -0,0 +1,454 @@
+#!/usr/bin/python3
+"""
+shared.py
+
+Publish a loaded JSON2Obj tree once, in a compact read-only encoding, to shared memory or a memory-mapped file, so every
+worker of a pre-fork or spawn pool can attach to it instead of parsing and building the same config again.
+
+Attaching only checks the header, so it takes the same time for any size of document. The attached tree is a view:
+objects and lists are read from the shared buffer the first time they are accessed, and values that are never read are
+never decoded or copied into the worker.
+
+Encoding (little endian, offsets are from the start of the buffer):
+    header: magic (8 bytes), version (u32), size (u32), root offset (u32)
+    value: one tag byte, then
+        none, false, true: nothing
+        int: i64, bigint and str: u32 length and that many UTF-8 bytes, float: f64
+        list: u32 count and an offset for each item
+        object: u32 count and a key offset and value offset for each field
+    Every distinct scalar and key is written once and shared by offset.
+"""
+import mmap
+import os
+import struct
+import sys
+from collections.abc import Sequence
+from typing import Any, Dict, Iterator, Optional, Union
+
+from .file_writer import write_if_changed
+from .json2obj import _CLASS_ATTRIBUTES, JSON2Obj, _new_node, _private_name
+from .layered import LayeredDict
+
+SHARED_VERSION = 1
+
+_MAGIC = b"J2OSHARE"
+_HEADER = struct.Struct("<8sIII")
+_U32 = struct.Struct("<I")
+_PAIR = struct.Struct("<II")
+_I64 = struct.Struct("<q")
+_F64 = struct.Struct("<d")
+_MAX_SIZE = 2**32 - 1
+
+_NONE, _FALSE, _TRUE, _INT, _BIGINT, _FLOAT, _STR, _LIST, _OBJECT = range(9)
+
+# Name of the raw fields in __dict__. It is read on every first access, so the name is only worked out once.
+_RAW = _private_name("raw")
+
+# Values that are encoded as objects, and as objects or lists.
+_OBJECT_TYPES = (dict, LayeredDict)
+_NODE_TYPES = (dict, LayeredDict, list)
+
+
+def encode(json_object: Union[JSON2Obj, dict]) -> bytes:
+    """Encode a JSON2Obj or dict in the shared encoding.
+
+    Args:
+        json_object: JSON2Obj, CompactObj, dict or LayeredDict to encode. Env vars of a JSON2Obj are encoded with the
+            values they resolved to.
+
+    Returns: Encoded tree.
+
+    Raises:
+        TypeError: if a value is not a JSON value.
+        ValueError: if the encoded tree is over 4 GiB.
+
+    """
+    data = json_object if isinstance(json_object, _OBJECT_TYPES) else JSON2Obj.to_dict(json_object)
+    output = bytearray(_HEADER.size)
+    scalars: Dict[tuple, int] = dict()
+
+    def write_scalar(value) -> int:
+        value_type = type(value)
+        key = (value_type, value)
+        offset = scalars.get(key)
+        if offset is not None:
+            return offset
+        offset = len(output)
+        if value is None:
+            output.append(_NONE)
+        elif value_type is bool:
+            output.append(_TRUE if value else _FALSE)
+        elif value_type is int and -(2**63) <= value < 2**63:
+            output.append(_INT)
+            output.extend(_I64.pack(value))
+        elif value_type is float:
+            output.append(_FLOAT)
+            output.extend(_F64.pack(value))
+        elif value_type is str or value_type is int:
+            encoded = str(value).encode("utf-8")
+            output.append(_STR if value_type is str else _BIGINT)
+            output.extend(_U32.pack(len(encoded)))
+            output.extend(encoded)
+        else:
+            raise TypeError(f"unable to share value of type {value_type.__name__}")
+        scalars[key] = offset
+        return offset
+
+    def write_value(value, offsets: Dict[int, int]) -> int:
+        if isinstance(value, _NODE_TYPES):
+            return offsets[id(value)]
+        return write_scalar(_plain_scalar(value))
+
+    # Find every object and list, parents before children, then write them children first so a parent can point at
+    # its children. This uses an explicit stack so there is no limit on how deeply nested the data can be. Each node's
+    # items are read once, so the children written are the ones found, even for mappings that make their values on
+    # lookup.
+    nodes = list()
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, _OBJECT_TYPES):
+            pairs = list(node.items())
+            nodes.append((node, pairs))
+            stack.extend(v for _, v in pairs if isinstance(v, _NODE_TYPES))
+        else:
+            nodes.append((node, None))
+            stack.extend(v for v in node if isinstance(v, _NODE_TYPES))
+
+    offsets: Dict[int, int] = dict()
+    for node, items in reversed(nodes):
+        if items is not None:
+            pairs = [(write_scalar(str(k)), write_value(v, offsets)) for k, v in items]
+            offsets[id(node)] = len(output)
+            output.append(_OBJECT)
+            output.extend(_U32.pack(len(pairs)))
+            for pair in pairs:
+                output.extend(_PAIR.pack(*pair))
+        else:
+            items = [write_value(v, offsets) for v in node]
+            offsets[id(node)] = len(output)
+            output.append(_LIST)
+            output.extend(_U32.pack(len(items)))
+            output.extend(struct.pack(f"<{len(items)}I", *items))
+
+    if len(output) > _MAX_SIZE:
+        raise ValueError(f"shared tree is {len(output)} bytes, the max is {_MAX_SIZE}")
+    _HEADER.pack_into(output, 0, _MAGIC, SHARED_VERSION, len(output), offsets[id(data)])
+    return bytes(output)
+
+
+def _plain_scalar(value: Any) -> Any:
+    if value is None or type(value) in (str, int, float, bool):
+        return value
+    # Subclasses like the ruamel scalar types are shared as the built in type.
+    for plain_type in (bool, str, int, float):
+        if isinstance(value, plain_type):
+            return plain_type(value)
+    raise TypeError(f"unable to share value of type {type(value).__name__}")
+
+
+class _Reader:
+    def __init__(self, buffer, owner: Any = None):
+        """Decoder of values in a shared buffer.
+
+        Args:
+            buffer: Buffer with an encoded tree.
+            owner: Object that owns the buffer. It is kept alive as long as any view of the tree is.
+
+        Raises:
+            ValueError: if the buffer does not hold a shared tree.
+
+        """
+        self.buffer = memoryview(buffer).toreadonly()
+        self.owner = owner
+        if len(self.buffer) < _HEADER.size:
+            raise ValueError("not a shared JSON2Obj tree")
+        magic, version, size, root = _HEADER.unpack_from(self.buffer, 0)
+        if magic != _MAGIC:
+            raise ValueError("not a shared JSON2Obj tree")
+        if version != SHARED_VERSION:
+            raise ValueError(f"shared tree version {version} is not {SHARED_VERSION}")
+        if size > len(self.buffer):
+            raise ValueError("shared tree is truncated")
+        self.root = root
+        self.keys: Dict[int, str] = dict()
+
+    def value(self, offset: int) -> Any:
+        """Read the value at an offset. Objects and lists are returned as views."""
+        buffer = self.buffer
+        tag = buffer[offset]
+        if tag == _STR:
+            length = _U32.unpack_from(buffer, offset + 1)[0]
+            return str(buffer[offset + 5 : offset + 5 + length], "utf-8")
+        if tag == _INT:
+            return _I64.unpack_from(buffer, offset + 1)[0]
+        if tag == _OBJECT:
+            return _shared_obj(self, offset)
+        if tag == _LIST:
+            return SharedList(self, offset)
+        if tag == _FLOAT:
+            return _F64.unpack_from(buffer, offset + 1)[0]
+        if tag == _NONE:
+            return None
+        if tag == _TRUE or tag == _FALSE:
+            return tag == _TRUE
+        if tag == _BIGINT:
+            length = _U32.unpack_from(buffer, offset + 1)[0]
+            return int(str(buffer[offset + 5 : offset + 5 + length], "utf-8"))
+        raise ValueError(f"unknown tag {tag} at offset {offset}")
+
+    def plain(self, offset: int) -> Any:
+        """Read the value at an offset as plain dicts and lists."""
+        value = self.value(offset)
+        if isinstance(value, (SharedObj, SharedList)):
+            return JSON2Obj.to_dict(value) if isinstance(value, SharedObj) else value.tolist()
+        return value
+
+    def fields(self, offset: int) -> Dict[str, int]:
+        """Read the key and value offset of every field of the object at an offset."""
+        count = _U32.unpack_from(self.buffer, offset + 1)[0]
+        pairs = struct.unpack_from(f"<{count * 2}I", self.buffer, offset + 5)
+        keys = self.keys
+        fields = dict()
+        for i in range(0, len(pairs), 2):
+            key = keys.get(pairs[i])
+            if key is None:
+                # Keys are decoded once so records with the same keys share the strings.
+                key = keys[pairs[i]] = self.value(pairs[i])
+            fields[key] = pairs[i + 1]
+        return fields
+
+
+class _SharedFields:
+    """Field offsets of a shared object. This stands in for the raw dict of a lazy JSON2Obj."""
+
+    __slots__ = ("reader", "offsets")
+
+    def __init__(self, reader: _Reader, offset: int):
+        self.reader = reader
+        self.offsets = reader.fields(offset)
+
+    def __contains__(self, key) -> bool:
+        return key in self.offsets
+
+    def __getitem__(self, key) -> Any:
+        return self.reader.plain(self.offsets[key])
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def keys(self):
+        return self.offsets.keys()
+
+
+class SharedObj(JSON2Obj):
+    """Read-only JSON2Obj view of an object in a shared tree. Fields are read from the buffer on first access."""
+
+    def __getattr__(self, item):
+        fields = self.__dict__.get(_RAW)
+        if not fields or item not in fields:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{item}'")
+        value = fields.reader.value(fields.offsets[item])
+        # Every thread that gets here first reads the same value, so there is no need to lock.
+        self.__dict__[item] = value
+        return value
+
+    def __setattr__(self, key, value):
+        raise TypeError(f"can not set {key}: SharedObj is read only")
+
+    def __delattr__(self, key):
+        raise TypeError(f"can not delete {key}: SharedObj is read only")
+
+    def __reduce__(self):
+        # A view can not be sent to another process, so send the data.
+        return JSON2Obj, (JSON2Obj.to_dict(self), None)
+
+
+def _shared_obj(reader: _Reader, offset: int) -> SharedObj:
+    # Values are read as they were published, which is after env vars were resolved.
+    fields = _SharedFields(reader, offset)
+    # Keys that shadow class attributes (like get) would never reach __getattr__, so read them now.
+    shadowed = {key: reader.value(fields.offsets[key]) for key in _CLASS_ATTRIBUTES if key in fields}
+    return _new_node(SharedObj, shadowed, raw=fields)
+
+
+class SharedList(Sequence):
+    """Read-only list view of a list in a shared tree. Items are read from the buffer on first access."""
+
+    __slots__ = ("_reader", "_offset", "_count", "_items")
+
+    def __init__(self, reader: _Reader, offset: int):
+        self._reader = reader
+        # Offsets of the items start after the tag and count.
+        self._offset = offset + 5
+        self._count = _U32.unpack_from(reader.buffer, offset + 1)[0]
+        self._items: Dict[int, Any] = dict()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("list index out of range")
+        item = self._items.get(index)
+        if item is None:
+            item = self._reader.value(_U32.unpack_from(self._reader.buffer, self._offset + index * 4)[0])
+            if isinstance(item, (SharedObj, SharedList)):
+                self._items[index] = item
+        return item
+
+    def __iter__(self) -> Iterator:
+        for index in range(self._count):
+            yield self[index]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (SharedList, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        return repr(self.tolist())
+
+    def tolist(self) -> list:
+        """Output the list as a list of plain dicts and lists."""
+        offsets = struct.unpack_from(f"<{self._count}I", self._reader.buffer, self._offset)
+        return [self._reader.plain(offset) for offset in offsets]
+
+    def __reduce__(self):
+        return list, (self.tolist(),)
+
+
+class SharedTree:
+    def __init__(self, buffer, owner: Any = None, name: Optional[str] = None, path: Optional[str] = None):
+        """Shared tree in a buffer. Use SharedTree.publish, SharedTree.attach, SharedTree.write or SharedTree.open.
+
+        Args:
+            buffer: Buffer with an encoded tree.
+            owner: SharedMemory or mmap the buffer is from.
+            name: Name of the shared memory block.
+            path: Path of the memory-mapped file.
+        """
+        self.name = name
+        self.path = path
+        self._owner = owner
+        self._reader = _Reader(buffer, owner)
+        self._root: Optional[SharedObj] = None
+        self._closed = False
+        self.size = _HEADER.unpack_from(self._reader.buffer, 0)[2]
+
+    @property
+    def root(self) -> SharedObj:
+        """JSON2Obj view of the tree."""
+        if self._root is None:
+            self._root = self._reader.value(self._reader.root)
+        return self._root
+
+    @staticmethod
+    def publish(json_object: Union[JSON2Obj, dict], name: Optional[str] = None) -> "SharedTree":
+        """Publish a tree to a new shared memory block.
+
+        Notes:
+            The publishing process owns the block and should call unlink when the workers are done with it.
+
+        Args:
+            json_object: JSON2Obj, CompactObj or dict to publish.
+            name: Name of the shared memory block. If None a unique name is picked.
+
+        Returns: SharedTree. Its name is what workers attach with.
+
+        """
+        from multiprocessing.shared_memory import SharedMemory
+
+        data = encode(json_object)
+        memory = SharedMemory(name=name, create=True, size=len(data))
+        memory.buf[: len(data)] = data
+        return SharedTree(memory.buf, owner=memory, name=memory.name)
+
+    @staticmethod
+    def attach(name: str) -> "SharedTree":
+        """Attach to a tree published with SharedTree.publish.
+
+        Notes:
+            Before Python 3.13 an attaching process that was not started by the publisher (through multiprocessing or
+            a fork) registers the block with its own resource tracker, which removes the block when that process
+            exits. Share a file with SharedTree.write and SharedTree.open for unrelated processes.
+
+        Args:
+            name: Name of the shared memory block.
+
+        Returns: SharedTree. The tree is not copied.
+
+        Raises:
+            FileNotFoundError: if there is no shared memory block with the name.
+            ValueError: if the block does not hold a shared tree.
+
+        """
+        from multiprocessing.shared_memory import SharedMemory
+
+        if sys.version_info >= (3, 13):
+            memory = SharedMemory(name=name, track=False)
+        else:
+            memory = SharedMemory(name=name)
+        return SharedTree(memory.buf, owner=memory, name=memory.name)
+
+    @staticmethod
+    def write(json_object: Union[JSON2Obj, dict], path: str) -> bool:
+        """Write a tree to a file that workers can open with SharedTree.open.
+
+        Notes:
+            The file is replaced atomically, so workers that have the old file open keep reading the old tree. A file on
+            a memory file system (like /dev/shm) is never written to disk.
+
+        Args:
+            json_object: JSON2Obj, CompactObj or dict to write.
+            path: Path to the file.
+
+        Returns: True if the file was written, False if it already had the same tree.
+
+        """
+        data = encode(json_object)
+        return write_if_changed(path, lambda file: file.write(data), binary=True)
+
+    @staticmethod
+    def open(path: str) -> "SharedTree":
+        """Memory-map a file written with SharedTree.write. Pages are shared with every process that maps the file.
+
+        Args:
+            path: Path to the file.
+
+        Returns: SharedTree. The tree is not copied.
+
+        Raises:
+            ValueError: if the file does not hold a shared tree.
+
+        """
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                raise ValueError("not a shared JSON2Obj tree")
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return SharedTree(mapped, owner=mapped, path=str(path))
+
+    def close(self):
+        """Close this process's mapping. Reading a view of the tree that was not read before raises ValueError."""
+        if self._closed:
+            return
+        self._closed = True
+        self._reader.buffer.release()
+        self._owner.close()
+
+    def unlink(self):
+        """Remove the shared memory block. Processes that are attached keep their mapping until they close it."""
+        if self.name is None:
+            raise ValueError("only trees published to shared memory can be unlinked")
+        self._owner.unlink()
+
+    def __enter__(self) -> "SharedTree":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+        return False
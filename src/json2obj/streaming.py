@@ -0,0 +1,177 @@
+#!/usr/bin/python3
+"""
+streaming.py
+
+Read records from NDJSON files and top-level JSON arrays one at a time, so memory is bounded by the largest record and
+not by the size of the file.
+"""
+import json
+from enum import Enum
+from pathlib import Path
+from typing import Any, Iterator, Optional, TextIO
+
+from . import parsers
+
+_CHUNK_SIZE = 64 * 1024
+_WHITESPACE = " \t\n\r"
+# Longest token that can be cut off at the end of a chunk and fail to decode: -Infinity. A \uXXXX escape is shorter.
+_MAX_TOKEN_SIZE = 9
+
+
+class StreamFormats(str, Enum):
+    NDJSON = "ndjson"
+    ARRAY = "array"
+    STREAM = "stream"
+
+
+def get_stream_format(file_path: str, file: TextIO) -> StreamFormats:
+    """Pick the stream format for a file.
+
+    Notes:
+        .ndjson and .jsonl files are read one record per line. Files that start with [ are read as a top-level array.
+        Anything else is read as a stream of JSON values separated by whitespace, which covers both a single document
+        and NDJSON with records that span lines.
+
+    Args:
+        file_path: Path to the file.
+        file: File opened in text mode. It is not moved.
+
+    Returns: StreamFormats of the file.
+
+    """
+    if Path(file_path).suffix.lower() in [".ndjson", ".jsonl"]:
+        return StreamFormats.NDJSON
+    position = file.tell()
+    char = file.read(1)
+    while char and char in _WHITESPACE:
+        char = file.read(1)
+    file.seek(position)
+    if char == "[":
+        return StreamFormats.ARRAY
+    return StreamFormats.STREAM
+
+
+def iter_records(
+    file: TextIO, stream_format: StreamFormats, parser: Optional[str] = None, chunk_size: int = _CHUNK_SIZE
+) -> Iterator[Any]:
+    """Yield each record from a file opened in text mode.
+
+    Args:
+        file: File opened in text mode.
+        stream_format: StreamFormats of the file.
+        parser: Name of the JSON parser backend to use for NDJSON lines. If None the fastest installed backend is used.
+            Array and stream formats find where each record ends while parsing it, which only the json backend can
+            do, so they only take None or json.
+        chunk_size: Number of characters to read at a time for array and stream formats.
+
+    Returns: Iterator of parsed records.
+
+    Raises:
+        ValueError: if the file is not valid JSON, or the parser can not read the stream format.
+
+    """
+    if stream_format is StreamFormats.NDJSON:
+        return _iter_ndjson(file, parser)
+    if parser not in (None, "json"):
+        raise ValueError(f"parser {parser} can not read {stream_format.value} streams, only json can")
+    if stream_format is StreamFormats.ARRAY:
+        return _iter_values(file, chunk_size, in_array=True)
+    return _iter_values(file, chunk_size, in_array=False)
+
+
+def _iter_ndjson(file: TextIO, parser: Optional[str]) -> Iterator[Any]:
+    loads = parsers.get_parser(parser)
+    for line_number, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        try:
+            yield loads(line)
+        except ValueError as e:
+            raise ValueError(f"invalid json on line {line_number}: {e}")
+
+
+class _Reader:
+    """Buffer over a text file that only keeps the part of the file that has not been parsed yet."""
+
+    def __init__(self, file: TextIO, chunk_size: int):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+
+    def read_more(self, size: int) -> bool:
+        if self.eof:
+            return False
+        chunk = self.file.read(size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.position :] + chunk
+        self.position = 0
+        return True
+
+    def next_char(self) -> str:
+        """Skip whitespace and return the next character without consuming it. Returns an empty string at EOF."""
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in _WHITESPACE:
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self.read_more(self.chunk_size):
+                return ""
+
+    def cut_off(self, error: json.JSONDecodeError) -> bool:
+        """Check if a decode error could be from the value running past the end of the buffer."""
+        if error.msg.startswith("Unterminated string"):
+            # Only raised when there is no closing quote before the end of the buffer.
+            return True
+        # A literal, number or escape that starts near the end of the buffer may be cut off.
+        return len(self.buffer) - error.pos <= _MAX_TOKEN_SIZE
+
+    def decode(self, decoder: json.JSONDecoder) -> Any:
+        """Decode the next value, reading more of the file until the whole value is in the buffer."""
+        if not self.next_char():
+            raise ValueError("unexpected end of json stream")
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError as e:
+                # Only a value that is cut off at the end of the buffer is worth reading more for. Anything else is
+                # invalid, so it is raised before the rest of the file is read.
+                if not self.cut_off(e) or not self.read_more(size):
+                    raise
+                # Grow the read size so a large record is not re-parsed once per chunk.
+                size *= 2
+                continue
+            # A number at the end of the buffer may continue in the next chunk.
+            if end == len(self.buffer) and self.read_more(size):
+                continue
+            self.position = end
+            return value
+
+
+def _iter_values(file: TextIO, chunk_size: int, in_array: bool) -> Iterator[Any]:
+    reader = _Reader(file, chunk_size)
+    decoder = json.JSONDecoder()
+
+    if not in_array:
+        while reader.next_char():
+            yield reader.decode(decoder)
+        return
+
+    if reader.next_char() != "[":
+        raise ValueError("json stream does not start with [")
+    reader.position += 1
+    char = reader.next_char()
+    if char == "]":
+        reader.position += 1
+    while char != "]":
+        yield reader.decode(decoder)
+        char = reader.next_char()
+        reader.position += 1
+        if char not in [",", "]"]:
+            raise ValueError(f"expected , or ] in json array but found {char!r}")
+    if reader.next_char():
+        raise ValueError("extra data after json array")
@@ -2,42 +2,225 @@
 """
 yaml_file.py
 """
+import re
+from enum import Enum
+from typing import TYPE_CHECKING, Any, Callable, Optional, Union
 
-from typing import Callable, Optional
-
-import yaml
-
+from . import instrumentation
 from .env_vars import check_for_env_vars
+from .file_cache import file_cache
+from .file_writer import write_if_changed
 from .json2obj import JSON2Obj
 
-from ruamel.yaml import YAML
-from ruamel.yaml.comments import CommentedMap
+if TYPE_CHECKING:
+    from ruamel.yaml import YAML
+    from ruamel.yaml.comments import CommentedMap
+
+
+class YamlModes(str, Enum):
+    # Plain dicts and lists from the fastest installed safe loader. Use this when only the values are needed.
+    SAFE = "safe"
+    # ruamel CommentedMap and CommentedSeq that keep comments and formatting so the file can be written back.
+    ROUND_TRIP = "round_trip"
+
 
 class YamlFile:
-    def __init__(self, file_path: str, env_var_function: Optional[Callable] = check_for_env_vars):
+    def __init__(
+        self,
+        file_path: str,
+        env_var_function: Optional[Callable] = check_for_env_vars,
+        cache: bool = True,
+        mode: Union[str, YamlModes] = YamlModes.SAFE,
+    ):
         """
 
         Args:
             file_path: Full path to file.
             env_var_function: Function to use for checking for env vars.
+            cache: If True use the process-wide parsed file cache.
+            mode: YamlModes used by load and read_file. Both modes read the same values. write_file always reads the
+                original file in round_trip mode so its comments are kept.
         """
         self.file_path = file_path
-        self.yaml = YAML()
+        self._yaml: Optional["YAML"] = None
         self.env_var_function = env_var_function
+        self.cache = cache
+        self.mode = YamlModes(mode)
+
+    @property
+    def yaml(self) -> "YAML":
+        """ruamel round-trip YAML instance, created the first time a file is read or written in round_trip mode."""
+        if self._yaml is None:
+            from ruamel.yaml import YAML
 
-    def load(self) -> JSON2Obj:
-        data = self.read_file()
-        return JSON2Obj(data, env_var_function=self.env_var_function)
+            self._yaml = YAML()
+        return self._yaml
 
-    def read_file(self) -> CommentedMap:
-        with open(self.file_path) as file:
-            return self.yaml.load(file)
+    def load(self, lazy: bool = False, defer_env_vars: bool = False, frozen: bool = False) -> JSON2Obj:
+        """Load the file into a JSON2Obj.
+
+        Args:
+            lazy: If True only build attributes when they are first accessed.
+            defer_env_vars: If True env vars are resolved the first time they are accessed.
+            frozen: If True return an immutable, hashable FrozenObj. See JSON2Obj.freeze.
+
+        Returns: JSON2Obj of the file data.
+
+        """
+        with instrumentation.operation("load", self.file_path):
+            # Loads never change the data: eager and frozen loads build new objects and lists from it, and lazy and
+            # deferred objects only read their raw dict. So they use the cached data itself.
+            data = self.read_file(copy=False)
+            if frozen:
+                return JSON2Obj.from_dict(data, env_var_function=self.env_var_function, frozen=True)
+            return JSON2Obj(data, env_var_function=self.env_var_function, lazy=lazy, defer_env_vars=defer_env_vars)
+
+    def read_file(self, mode: Optional[Union[str, YamlModes]] = None, copy: bool = True) -> Union[dict, "CommentedMap"]:
+        """Read the file without resolving env vars.
+
+        Args:
+            mode: YamlModes to read the file with. If None the mode of the YamlFile is used.
+            copy: If False and the file cache is used, return the cached data itself. It must not be changed.
+
+        Returns: dict in safe mode or CommentedMap in round_trip mode.
+
+        """
+        mode = self.mode if mode is None else YamlModes(mode)
+        if self.cache:
+            return file_cache.read(self.file_path, f"yaml.{mode.value}", lambda: self._read_file(mode), copy=copy)
+        return self._read_file(mode)
+
+    def _read_file(self, mode: YamlModes = YamlModes.ROUND_TRIP) -> Union[dict, "CommentedMap"]:
+        with instrumentation.phase("read"), open(self.file_path, "rb") as file:
+            data = file.read()
+        instrumentation.count("bytes_read", len(data))
+        with instrumentation.phase("parse"):
+            if mode is YamlModes.SAFE:
+                return safe_load(data)
+            return self.yaml.load(data)
+
+    def write_file(self, data: dict, rebase=True, original: Optional[dict] = None) -> bool:
+        """Write data to the file. The file is replaced atomically and is not touched if its content is the same.
+
+        Args:
+            data: Data to write.
+            rebase: If True the values of the original file are added to data.
+            original: Already parsed original file to rebase on. If None the file is read in round_trip mode.
 
-    def write_file(self, data: dict, rebase=True):
+        Returns: True if the file was written, False if it already had the same content.
+
+        """
         if rebase:
-            org_file = self.read_file()
-            data.update(org_file)
+            data.update(self.read_file(YamlModes.ROUND_TRIP) if original is None else original)
+
+        written = write_if_changed(self.file_path, lambda file: self.yaml.dump(data, file))
+        if written:
+            file_cache.invalidate(self.file_path)
+        return written
+
+
+def safe_load(data: Union[str, bytes]) -> Any:
+    """Load a YAML document into plain dicts and lists with the fastest installed safe loader.
+
+    Notes:
+        PyYAML's libyaml loader is used when it is installed. It follows YAML 1.1 by default, so it is given the YAML
+        1.2 rules ruamel uses (yes/no/on/off are strings, 0o10 is octal, 010 is decimal and 1e3 is a float) so both
+        modes read the same values. Documents that ask for YAML 1.1 with a %YAML directive are read with ruamel.
+
+    Args:
+        data: YAML document.
+
+    Returns: Parsed data.
+
+    """
+    if isinstance(data, bytes):
+        data = data.decode("utf-8-sig")
+    loader = _get_safe_loader()
+    if loader is None or _YAML_1_1_DIRECTIVE.match(data):
+        from ruamel.yaml import YAML
+
+        return YAML(typ="safe").load(data)
+    return loader(data)
+
+
+_YAML_1_1_DIRECTIVE = re.compile(r"\A\s*%YAML\s+1\.1")
+_safe_loader: Optional[Callable[[str], Any]] = None
+
+
+def _get_safe_loader() -> Optional[Callable[[str], Any]]:
+    """Get the PyYAML load function with YAML 1.2 rules, or None if PyYAML is not installed."""
+    global _safe_loader
+    if _safe_loader is not None:
+        return _safe_loader
+    try:
+        import yaml
+    except ImportError:
+        return None
+
+    base_loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    loader_class = type("Yaml12SafeLoader", (base_loader,), {"yaml_implicit_resolvers": dict()})
+    for tag, regexp, first in _YAML_1_2_RESOLVERS:
+        loader_class.add_implicit_resolver(tag, regexp, first)
+    loader_class.add_constructor("tag:yaml.org,2002:int", _construct_yaml_1_2_int)
+
+    def load(data: str) -> Any:
+        return yaml.load(data, Loader=loader_class)
+
+    _safe_loader = load
+    return load
+
+
+def _construct_yaml_1_2_int(loader, node) -> int:
+    value = loader.construct_scalar(node).replace("_", "")
+    sign = 1
+    if value[0] in "+-":
+        sign = -1 if value[0] == "-" else 1
+        value = value[1:]
+    for prefix, base in [("0b", 2), ("0o", 8), ("0x", 16)]:
+        if value.startswith(prefix):
+            return sign * int(value[2:], base)
+    return sign * int(value)
+
 
-        with open(self.file_path, 'w') as file:
-            print(data)
-            self.yaml.dump(data, file)
+# Implicit type rules of YAML 1.2, the same ones ruamel uses by default.
+_YAML_1_2_RESOLVERS = [
+    ("tag:yaml.org,2002:bool", re.compile(r"^(?:true|True|TRUE|false|False|FALSE)$"), list("tTfF")),
+    (
+        "tag:yaml.org,2002:float",
+        re.compile(
+            r"""^(?:
+             [-+]?(?:[0-9][0-9_]*)\.[0-9_]*(?:[eE][-+]?[0-9]+)?
+            |[-+]?(?:[0-9][0-9_]*)(?:[eE][-+]?[0-9]+)
+            |[-+]?\.[0-9_]+(?:[eE][-+][0-9]+)?
+            |[-+]?\.(?:inf|Inf|INF)
+            |\.(?:nan|NaN|NAN))$""",
+            re.X,
+        ),
+        list("-+0123456789."),
+    ),
+    (
+        "tag:yaml.org,2002:int",
+        re.compile(
+            r"""^(?:[-+]?0b[0-1_]+
+            |[-+]?0o[0-7_]+
+            |[-+]?[0-9_]+
+            |[-+]?0x[0-9a-fA-F_]+)$""",
+            re.X,
+        ),
+        list("-+0123456789"),
+    ),
+    ("tag:yaml.org,2002:merge", re.compile(r"^(?:<<)$"), ["<"]),
+    ("tag:yaml.org,2002:null", re.compile(r"^(?: ~ |null|Null|NULL | )$", re.X), ["~", "n", "N", ""]),
+    (
+        "tag:yaml.org,2002:timestamp",
+        re.compile(
+            r"""^(?:[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]
+            |[0-9][0-9][0-9][0-9] -[0-9][0-9]? -[0-9][0-9]?
+            (?:[Tt]|[ \t]+)[0-9][0-9]?
+            :[0-9][0-9] :[0-9][0-9] (?:\.[0-9]*)?
+            (?:[ \t]*(?:Z|[-+][0-9][0-9]?(?::[0-9][0-9])?))?)$""",
+            re.X,
+        ),
+        list("0123456789"),
+    ),
+]
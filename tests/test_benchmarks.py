@@ -0,0 +1,35 @@
+#!/usr/bin/python3
+"""
+test_benchmarks.py
+"""
+from benchmarks.generators import generate_config, generate_document
+from benchmarks.run import BENCHMARKS, BenchmarkParams, find_regressions, load_baseline, run_benchmarks, save_baseline
+from json2obj import JSON2Obj
+from json2obj.ObjectifyConfig.configurator import Configurator
+
+
+def test_generators_1():
+    document = generate_document(width=4, depth=3, list_length=2, env_var_share=0.5, seed=1)
+    assert document == generate_document(width=4, depth=3, list_length=2, env_var_share=0.5, seed=1)
+    assert len(document) == 4
+    assert len(document["field_1"]) == 2
+    assert not isinstance(document["field_0"]["field_0"]["field_1"], list)
+
+    template, default_config, user_config = generate_config(sections=2, variables=6)
+    config = Configurator(template).validate_user_config(user_config, default_config)
+    assert len(JSON2Obj.to_dict(config.section_1)) == 6
+
+
+def test_benchmarks_1(tmp_path):
+    params = BenchmarkParams(width=3, depth=2, list_length=2, documents=2, sections=1, variables=3)
+    results = run_benchmarks(params, repeat=1)
+    assert [result.name for result in results] == list(BENCHMARKS)
+    assert all(result.time > 0 and result.peak_memory > 0 for result in results)
+
+    path = str(tmp_path / "baseline.json")
+    save_baseline(results, path, params)
+    baseline = load_baseline(path)
+    assert find_regressions(results, baseline) == []
+
+    slower = [result._replace(time=result.time * 2) for result in results]
+    assert len(find_regressions(slower, baseline, threshold=0.5)) == len(results)
@@ -0,0 +1,55 @@
+#!/usr/bin/python3
+"""
+test_compact.py
+"""
+import copy
+import pickle
+
+import pytest
+
+from json2obj.compact import CompactObj
+from json2obj.json2obj import JSON2Obj
+
+
+def test_compact_1():
+    input_dict = dict(key1="value1", key2=dict(key2a="value2a", key2b="value2b"), key3="value3")
+    json_obj = JSON2Obj.from_dict(input_dict, compact=True)
+    assert isinstance(json_obj, CompactObj)
+    assert not hasattr(json_obj, "__dict__")
+    assert json_obj.key2.key2a == "value2a"
+    assert json_obj == JSON2Obj(input_dict)
+    assert JSON2Obj(input_dict) == json_obj
+    assert JSON2Obj.to_dict(json_obj) == input_dict
+
+
+def test_compact_2():
+    input_dict = dict(records=[dict(name="a", value=1), dict(name="b", value=2), ["x", dict(name="c", value=3)]])
+    json_string = (
+        '{"records": [{"name": "a", "value": 1}, {"name": "b", "value": 2}, ["x", {"name": "c", "value": 3}]]}'
+    )
+    json_obj = JSON2Obj.from_string(json_string, compact=True)
+    assert type(json_obj.records[0]) is type(json_obj.records[1]) is type(json_obj.records[2][1])
+    assert json_obj.records[0]._fields == ("name", "value")
+    assert json_obj == input_dict
+
+
+def test_compact_fallback_1():
+    input_dict = dict(get="value1", key2={"not-an-identifier": 1})
+    json_obj = JSON2Obj.from_dict(input_dict, compact=True)
+    assert isinstance(json_obj, JSON2Obj)
+    assert JSON2Obj.get(json_obj, "get") == "value1"
+    assert json_obj == input_dict
+
+
+def test_compact_lazy_1():
+    with pytest.raises(ValueError):
+        JSON2Obj.from_dict(dict(key1="value1"), lazy=True, compact=True)
+
+
+def test_compact_pickle_1():
+    input_dict = dict(key1="value1", records=[dict(name="a", value=1), dict(name="b", value=2)], key3=None)
+    json_obj = JSON2Obj.from_dict(input_dict, compact=True)
+    for obj in [pickle.loads(pickle.dumps(json_obj)), copy.copy(json_obj), copy.deepcopy(json_obj)]:
+        assert type(obj) is type(json_obj) and obj == input_dict
+        assert type(obj.records[1]) is type(json_obj.records[0])
+    assert pickle.loads(pickle.dumps(json_obj)).records is not json_obj.records
@@ -0,0 +1,96 @@
+#!/usr/bin/python3
+"""
+test_codegen.py
+"""
+import pickle
+import runpy
+import sys
+from pathlib import Path
+
+import pytest
+
+from json2obj import JSON2Obj
+from json2obj.compact import CompactObj
+from json2obj.ObjectifyConfig import codegen
+from json2obj.ObjectifyConfig.configurator import Configurator
+
+TEMPLATE = "tests/files/example_base_template.yaml"
+DEFAULT_CONFIG = "tests/files/example_config.yaml"
+USER_CONFIG = "tests/files/example_user_config.yaml"
+
+
+def test_codegen_1():
+    configurator = Configurator(TEMPLATE)
+    config = configurator.validate_user_config(USER_CONFIG, DEFAULT_CONFIG, typed=True)
+    assert type(config).__name__ == "Config" and isinstance(config, CompactObj)
+    assert type(config.parameters).__name__ == "ParametersSection"
+    assert config.parameters.username == "zpriddy"
+    assert config.parameters.server_addresses == ["10.10.10.1", "10.10.10.2"]
+    assert config.options.allow_guests is False
+    assert config.metadata is None
+    assert not hasattr(config.options, "__dict__")
+    assert JSON2Obj.to_dict(config) == dict(
+        JSON2Obj.to_dict(configurator.validate_user_config(USER_CONFIG, DEFAULT_CONFIG)), metadata=None
+    )
+    assert pickle.loads(pickle.dumps(config)) == config
+
+    # The class is generated once per template hash.
+    validator = configurator.compile(DEFAULT_CONFIG)
+    assert validator.config_class is type(config)
+    assert type(validator(USER_CONFIG, typed=True)) is type(config)
+
+
+def test_codegen_2():
+    code = Configurator(TEMPLATE).generate_code(DEFAULT_CONFIG)
+    assert code == Configurator(TEMPLATE).generate_code(DEFAULT_CONFIG)
+    assert "    username: str\n" in code
+    assert "    password: Optional[str]\n" in code
+    assert "    server_addresses: Optional[List[str]]\n" in code
+    assert "    metadata: Any\n" in code
+    assert "    #: username to use for connection\n" in code
+    compile(code, "generated", "exec")
+
+    template = dict(my_section=dict(type="variable"))
+    default_config = dict(my_section=dict(counts=dict(type="list.int", default=[1], typed_list=True)))
+    code = Configurator(template).generate_code(default_config, class_name="Settings")
+    assert "class MySectionSection(CompactObj):" in code and "class Settings(CompactObj):" in code
+    assert "    counts: Sequence[int]\n" in code
+
+    with pytest.raises(ValueError):
+        Configurator(template).generate_code(default_config, class_name="not a name")
+    with pytest.raises(ValueError):
+        Configurator(template).generate_code(dict(my_section={"bad-name": dict(type="int", default=1)}))
+
+
+def test_codegen_3(tmp_path, monkeypatch, capsys):
+    path = str(tmp_path / "config_types.py")
+    assert Configurator(TEMPLATE).write_code(path, DEFAULT_CONFIG)
+    assert not Configurator(TEMPLATE).write_code(path, DEFAULT_CONFIG)
+    module = runpy.run_path(path)
+    assert module["Config"].from_dict(dict(options=dict(allow_guests=True))).options.allow_guests is True
+
+    codegen.clear_code_cache()
+    assert codegen.main([TEMPLATE, DEFAULT_CONFIG, "--output", path]) == 0
+    assert capsys.readouterr().out == f"{path} is up to date\n"
+    assert codegen.main([TEMPLATE, DEFAULT_CONFIG, "--output", path, "--class-name", "Settings"]) == 0
+    assert capsys.readouterr().out == f"wrote {path}\n"
+    assert "class Settings(CompactObj):" in Path(path).read_text()
+
+    monkeypatch.setattr(sys, "argv", ["json2obj-codegen", TEMPLATE, DEFAULT_CONFIG])
+    assert codegen.main() == 0
+    assert capsys.readouterr().out == Configurator(TEMPLATE).generate_code(DEFAULT_CONFIG)
+
+
+def test_codegen_4(tmp_path, monkeypatch):
+    configurator = Configurator(TEMPLATE)
+    snapshot_dir = str(tmp_path / "snapshots")
+    cold = configurator.validate_user_config(USER_CONFIG, DEFAULT_CONFIG, snapshot_dir=snapshot_dir, typed=True)
+
+    # Warm typed snapshot loads reuse the generated class without compiling the default config again.
+    def compile_default_config(default_config):
+        raise AssertionError("the default config was compiled again")
+
+    monkeypatch.setattr(configurator, "compile", compile_default_config)
+    warm = configurator.validate_user_config(USER_CONFIG, DEFAULT_CONFIG, snapshot_dir=snapshot_dir, typed=True)
+    assert type(warm) is type(cold) and warm == cold
+    assert warm.parameters.username == "zpriddy"
@@ -0,0 +1,58 @@
+#!/usr/bin/python3
+"""
+test_compiled_validator.py
+"""
+import pytest
+
+from json2obj import JSON2Obj
+from json2obj.ObjectifyConfig.configurator import Configurator
+
+TEMPLATE = "tests/files/example_base_template.yaml"
+DEFAULT_CONFIG = "tests/files/example_config.yaml"
+USER_CONFIG = "tests/files/example_user_config.yaml"
+
+
+def test_compiled_validator_1():
+    configurator = Configurator(TEMPLATE)
+    validator = configurator.compile(DEFAULT_CONFIG)
+    test_config = validator(USER_CONFIG)
+    assert test_config == configurator.validate_user_config(USER_CONFIG, DEFAULT_CONFIG)
+    assert test_config.parameters.username == "zpriddy"
+    assert test_config.options.allow_guests is False
+
+
+def _result(validate, user_config):
+    try:
+        return JSON2Obj.to_dict(validate(JSON2Obj.to_dict(JSON2Obj(user_config))))
+    except (KeyError, TypeError, ValueError) as e:
+        return type(e)
+
+
+def test_compiled_validator_2():
+    configurator = Configurator(TEMPLATE)
+    validator = configurator.compile(DEFAULT_CONFIG)
+    user_configs = [
+        dict(),
+        dict(options=dict(allow_guests="yes")),
+        dict(parameters=dict(username="user"), options=dict()),
+        dict(parameters=dict(username="user", password="pass", server_addresses=[1]), options=dict(allow_guests=1)),
+    ]
+    for user_config in user_configs:
+        for add_missing, ignore_required in [(True, False), (True, True), (False, False), (False, True)]:
+            expected = _result(
+                lambda c: configurator.validate_user_config(c, DEFAULT_CONFIG, add_missing, ignore_required),
+                user_config,
+            )
+            compiled = _result(lambda c: validator(c, add_missing, ignore_required), user_config)
+            assert compiled == expected
+
+
+def test_compiled_validator_3():
+    validator = Configurator(TEMPLATE).compile(DEFAULT_CONFIG)
+    with pytest.raises(KeyError):
+        validator(dict(options=dict()))
+    with pytest.raises(TypeError):
+        validator(["not", "a", "dict"])
+    test_config = validator(dict(parameters=dict(server_addresses=["10.0.0.1"]), options=dict(allow_guests="y")))
+    assert test_config.parameters.username == "admin"
+    assert test_config.options.start_on_login is True
@@ -0,0 +1,92 @@
+#!/usr/bin/python3
+"""
+test_snapshot.py
+"""
+import json
+import shutil
+
+from json2obj import JSON2Obj
+from json2obj.ObjectifyConfig import snapshot
+from json2obj.ObjectifyConfig.configurator import Configurator
+
+TEMPLATE = dict(metadata=dict(type="custom", fields=dict()), options=dict(type="variable"))
+DEFAULT_CONFIG = dict(
+    metadata=dict(name="test"),
+    options=dict(
+        password=dict(type="string", default_none_okay=True),
+        port=dict(type="int", default_none_okay=True),
+        ports=dict(type="list.int", typed_list=True, default_none_okay=True),
+        user=dict(type="string", default="admin"),
+    ),
+)
+
+
+def _write_user_config(path, user_config):
+    path.write_text(json.dumps(user_config))
+    return str(path)
+
+
+def test_snapshot_1(tmp_path, monkeypatch):
+    monkeypatch.setenv("SNAPSHOT_PASSWORD", "secret-password")
+    monkeypatch.setenv("SNAPSHOT_PORT", "8080")
+    user_config = dict(
+        metadata=dict(token=dict(env_var="SNAPSHOT_PASSWORD")),
+        options=dict(
+            password=dict(env_var="SNAPSHOT_PASSWORD"),
+            port=dict(env_var="SNAPSHOT_PORT"),
+            ports=[1, dict(env_var="SNAPSHOT_PORT")],
+        ),
+    )
+    user_path = _write_user_config(tmp_path / "user.json", user_config)
+    snapshot_dir = tmp_path / "snapshots"
+    configurator = Configurator(TEMPLATE)
+
+    expected = configurator.validate_user_config(user_path, DEFAULT_CONFIG)
+    cold = configurator.validate_user_config(user_path, DEFAULT_CONFIG, snapshot_dir=str(snapshot_dir))
+    assert cold == expected
+    snapshots = list(snapshot_dir.glob("*.snapshot"))
+    assert len(snapshots) == 1
+    assert b"secret-password" not in snapshots[0].read_bytes()
+    assert b"8080" not in snapshots[0].read_bytes()
+
+    monkeypatch.setenv("SNAPSHOT_PASSWORD", "new-password")
+    warm = configurator.validate_user_config(user_path, DEFAULT_CONFIG, snapshot_dir=str(snapshot_dir))
+    assert warm.options.password == "new-password"
+    assert warm.metadata.token == "new-password"
+    assert warm.options.port == 8080
+    assert warm.options.ports.tolist() == [1, 8080]
+    assert warm.options.user == "admin"
+    assert JSON2Obj.to_dict(warm.options) == dict(password="new-password", port=8080, ports=[1, 8080], user="admin")
+
+
+def test_snapshot_2(tmp_path):
+    configurator = Configurator(TEMPLATE)
+    snapshot_dir = tmp_path / "snapshots"
+    user_path = _write_user_config(tmp_path / "user.json", dict(options=dict(port="1")))
+
+    def validate():
+        return configurator.validate_user_config(user_path, DEFAULT_CONFIG, snapshot_dir=str(snapshot_dir))
+
+    assert validate().options.port == 1
+
+    # A changed user config gets a new snapshot.
+    _write_user_config(tmp_path / "user.json", dict(options=dict(port="2")))
+    assert validate().options.port == 2
+    assert len(list(snapshot_dir.glob("*.snapshot"))) == 2
+
+    # An unreadable snapshot is ignored.
+    for path in snapshot_dir.glob("*.snapshot"):
+        path.write_bytes(b"not a snapshot")
+    assert validate().options.port == 2
+
+    snapshot.SnapshotCache(snapshot_dir).clear()
+    assert not list(snapshot_dir.glob("*.snapshot"))
+
+
+def test_snapshot_3(tmp_path):
+    shutil.copy("tests/files/example_user_config.yaml", tmp_path / "user.yaml")
+    configurator = Configurator("tests/files/example_base_template.yaml")
+    args = (str(tmp_path / "user.yaml"), "tests/files/example_config.yaml")
+    expected = configurator.validate_user_config(*args)
+    assert configurator.validate_user_config(*args, snapshot_dir=str(tmp_path)) == expected
+    assert configurator.validate_user_config(*args, snapshot_dir=str(tmp_path)) == expected
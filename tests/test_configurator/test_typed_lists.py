@@ -0,0 +1,88 @@
+#!/usr/bin/python3
+"""
+test_typed_lists.py
+"""
+import copy
+import json
+import pickle
+from array import array
+
+import pytest
+
+from json2obj import JSON2Obj
+from json2obj.files import write_object_to_file
+from json2obj.ObjectifyConfig.config_class import BoolArray, ConfigTypes, ConfigVariable, check_value
+from json2obj.ObjectifyConfig.configurator import Configurator
+
+TEMPLATE = dict(metadata=dict(type="custom", fields=dict()), limits=dict(type="variable"))
+DEFAULT_CONFIG = dict(
+    metadata=dict(),
+    limits=dict(
+        thresholds=dict(type="list.int", typed_list=True, required=True),
+        weights=dict(type="list.float", typed_list="array", default=[0.5, 0.5]),
+        flags=dict(type="list.bool", typed_list=True, default_none_okay=True),
+        names=dict(type="list.string", typed_list=True, default_none_okay=True),
+    ),
+)
+
+
+def test_check_value_bool_list_1():
+    assert check_value(["yes", False, "n", True], ConfigTypes.bool_list) == [True, False, False, True]
+    with pytest.raises(TypeError):
+        check_value(["maybe"], ConfigTypes.bool_list)
+
+
+def test_typed_list_1():
+    thresholds = ConfigVariable(name="thresholds", type="list.int", typed_list=True)
+    value = thresholds.check_value([1, "2", 3.0, True])
+    assert isinstance(value, array) and value.typecode == "q"
+    assert value.tolist() == [1, 2, 3, 1]
+    with pytest.raises(ValueError):
+        thresholds.check_value([2 ** 70])
+    with pytest.raises(TypeError):
+        thresholds.check_value("1,2,3")
+    assert thresholds.to_dict()["typed_list"] == "array"
+
+    weights = ConfigVariable(name="weights", type="list.float", typed_list="array")
+    assert weights.check_value([1, "0.5"]).tolist() == [1.0, 0.5]
+
+    flags = ConfigVariable(name="flags", type="list.bool", typed_list=True)
+    value = flags.check_value(["yes", False])
+    assert isinstance(value, BoolArray)
+    assert value[0] is True and list(value) == [True, False]
+    assert value.tolist() == [True, False]
+    assert value == [True, False]
+
+    names = ConfigVariable(name="names", type="list.string", typed_list=True)
+    assert names.check_value([1, "a"]) == ["1", "a"]
+
+
+def test_typed_list_2(tmp_path):
+    configurator = Configurator(TEMPLATE)
+    user_config = dict(limits=dict(thresholds=[10, 20, 30], weights=[1], flags=["y", "n"], names=["a"]))
+    validator = configurator.compile(DEFAULT_CONFIG)
+    config = validator(user_config, add_missing=False)
+    assert isinstance(config.limits.thresholds, array)
+    assert config.limits.thresholds[1] == 20
+    assert isinstance(config.limits.flags, BoolArray)
+
+    output = JSON2Obj.to_dict(config)
+    assert output["limits"]["thresholds"] == [10, 20, 30]
+    assert output["limits"]["weights"] == [1.0]
+    assert output["limits"]["flags"] == [True, False]
+    assert type(output["limits"]["thresholds"]) is list
+    assert config == output
+
+    path = tmp_path / "config.json"
+    write_object_to_file(config, str(path), rebase=False)
+    assert json.loads(path.read_text())["limits"]["flags"] == [True, False]
+
+
+def test_typed_list_3():
+    flags = BoolArray([True, False, True])
+    for flags_copy in [copy.copy(flags), copy.deepcopy(flags), pickle.loads(pickle.dumps(flags))]:
+        assert type(flags_copy) is BoolArray and flags_copy is not flags
+        assert flags_copy == flags and flags_copy[0] is True
+        flags_copy[1] = True
+        assert flags[1] is False
+    assert type(copy.deepcopy(dict(flags=flags))["flags"]) is BoolArray
@@ -0,0 +1,55 @@
+#!/usr/bin/python3
+"""
+test_validate_many.py
+"""
+import json
+import shutil
+
+import pytest
+
+from json2obj.ObjectifyConfig.configurator import Configurator
+
+TEMPLATE = "tests/files/example_base_template.yaml"
+DEFAULT_CONFIG = "tests/files/example_config.yaml"
+USER_CONFIG = "tests/files/example_user_config.yaml"
+
+
+@pytest.fixture
+def user_config_files(tmp_path):
+    paths = list()
+    for i in range(4):
+        path = tmp_path / f"user_{i}.yaml"
+        shutil.copy(USER_CONFIG, path)
+        paths.append(str(path))
+    json_path = tmp_path / "user.json"
+    json_path.write_text(json.dumps(dict(parameters=dict(username="json_user"), options=dict(allow_guests=True))))
+    paths.append(str(json_path))
+    missing_section = tmp_path / "missing_section.json"
+    missing_section.write_text(json.dumps(dict(options=dict())))
+    paths.append(str(missing_section))
+    paths.append(str(tmp_path / "does_not_exist.yaml"))
+    return paths
+
+
+@pytest.mark.parametrize("executor,workers", [("process", 2), ("thread", 2), ("thread", 1)])
+def test_validate_many_1(user_config_files, executor, workers):
+    configurator = Configurator(TEMPLATE)
+    report = configurator.validate_many(user_config_files, DEFAULT_CONFIG, workers=workers, executor=executor)
+    assert len(report) == len(user_config_files)
+    assert [result.path for result in report] == user_config_files
+    assert not report.ok
+    assert len(report.passed) == 5
+    assert [result.error_type for result in report.failed] == ["KeyError", "FileNotFoundError"]
+
+    expected = configurator.validate_user_config(USER_CONFIG, DEFAULT_CONFIG)
+    assert report.results[0].config == expected
+    assert report.configs[user_config_files[4]].parameters.username == "json_user"
+    assert report.to_dict()["passed"] == 5
+    assert report.to_dict()["failed"][1]["path"] == user_config_files[-1]
+
+
+def test_validate_many_2():
+    configurator = Configurator(TEMPLATE)
+    with pytest.raises(ValueError):
+        configurator.validate_many([USER_CONFIG], DEFAULT_CONFIG, executor="fiber")
+    assert len(configurator.validate_many([], DEFAULT_CONFIG)) == 0
@@ -0,0 +1,52 @@
+#!/usr/bin/python3
+"""
+test_defer_env_vars.py
+"""
+from os import environ
+
+import pytest
+
+from json2obj.json2obj import JSON2Obj
+from json2obj.json_file import JsonFile
+
+
+def test_defer_env_vars_1():
+    environ["my_defer_var"] = "3"
+    input_dict = dict(
+        key1=dict(env_var="my_defer_var"),
+        key2=dict(key2a=dict(env_var="my_defer_missing_var"), key2b="value2b"),
+        key3=["value3", dict(env_var="my_defer_var")],
+    )
+    json_obj = JSON2Obj(input_dict, defer_env_vars=True)
+    assert json_obj.key2.key2b == "value2b"
+    assert "key1" not in json_obj.__dict__
+    assert json_obj.key1 == "3"
+    assert json_obj.key3 == ["value3", "3"]
+    with pytest.raises(KeyError):
+        json_obj.key2.key2a
+
+
+def test_defer_env_vars_to_dict_1():
+    environ["my_defer_var"] = "3"
+    input_dict = dict(key1=dict(env_var="my_defer_var"), key2=dict(key2a=dict(env_var="my_defer_var")), key3=[1])
+    json_obj = JSON2Obj(input_dict, defer_env_vars=True)
+    assert JSON2Obj.to_dict(json_obj, resolve_env_vars=False) == input_dict
+    assert JSON2Obj.to_dict(json_obj) == dict(key1="3", key2=dict(key2a="3"), key3=[1])
+    assert JSON2Obj.to_dict(json_obj, resolve_env_vars=False) == input_dict
+
+
+def test_defer_env_vars_lazy_1():
+    environ["my_defer_var"] = "3"
+    input_dict = dict(key1=dict(env_var="my_defer_var"), key2=dict(key2a="value2a"))
+    json_obj = JSON2Obj(input_dict, lazy=True)
+    assert json_obj.key1 == "3"
+    assert JSON2Obj.to_dict(json_obj, resolve_env_vars=False) == input_dict
+
+
+def test_defer_env_vars_file_1(tmp_path):
+    file_path = tmp_path / "config.json"
+    file_path.write_text('{"key1": {"env_var": "my_defer_missing_var"}, "key2": "value2"}')
+    json_obj = JsonFile(str(file_path)).load(defer_env_vars=True)
+    assert json_obj.key2 == "value2"
+    with pytest.raises(KeyError):
+        json_obj.key1
@@ -0,0 +1,118 @@
+#!/usr/bin/python3
+"""
+test_diff.py
+"""
+import copy
+
+import pytest
+
+from json2obj import JSON2Obj
+from json2obj.diff import digest, format_pointer, parse_pointer
+
+INPUT_DICT = dict(
+    key1="value1",
+    key2=dict(key2a=[1, 2, dict(key2b=None)], key2c=True),
+    routes=[dict(name=f"route_{i}", port=8000 + i) for i in range(5)],
+)
+
+
+def _changed(**changes) -> dict:
+    data = copy.deepcopy(INPUT_DICT)
+    data.update(changes)
+    return data
+
+
+def test_diff_1():
+    new_dict = _changed(key1="value2", key3=dict(key3a=1), routes=INPUT_DICT["routes"][:3])
+    new_dict["key2"]["key2a"][2]["key2b"] = 1
+    del new_dict["key2"]["key2c"]
+    changes = JSON2Obj.diff(JSON2Obj(INPUT_DICT), JSON2Obj(new_dict))
+    assert changes == [
+        dict(op="add", path="/key3", value=dict(key3a=1)),
+        dict(op="replace", path="/key1", value="value2"),
+        dict(op="remove", path="/key2/key2c"),
+        dict(op="replace", path="/key2/key2a/2/key2b", value=1),
+        dict(op="remove", path="/routes/4"),
+        dict(op="remove", path="/routes/3"),
+    ]
+
+    obj = JSON2Obj(INPUT_DICT)
+    JSON2Obj.apply_patch(obj, changes)
+    assert obj == JSON2Obj(new_dict)
+    assert isinstance(obj.key3, JSON2Obj) and obj.key3.key3a == 1
+    assert JSON2Obj.diff(JSON2Obj(INPUT_DICT), JSON2Obj(INPUT_DICT)) == []
+
+
+def test_diff_2():
+    # Bools are not the same as the numbers they equal in python, and added list items are appended.
+    new_dict = _changed(routes=INPUT_DICT["routes"] + [dict(name="route_5", port=8005)])
+    new_dict["key2"]["key2a"][0] = True
+    changes = JSON2Obj.diff(JSON2Obj(INPUT_DICT), JSON2Obj(new_dict))
+    assert changes == [
+        dict(op="replace", path="/key2/key2a/0", value=True),
+        dict(op="add", path="/routes/5", value=dict(name="route_5", port=8005)),
+    ]
+    obj = JSON2Obj(INPUT_DICT, lazy=True)
+    JSON2Obj.apply_patch(obj, changes)
+    assert JSON2Obj.to_dict(obj) == new_dict
+    assert JSON2Obj(INPUT_DICT) != obj
+
+
+def test_diff_3():
+    old = JSON2Obj.from_dict(INPUT_DICT, frozen=True)
+    new = JSON2Obj.from_dict(_changed(key1="value2"), frozen=True)
+    assert JSON2Obj.diff(old, new) == [dict(op="replace", path="/key1", value="value2")]
+    # Subtrees with the same content have the same digest and are skipped.
+    assert digest(old.key2) == digest(new.key2) and old.key2 is not new.key2
+    assert digest(old) != digest(new)
+    assert digest(JSON2Obj.from_dict(dict(a=1), frozen=True)) != digest(JSON2Obj.from_dict(dict(a=True), frozen=True))
+    assert digest(JSON2Obj(INPUT_DICT)) is None
+    assert JSON2Obj.to_dict(new) == _changed(key1="value2")
+
+
+def test_diff_4():
+    obj = JSON2Obj(INPUT_DICT)
+    JSON2Obj.apply_patch(
+        obj,
+        [
+            dict(op="add", path="/routes/0", value=dict(name="first")),
+            dict(op="add", path="/routes/-", value=dict(name="last")),
+            dict(op="replace", path="/key2/key2a", value=[[1]]),
+            dict(op="add", path="/a~1b~0c", value="escaped"),
+        ],
+    )
+    assert obj.routes[0].name == "first" and obj.routes[-1].name == "last" and len(obj.routes) == 7
+    assert obj.key2.key2a == [[1]]
+    assert getattr(obj, "a/b~c") == "escaped"
+    assert format_pointer(("a/b~c", 0)) == "/a~1b~0c/0"
+    assert parse_pointer("/a~1b~0c/0") == ("a/b~c", "0")
+
+    with pytest.raises(KeyError):
+        JSON2Obj.apply_patch(obj, [dict(op="remove", path="/missing")])
+    with pytest.raises(KeyError):
+        JSON2Obj.apply_patch(obj, [dict(op="replace", path="/routes/10/name", value=1)])
+    with pytest.raises(ValueError):
+        JSON2Obj.apply_patch(obj, [dict(op="move", path="/key1", value=1)])
+    with pytest.raises(ValueError):
+        JSON2Obj.apply_patch(obj, [dict(op="remove", path="/routes/01")])
+    with pytest.raises(TypeError):
+        JSON2Obj.apply_patch(JSON2Obj.freeze(obj), [dict(op="replace", path="/key1", value=1)])
+    with pytest.raises(TypeError):
+        JSON2Obj.apply_patch(JSON2Obj.freeze(obj), [dict(op="remove", path="/key1")])
+
+
+def _nested(depth: int, leaf: dict) -> dict:
+    data = dict()
+    node = data
+    for _ in range(depth):
+        node["child"] = dict()
+        node = node["child"]
+    node.update(leaf)
+    return data
+
+
+def test_diff_5():
+    # Deeply nested input does not hit the recursion limit.
+    old = JSON2Obj.from_dict(_nested(5000, dict()), frozen=True)
+    new = JSON2Obj.from_dict(_nested(5000, dict(leaf=1)), frozen=True)
+    assert JSON2Obj.diff(old, new) == [dict(op="add", path="/child" * 5000 + "/leaf", value=1)]
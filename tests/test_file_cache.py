@@ -0,0 +1,98 @@
+#!/usr/bin/python3
+"""
+test_file_cache.py
+"""
+import os
+
+from json2obj import JSON2Obj
+from json2obj.file_cache import FileCache, copy_tree, file_cache
+from json2obj.files import read_raw_file
+from json2obj.json_file import JsonFile
+from json2obj.yaml_file import YamlFile
+
+
+def test_file_cache_1(tmp_path):
+    file_path = tmp_path / "config.json"
+    file_path.write_text('{"key1": {"key1a": [1, 2]}}')
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return JsonFile(str(file_path), cache=False).read_file()
+
+    cache = FileCache()
+    first = cache.read(str(file_path), "json", loader)
+    first["key1"]["key1a"].append(3)
+    second = cache.read(str(file_path), "json", loader)
+    assert second == {"key1": {"key1a": [1, 2]}}
+    assert len(calls) == 1
+    assert cache.hits == 1
+
+
+def test_file_cache_changed_file_1(tmp_path):
+    file_path = tmp_path / "config.json"
+    file_path.write_text('{"key1": 1}')
+    assert JsonFile(str(file_path)).read_file() == {"key1": 1}
+    file_path.write_text('{"key1": 22}')
+    os.utime(file_path, ns=(0, 0))
+    assert JsonFile(str(file_path)).read_file() == {"key1": 22}
+
+
+def test_file_cache_lru_1(tmp_path):
+    cache = FileCache(max_size=2)
+    for name in ["a", "b", "c"]:
+        file_path = tmp_path / f"{name}.json"
+        file_path.write_text("{}")
+        cache.read(str(file_path), "json", lambda: {})
+    assert len(cache) == 2
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_file_cache_yaml_1():
+    file_cache.clear()
+    first = read_raw_file("tests/files/test_1.yaml")
+    first["section_1"]["item_1"] = 100
+    assert YamlFile("tests/files/test_1.yaml").read_file()["section_1"]["item_1"] == 1
+    assert file_cache.hits == 1
+
+
+def test_file_cache_copy_1(tmp_path):
+    file_path = tmp_path / "config.json"
+    file_path.write_text('{"key1": {"key1a": [1, 2]}}')
+    cache = FileCache()
+    first = cache.read(str(file_path), "json", lambda: JsonFile(str(file_path), cache=False).read_file(), copy=False)
+    assert cache.read(str(file_path), "json", lambda: {}, copy=False) is first
+    assert cache.read(str(file_path), "json", lambda: {}) == first
+    assert cache.read(str(file_path), "json", lambda: {}) is not first
+
+    # Loads use the cached data without copying it, and changing the loaded objects does not change it.
+    file_cache.clear()
+    for kwargs in [dict(), dict(frozen=True), dict(lazy=True), dict(defer_env_vars=True)]:
+        obj = JsonFile(str(file_path)).load(**kwargs)
+        if not kwargs.get("frozen"):
+            obj.key1.key1a.append(3)
+        JSON2Obj.to_dict(obj, resolve_env_vars=False)["key1"]["key1a"].append(4)
+        assert JsonFile(str(file_path)).load() == {"key1": {"key1a": [1, 2]}}
+    assert file_cache.misses == 1 and file_cache.hits == 7
+
+    # Copies of cached JSON cost about as much as parsing it, so read_file parses the file.
+    assert JsonFile(str(file_path)).read_file() == {"key1": {"key1a": [1, 2]}}
+    assert file_cache.hits == 7
+
+
+def test_file_cache_copy_2():
+    data = list()
+    node = data
+    for _ in range(5000):
+        node.append(dict(items=[]))
+        node = node[-1]["items"]
+    node_copy = copy_tree(data)
+    node = data
+    depth = 0
+    while node:
+        assert node_copy is not node and len(node_copy) == 1 and node_copy[0] is not node[0]
+        node = node[0]["items"]
+        node_copy = node_copy[0]["items"]
+        depth += 1
+    assert depth == 5000 and node_copy == []
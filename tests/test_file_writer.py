@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+"""
+test_file_writer.py
+"""
+import os
+
+import pytest
+
+from json2obj import JsonFile, YamlFile
+from json2obj.file_writer import write_if_changed
+
+
+def test_file_writer_1(tmp_path):
+    path = tmp_path / "test.txt"
+    assert write_if_changed(str(path), lambda file: file.write("value"))
+    assert path.read_text() == "value"
+    os.utime(path, ns=(0, 0))
+    assert not write_if_changed(str(path), lambda file: file.write("value"))
+    assert path.stat().st_mtime_ns == 0
+    assert write_if_changed(str(path), lambda file: file.write("value 2"))
+    assert path.read_text() == "value 2"
+    assert os.listdir(tmp_path) == ["test.txt"]
+
+
+def test_file_writer_2(tmp_path):
+    # A failed write leaves the old file in place and no temp file behind.
+    path = tmp_path / "test.txt"
+    path.write_text("value")
+
+    def dump(file):
+        file.write("partial")
+        raise ValueError("failed")
+
+    with pytest.raises(ValueError):
+        write_if_changed(str(path), dump)
+    assert path.read_text() == "value"
+    assert os.listdir(tmp_path) == ["test.txt"]
+
+
+def test_file_writer_3(tmp_path):
+    path = tmp_path / "test.txt"
+    path.write_text("value")
+    os.chmod(path, 0o640)
+    write_if_changed(str(path), lambda file: file.write("value 2"))
+    assert path.stat().st_mode & 0o777 == 0o640
+
+    # A new file gets the mode open() would give it, and not the 0600 of the temp file.
+    umask = os.umask(0)
+    os.umask(umask)
+    path = tmp_path / "new.txt"
+    write_if_changed(str(path), lambda file: file.write("value"))
+    assert path.stat().st_mode & 0o777 == 0o666 & ~umask
+
+
+@pytest.mark.parametrize("file_class, name", [(JsonFile, "test.json"), (YamlFile, "test.yaml")])
+def test_file_writer_4(tmp_path, capsys, file_class, name):
+    path = tmp_path / name
+    assert file_class(str(path)).write_file(dict(key_1="value_1"), rebase=False)
+    assert not file_class(str(path)).write_file(dict(key_1="value_1"), rebase=True)
+    assert capsys.readouterr().out == ""
+
+    # An original that was already parsed is used instead of reading the file again.
+    file = file_class(str(path))
+    original = file.read_file()
+    file.read_file = None
+    assert file.write_file(dict(key_2="value_2"), rebase=True, original=original)
+    assert file_class(str(path)).read_file() == dict(key_1="value_1", key_2="value_2")
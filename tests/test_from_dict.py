@@ -33,3 +33,40 @@ def test_from_dict_5():
     input_dict = dict(get="value1", key2=["value2", ["value2a", "value2b"]], key3="value3")
     json_obj = JSON2Obj(input_dict)
     assert JSON2Obj.get(json_obj, "get") == "value1"
+
+
+def test_from_dict_6():
+    input_dict = dict(key1=[dict(key1a="value1a"), [dict(key1b=["value1b", dict(key1c=1)])]], key2=[])
+    json_obj = JSON2Obj(input_dict)
+    assert json_obj.key1[0].key1a == "value1a"
+    assert json_obj.key1[1][0].key1b[1].key1c == 1
+    output_dict = JSON2Obj.to_dict(json_obj)
+    assert output_dict == input_dict
+    assert type(output_dict["key1"][1][0]) is dict
+    assert JSON2Obj(output_dict) == json_obj
+
+
+class _LabeledObj(JSON2Obj):
+    def __init__(self, json_data: dict):
+        self.label = "L"
+        super().__init__(json_data)
+
+
+def test_from_dict_7():
+    # Fields set before JSON2Obj.__init__ by a subclass are kept.
+    json_obj = _LabeledObj(dict(a=1, b=2))
+    assert JSON2Obj.to_dict(json_obj) == dict(label="L", a=1, b=2)
+    assert json_obj == dict(label="L", a=1, b=2)
+    assert repr(json_obj) == "{'label': 'L', 'a': 1, 'b': 2}"
+
+
+def test_from_dict_deep_1():
+    input_dict = dict(leaf="value")
+    for i in range(10000):
+        input_dict = dict(node=input_dict, items=[i, dict(item=i)])
+    json_obj = JSON2Obj(input_dict)
+    assert json_obj.node.node.items[1].item == 9997
+    output_dict = JSON2Obj.to_dict(json_obj)
+    for i in range(10000):
+        output_dict = output_dict["node"]
+    assert output_dict == dict(leaf="value")
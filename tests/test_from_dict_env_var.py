@@ -3,6 +3,7 @@
 test_from_dict_env_var.py	
 """
 
+from json2obj import env_vars
 from json2obj.json2obj import JSON2Obj
 from os import environ
 import pytest
@@ -21,3 +22,36 @@ def test_from_dict_env_var_2():
     input_dict = dict(key1=dict(env_var="my_vars"), key2=dict(key2a="value2a", key2b="value2b"), key3="value3")
     with pytest.raises(KeyError):
         json_obj = JSON2Obj(input_dict)
+
+
+def test_from_dict_env_var_3():
+    environ["my_var"] = "3"
+    input_dict = dict(key1=[dict(key1a=dict(env_var="my_var")), [dict(env_var="my_var")]], key2=dict(key2a="value2a"))
+    json_obj = JSON2Obj(input_dict)
+    assert json_obj.key1[0].key1a == "3"
+    assert json_obj.key1[1] == ["3"]
+    assert input_dict["key1"][0]["key1a"] == dict(env_var="my_var")
+
+
+def test_from_dict_env_var_4():
+    calls = []
+
+    def env_var_function(value):
+        calls.append(value)
+        return value.upper() if isinstance(value, str) else value
+
+    input_dict = dict(key1="value1", key2=dict(key2a="value2a", key2b=["value2b"]))
+    json_obj = JSON2Obj(input_dict, env_var_function=env_var_function)
+    assert json_obj.key1 == "VALUE1"
+    assert json_obj.key2.key2a == "VALUE2A"
+    assert json_obj.key2.key2b == ["VALUE2B"]
+    assert len(calls) == 5
+
+
+def test_from_dict_env_var_plan_1():
+    input_dict = dict(key1=dict(key1a=[1, dict(env_var="my_var")]), key2=dict(enc_env_var="my_enc_var"), key3="value3")
+    references = env_vars.find_env_var_references(input_dict)
+    assert sorted(path for path, _ in references) == [("key1", "key1a", 1), ("key2",)]
+    plan = env_vars.build_env_var_plan(references)
+    assert plan == {"key1": {"key1a": {1: env_vars.RESOLVE}}, "key2": env_vars.RESOLVE}
+    assert env_vars.get_env_var_plan(dict(key1=dict(key1a=[1, 2]))) == {}
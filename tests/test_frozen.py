@@ -0,0 +1,118 @@
+#!/usr/bin/python3
+"""
+test_frozen.py
+"""
+import copy
+import pickle
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import pytest
+
+from json2obj import JSON2Obj, JsonFile
+from json2obj.diff import digest
+from json2obj.frozen import FrozenObj
+
+INPUT_DICT = dict(key1="value1", key2=dict(key2a=[1, 2, dict(key2b=None)]), key3=[[1.5, True]])
+
+
+def test_frozen_1():
+    frozen = JSON2Obj.freeze(JSON2Obj(INPUT_DICT))
+    assert isinstance(frozen, FrozenObj) and isinstance(frozen, JSON2Obj)
+    assert frozen.key2.key2a[2].key2b is None
+    assert frozen.key2.key2a == (1, 2, frozen.key2.key2a[2])
+    assert JSON2Obj.to_dict(frozen) == INPUT_DICT
+    assert frozen == JSON2Obj(INPUT_DICT)
+    assert repr(frozen) == repr(JSON2Obj(INPUT_DICT))
+    assert JSON2Obj.freeze(frozen) is frozen
+    assert copy.deepcopy(frozen) is frozen
+
+    with pytest.raises(TypeError):
+        frozen.key1 = "value2"
+    with pytest.raises(TypeError):
+        del frozen.key2.key2a
+    assert frozen.key1 == "value1"
+
+
+def test_frozen_2():
+    frozen_1 = JSON2Obj.from_dict(INPUT_DICT, frozen=True)
+    string = '{"key3": [[1.5, true]], "key2": {"key2a": [1, 2, {"key2b": null}]}, "key1": "value1"}'
+    frozen_2 = JSON2Obj.from_string(string, frozen=True)
+    assert frozen_1 == frozen_2 and hash(frozen_1) == hash(frozen_2)
+    assert frozen_1 != JSON2Obj.from_dict(dict(INPUT_DICT, key1="value2"), frozen=True)
+    assert {frozen_1: "value"}[frozen_2] == "value"
+
+    @lru_cache()
+    def cached(config):
+        return config.key1
+
+    assert cached(frozen_1) == cached(frozen_2) == "value1"
+    assert cached.cache_info().hits == 1
+
+    unpickled = pickle.loads(pickle.dumps(frozen_1))
+    assert unpickled == frozen_1 and hash(unpickled) == hash(frozen_1)
+
+
+def test_frozen_3(tmp_path):
+    path = tmp_path / "test.json"
+    JsonFile(str(path)).write_file(dict(INPUT_DICT), rebase=False)
+    frozen = JsonFile(str(path)).load(frozen=True)
+    assert frozen == JSON2Obj.freeze(JSON2Obj(INPUT_DICT))
+    with pytest.raises(ValueError):
+        JSON2Obj.from_dict(INPUT_DICT, lazy=True, frozen=True)
+
+    # Compact, lazy and array values are frozen too.
+    assert JSON2Obj.freeze(JSON2Obj.from_dict(INPUT_DICT, compact=True)) == frozen
+    assert JSON2Obj.freeze(JSON2Obj(INPUT_DICT, lazy=True)) == frozen
+    with_array = JSON2Obj(dict(values=[]))
+    with_array.values = array("q", [1, 2])
+    assert JSON2Obj.freeze(with_array).values == (1, 2)
+
+
+def test_frozen_4():
+    frozen = JSON2Obj.from_dict(dict(records=[dict(id=i, tags=[i]) for i in range(1000)]), frozen=True)
+    expected = (JSON2Obj.to_dict(frozen), hash(frozen), repr(JSON2Obj(JSON2Obj.to_dict(frozen))))
+
+    def read(_):
+        return JSON2Obj.to_dict(frozen), hash(frozen), repr(frozen)
+
+    # Readers in many threads share the tree without copying it.
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        assert all(result == expected for result in pool.map(read, range(20)))
+
+
+def test_frozen_5():
+    # Deeply nested input does not hit the recursion limit.
+    input_dict = dict()
+    node = input_dict
+    for _ in range(5000):
+        node["child"] = dict()
+        node = node["child"]
+    frozen = JSON2Obj.from_dict(input_dict, frozen=True)
+    assert hash(frozen) == hash(JSON2Obj.from_dict(input_dict, frozen=True))
+
+
+def test_frozen_6(monkeypatch):
+    # FrozenObj can be built directly, the same as freezing a JSON2Obj.
+    monkeypatch.setenv("FROZEN_PASSWORD", "secret")
+    input_dict = dict(INPUT_DICT, password=dict(env_var="FROZEN_PASSWORD"))
+    frozen_obj = FrozenObj(input_dict)
+    assert frozen_obj == JSON2Obj.from_dict(input_dict, frozen=True)
+    assert hash(frozen_obj) == hash(JSON2Obj.from_dict(input_dict, frozen=True))
+    assert frozen_obj.password == "secret"
+    assert FrozenObj.from_string('{"key1": [1, 2]}').key1 == (1, 2)
+    assert FrozenObj() == dict()
+    with pytest.raises(TypeError):
+        frozen_obj.key1 = "value2"
+    with pytest.raises(ValueError):
+        FrozenObj(input_dict, lazy=True)
+
+
+def test_frozen_7():
+    # The cached hash, repr and digest are private state, so they are never output as fields.
+    frozen_obj = JSON2Obj.from_dict(INPUT_DICT, frozen=True)
+    repr(frozen_obj)
+    digest(frozen_obj)
+    assert JSON2Obj.to_dict(frozen_obj) == INPUT_DICT
+    assert frozen_obj == INPUT_DICT
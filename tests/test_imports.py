@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+"""
+test_imports.py
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import json2obj
+
+# import json2obj loads about 70 modules of its own and the stdlib. Importing ruamel.yaml at import time adds over 40.
+MODULE_BUDGET = 90
+# Seconds. Much more than the import takes so a slow machine does not fail it, but less than importing the YAML libs.
+TIME_BUDGET = 0.5
+LAZY_MODULES = ["ruamel", "yaml", "boto3", "botocore", "concurrent.futures", "numpy", "orjson"]
+
+IMPORT_SCRIPT = """
+import json, sys, time
+before = set(sys.modules)
+start = time.perf_counter()
+import {module}
+duration = time.perf_counter() - start
+print(json.dumps(dict(duration=duration, modules=sorted(set(sys.modules) - before))))
+"""
+
+
+def _import(module: str, setup: str = "") -> dict:
+    env = dict(os.environ)
+    src_path = str(Path(json2obj.__file__).parent.parent)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in [src_path, env.get("PYTHONPATH")] if p)
+    script = setup + IMPORT_SCRIPT.format(module=module)
+    output = subprocess.run([sys.executable, "-c", script], env=env, check=True, capture_output=True, text=True)
+    return json.loads(output.stdout)
+
+
+def _lazy_modules_loaded(modules: list) -> list:
+    return [m for m in modules if any(m == lazy or m.startswith(f"{lazy}.") for lazy in LAZY_MODULES)]
+
+
+def test_imports_1():
+    result = _import("json2obj")
+    assert _lazy_modules_loaded(result["modules"]) == []
+    # tempfile imports shutil, random and the compression modules, and is only needed to write files.
+    assert "tempfile" not in result["modules"]
+    assert len(result["modules"]) <= MODULE_BUDGET, result["modules"]
+    assert result["duration"] <= TIME_BUDGET
+
+
+def test_imports_2():
+    result = _import("json2obj.ObjectifyConfig.configurator")
+    assert _lazy_modules_loaded(result["modules"]) == []
+
+
+def test_imports_3():
+    # ruamel is loaded the first time a YAML file is read in round_trip mode.
+    file_path = Path(__file__).parent / "files" / "test_1.yaml"
+    setup = f"from json2obj import YamlFile\nYamlFile({str(file_path)!r}).read_file('round_trip')\n"
+    result = _import("ruamel.yaml", setup=setup)
+    assert result["modules"] == []
@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+"""
+test_indexes.py
+"""
+import copy
+import gc
+
+import pytest
+
+from json2obj import JSON2Obj, indexes
+from json2obj.shared import SharedTree
+
+INPUT_DICT = dict(
+    routes=[
+        dict(name="home", method="GET", match=dict(host="a.com")),
+        dict(name="login", method="POST", match=dict(host="b.com")),
+        dict(name="home", method="POST", match=dict(host="c.com")),
+        dict(method="GET"),
+    ],
+    settings=dict(tenants=[dict(id=1), dict(id=2)]),
+)
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_indexes_1(compact):
+    json_obj = JSON2Obj.from_dict(copy.deepcopy(INPUT_DICT), compact=compact)
+    routes = JSON2Obj.index(json_obj, "routes", key="name")
+    assert list(routes) == ["home", "login"]
+    # The first record with a key is indexed.
+    assert routes["home"] is json_obj.routes[0]
+    assert JSON2Obj.index(json_obj, "routes", key=["name", "method"])[("home", "POST")] is json_obj.routes[2]
+    assert JSON2Obj.index(json_obj, "routes", key="match.host")["b.com"].name == "login"
+    assert JSON2Obj.index(json_obj, "settings.tenants", key="id")[2] is json_obj.settings.tenants[1]
+    with pytest.raises(TypeError):
+        routes["new"] = None
+
+
+def test_indexes_2():
+    json_obj = JSON2Obj(copy.deepcopy(INPUT_DICT))
+    routes = JSON2Obj.index(json_obj, "routes", key="name")
+    assert JSON2Obj.index(json_obj, "routes", key="name") == routes
+    assert JSON2Obj.to_dict(json_obj) == INPUT_DICT
+    assert json_obj == JSON2Obj(INPUT_DICT)
+
+    # Replacing the list rebuilds the index.
+    json_obj.routes = JSON2Obj(dict(routes=[dict(name="new")])).routes
+    assert list(JSON2Obj.index(json_obj, "routes", key="name")) == ["new"]
+    json_obj.routes.append(JSON2Obj(dict(name="appended")))
+    assert "appended" in JSON2Obj.index(json_obj, "routes", key="name")
+
+
+def test_indexes_3():
+    json_obj = JSON2Obj(INPUT_DICT)
+    with pytest.raises(KeyError):
+        JSON2Obj.index(json_obj, "missing", key="name")
+    with pytest.raises(TypeError):
+        JSON2Obj.index(json_obj, "settings", key="id")
+    with pytest.raises(TypeError):
+        JSON2Obj.index(json_obj, "routes", key="match")
+
+
+def test_indexes_4():
+    # Indexes are kept beside frozen and shared objects, so their fields are not changed.
+    frozen_obj = JSON2Obj.from_dict(INPUT_DICT, frozen=True)
+    other_frozen_obj = JSON2Obj.from_dict(INPUT_DICT, frozen=True)
+    with SharedTree.publish(INPUT_DICT) as tree:
+        try:
+            for obj in [frozen_obj, other_frozen_obj, tree.root]:
+                records = obj.routes
+                fields = dict(obj.__dict__)
+                routes = JSON2Obj.index(obj, "routes", key="name")
+                assert routes["home"] is records[0]
+                assert JSON2Obj.index(obj, "routes", key="name") == routes
+                assert obj.__dict__ == fields
+        finally:
+            tree.unlink()
+
+    # Equal frozen objects each get the index of their own records.
+    assert frozen_obj == other_frozen_obj
+    assert JSON2Obj.index(other_frozen_obj, "routes", key="name")["home"] is other_frozen_obj.routes[0]
+
+    count = len(indexes._INDEXES)
+    del frozen_obj
+    gc.collect()
+    assert len(indexes._INDEXES) == count - 1
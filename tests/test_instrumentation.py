@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+"""
+test_instrumentation.py
+"""
+import json
+
+import pytest
+
+from json2obj import JSON2Obj, JsonFile, YamlFile, instrumentation
+from json2obj.ObjectifyConfig.configurator import Configurator
+
+
+def test_instrumentation_1(tmp_path, monkeypatch):
+    monkeypatch.setenv("INSTRUMENTATION_VAR", "value")
+    path = tmp_path / "test.json"
+    path.write_text(json.dumps(dict(key1=dict(env_var="INSTRUMENTATION_VAR"), key2=[1, 2, dict(key3="value3")])))
+
+    with instrumentation.collect_metrics() as metrics:
+        test_obj = JsonFile(str(path), cache=False).load()
+    assert test_obj.key1 == "value"
+    assert len(metrics) == 1
+    assert metrics[0].operation == "load"
+    assert metrics[0].target == str(path)
+    assert metrics[0].bytes_read == path.stat().st_size
+    assert metrics[0].nodes == 8
+    assert metrics[0].env_vars_resolved == 1
+    assert metrics[0].kms_calls == 0
+    assert set(metrics[0].phases) == {"read", "parse", "build", "env_vars"}
+    assert metrics[0].duration >= sum(metrics[0].phases.values())
+    assert metrics[0].to_dict()["phases"] == metrics[0].phases
+    assert not instrumentation.enabled
+
+
+def test_instrumentation_2():
+    reported = list()
+    instrumentation.add_callback(reported.append)
+    try:
+        JSON2Obj.from_string('{"key1": "value1"}')
+        JSON2Obj(dict(key1="value1"))
+        YamlFile("tests/files/test_1.yaml").load()
+        JSON2Obj.from_string('{"key1": "héllo"}')
+        JSON2Obj.from_string('{"key1": "héllo"}'.encode("utf-8"))
+    finally:
+        instrumentation.remove_callback(reported.append)
+    JSON2Obj.from_string('{"key1": "value1"}')
+    assert [m.operation for m in reported] == ["from_string", "load", "from_string", "from_string"]
+    assert reported[0].bytes_read == 18
+    assert reported[1].nodes > 1
+    # str input is counted in bytes, not characters.
+    assert reported[2].bytes_read == reported[3].bytes_read == 18
+
+
+def test_instrumentation_3():
+    configurator = Configurator("tests/files/example_base_template.yaml")
+    with instrumentation.collect_metrics() as metrics:
+        configurator.validate_user_config("tests/files/example_user_config.yaml", "tests/files/example_config.yaml")
+        with pytest.raises(KeyError):
+            configurator.compile("tests/files/example_config.yaml").validate(dict())
+    assert [m.operation for m in metrics] == ["validate", "validate"]
+    assert {"read_user_config", "compile", "validate", "build"} <= set(metrics[0].phases)
+    assert metrics[0].target == "tests/files/example_user_config.yaml"
+    assert metrics[1].error.startswith("KeyError")
+
+
+def test_instrumentation_4():
+    def broken_callback(metrics):
+        raise RuntimeError("metrics pipeline is down")
+
+    instrumentation.add_callback(broken_callback)
+    try:
+        assert JSON2Obj.from_string('{"key1": "value1"}').key1 == "value1"
+    finally:
+        instrumentation.remove_callback(broken_callback)
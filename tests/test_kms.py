@@ -0,0 +1,77 @@
+#!/usr/bin/python3
+"""
+test_kms.py
+"""
+import threading
+from base64 import b64encode
+from os import environ
+
+import pytest
+
+from json2obj import env_vars
+from json2obj.json2obj import JSON2Obj
+
+
+class StubKMSClient:
+    def __init__(self):
+        self.calls = 0
+        self.threads = set()
+        self.lock = threading.Lock()
+
+    def decrypt(self, CiphertextBlob: bytes):
+        with self.lock:
+            self.calls += 1
+            self.threads.add(threading.get_ident())
+        return {"Plaintext": CiphertextBlob[::-1]}
+
+
+@pytest.fixture
+def kms_client():
+    client = StubKMSClient()
+    env_vars.set_kms_client(client)
+    env_vars.clear_kms_cache()
+    yield client
+    env_vars.set_kms_client(None)
+    env_vars.clear_kms_cache()
+
+
+def set_enc_var(name: str, plaintext: str):
+    environ[name] = b64encode(plaintext[::-1].encode()).decode()
+
+
+def test_kms_cache_1(kms_client):
+    set_enc_var("my_enc_var", "secret")
+    input_dict = dict(key1=dict(enc_env_var="my_enc_var"), key2=[dict(key2a=dict(enc_env_var="my_enc_var"))])
+    json_obj = JSON2Obj(input_dict)
+    assert json_obj.key1 == "secret"
+    assert json_obj.key2[0].key2a == "secret"
+    JSON2Obj(input_dict)
+    assert kms_client.calls == 1
+
+
+def test_kms_prefetch_1(kms_client):
+    names = [f"my_enc_var_{i}" for i in range(20)]
+    for name in names:
+        set_enc_var(name, f"secret_{name}")
+    input_dict = {name: dict(enc_env_var=name) for name in names}
+    assert env_vars.find_enc_env_vars(dict(section=input_dict, other=[input_dict])) == set(names)
+    json_obj = JSON2Obj(input_dict)
+    assert JSON2Obj.get(json_obj, names[5]) == f"secret_{names[5]}"
+    assert kms_client.calls == 20
+    assert threading.get_ident() not in kms_client.threads
+
+
+def test_kms_cache_ttl_1(kms_client, monkeypatch):
+    set_enc_var("my_enc_var", "secret")
+    assert env_vars.get_kms_var("my_enc_var") == "secret"
+    monkeypatch.setattr(env_vars, "KMS_CACHE_TTL", -1)
+    env_vars.clear_kms_cache()
+    env_vars.get_kms_var("my_enc_var")
+    env_vars.get_kms_var("my_enc_var")
+    assert kms_client.calls == 3
+
+
+def test_kms_missing_var_1(kms_client):
+    input_dict = dict(key1=dict(enc_env_var="my_missing_enc_var"), key2=dict(enc_env_var="my_missing_enc_var_2"))
+    with pytest.raises(KeyError):
+        JSON2Obj(input_dict)
@@ -0,0 +1,132 @@
+#!/usr/bin/python3
+"""
+test_layered.py
+"""
+import copy
+import json
+
+import pytest
+
+from json2obj import JSON2Obj
+from json2obj.frozen import freeze
+from json2obj.layered import LayeredDict, merge_layers, to_dict
+from json2obj.ObjectifyConfig.config2obj import Config2Obj
+
+DEFAULTS = {
+    "server": {"host": "localhost", "port": 80, "tls": {"enabled": False, "ciphers": ["a", "b"]}},
+    "logging": {"level": "info"},
+    "features": ["x"],
+}
+SITE = {"server": {"port": 8080, "tls": {"enabled": True}}, "region": "us-east-1"}
+USER = {"server": {"tls": {"ciphers": ["c"]}}, "logging": "debug", "features": ["y", "z"]}
+OVERRIDES = {"server": {"host": "example.com"}, "password": {"env_var": "LAYERED_PASSWORD"}}
+
+
+def _deep_merge(*layers: dict) -> dict:
+    output = dict()
+    for layer in layers:
+        for key, value in layer.items():
+            if isinstance(value, dict) and "env_var" not in value and isinstance(output.get(key), dict):
+                output[key] = _deep_merge(output[key], value)
+            else:
+                output[key] = copy.deepcopy(value)
+    return output
+
+
+def test_layered_1():
+    layers = [DEFAULTS, SITE, USER, OVERRIDES]
+    merged = merge_layers(*layers)
+    assert to_dict(merged) == _deep_merge(*layers)
+    assert list(merged) == list(_deep_merge(*layers))
+
+
+def test_layered_2():
+    merged = merge_layers(DEFAULTS, SITE, USER)
+    # Subtrees only one layer has are shared with that layer.
+    assert merged["server"]["tls"]["ciphers"] is USER["server"]["tls"]["ciphers"]
+    assert merged["features"] is USER["features"]
+    assert isinstance(merged["server"], LayeredDict)
+    assert "region" in merged and "missing" not in merged
+    assert merged.get("missing", 1) == 1
+    with pytest.raises(KeyError):
+        merged["missing"]
+    with pytest.raises(TypeError):
+        merged["region"] = "us-west-2"
+
+
+def test_layered_3(monkeypatch):
+    monkeypatch.setenv("LAYERED_PASSWORD", "password")
+    layers = [copy.deepcopy(layer) for layer in [DEFAULTS, SITE, USER, OVERRIDES]]
+    config = JSON2Obj.from_layers(*layers)
+    assert config.server.host == "example.com"
+    assert config.server.port == 8080
+    assert config.server.tls.enabled is True
+    assert config.logging == "debug"
+    assert config.password == "password"
+    expected = _deep_merge(*layers)
+    expected["password"] = "password"
+    assert JSON2Obj.to_dict(config) == expected
+    expected["password"] = OVERRIDES["password"]
+    assert JSON2Obj.to_dict(JSON2Obj.from_layers(*layers), resolve_env_vars=False) == expected
+
+    # Changes go to the object and not the layers.
+    config.server.port = 443
+    assert config.server.port == 443
+    assert layers[1]["server"]["port"] == 8080
+
+
+def test_layered_4():
+    with pytest.raises(TypeError):
+        JSON2Obj.from_layers(DEFAULTS, ["not", "a", "dict"])
+    assert JSON2Obj.to_dict(JSON2Obj.from_layers()) == dict()
+    assert JSON2Obj.to_dict(JSON2Obj.from_layers(DEFAULTS)) == DEFAULTS
+
+
+def test_layered_5():
+    layers = [DEFAULTS, SITE, USER, OVERRIDES]
+    merged = merge_layers(*layers)
+    # Merged subtrees keep their identity, so trees built from them can be frozen.
+    assert merged["server"] is merged["server"]
+    assert freeze(merged) == JSON2Obj.freeze(JSON2Obj(_deep_merge(*layers), env_var_function=None))
+    assert freeze(JSON2Obj.from_layers(*layers, env_var_function=None)) == freeze(merged)
+
+    # A LayeredDict is not a dict, so json.dumps raises instead of writing {}.
+    with pytest.raises(TypeError):
+        json.dumps(merged)
+    assert json.loads(json.dumps(to_dict(merged))) == _deep_merge(*layers)
+    config = JSON2Obj.from_layers(*layers, env_var_function=None)
+    assert json.loads(json.dumps(JSON2Obj.to_dict(config))) == _deep_merge(*layers)
+    assert JSON2Obj(merged, env_var_function=None) == config
+
+    # A layer that changes is seen by the view.
+    site = copy.deepcopy(SITE)
+    merged = merge_layers(DEFAULTS, site)
+    assert merged["server"]["port"] == 8080
+    site["server"] = "replaced"
+    assert merged["server"] == "replaced"
+    assert merge_layers(merge_layers(DEFAULTS, SITE), USER).layers == (DEFAULTS, SITE, USER)
+
+
+def test_layered_6():
+    # A layer replaced by an equal dict is read through the new dict.
+    site = copy.deepcopy(SITE)
+    merged = merge_layers(DEFAULTS, site)
+    assert merged["server"]["port"] == 8080
+    site["server"] = copy.deepcopy(SITE["server"])
+    site["server"]["port"] = 9090
+    assert merged["server"]["port"] == 9090
+
+
+def test_layered_config2obj_1(tmp_path):
+    user_path = tmp_path / "user.json"
+    template_path = tmp_path / "template.json"
+    user_path.write_text(json.dumps(USER))
+    template_path.write_text(json.dumps(DEFAULTS))
+    config = Config2Obj(str(user_path), str(template_path))
+    config.update_user_config_from_template(update=False)
+    assert config._Config2Obj__user_config == USER
+
+    # Changes to the loaded user config that are not saved are merged too.
+    config._Config2Obj__user_config.region = "eu-west-1"
+    config.update_user_config_from_template()
+    assert JSON2Obj.to_dict(config._Config2Obj__user_config) == dict(_deep_merge(DEFAULTS, USER), region="eu-west-1")
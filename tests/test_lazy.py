@@ -0,0 +1,48 @@
+#!/usr/bin/python3
+"""
+test_lazy.py
+"""
+from os import environ
+
+import pytest
+
+from json2obj.json2obj import JSON2Obj
+from json2obj.json_file import JsonFile
+
+
+def test_lazy_1():
+    input_dict = dict(key1="value1", key2=dict(key2a="value2a", key2b="value2b"), key3="value3")
+    json_obj = JSON2Obj(input_dict, lazy=True)
+    assert "key2" not in json_obj.__dict__
+    assert json_obj.key2.key2a == "value2a"
+    assert "key2" in json_obj.__dict__
+
+
+def test_lazy_2():
+    input_dict = dict(key1="value1", key2=["value2", ["value2a", dict(key2b="value2b")]], key3="value3")
+    assert JSON2Obj(input_dict, lazy=True) == JSON2Obj(input_dict)
+    assert JSON2Obj.to_dict(JSON2Obj(input_dict, lazy=True)) == input_dict
+    assert JSON2Obj(input_dict, lazy=True).key2[1][1].key2b == "value2b"
+
+
+def test_lazy_3():
+    json_obj = JSON2Obj.from_string('{"get": "value1", "key2": {"key2a": 1}}', lazy=True)
+    assert JSON2Obj.get(json_obj, "get") == "value1"
+    assert JSON2Obj.get(json_obj, "missing", "default") == "default"
+    with pytest.raises(AttributeError):
+        json_obj.missing
+
+
+def test_lazy_env_var_1():
+    environ["my_lazy_var"] = "3"
+    input_dict = dict(key1=dict(env_var="my_lazy_var"), key2=dict(env_var="my_lazy_missing_var"))
+    json_obj = JSON2Obj(input_dict, lazy=True)
+    assert json_obj.key1 == "3"
+    with pytest.raises(KeyError):
+        json_obj.key2
+
+
+def test_lazy_file_1():
+    json_obj = JsonFile("tests/files/test_file_1.json").load(lazy=True)
+    assert json_obj.allow_access is True
+    assert json_obj.custom.items == ["a", "b", "c"]
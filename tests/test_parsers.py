@@ -0,0 +1,44 @@
+#!/usr/bin/python3
+"""
+test_parsers.py
+"""
+import pytest
+
+from json2obj import parsers
+from json2obj.json2obj import JSON2Obj
+from json2obj.json_file import JsonFile
+
+
+@pytest.mark.parametrize("parser", parsers.available_parsers())
+def test_parsers_1(parser):
+    data = b'{"key1": "value1", "key2": {"key2a": [1, 2.5, true, null]}}'
+    expected = dict(key1="value1", key2=dict(key2a=[1, 2.5, True, None]))
+    assert parsers.loads(data, parser) == expected
+    assert parsers.loads(memoryview(data), parser) == expected
+    assert parsers.loads(data.decode(), parser) == expected
+
+
+@pytest.mark.parametrize("parser", parsers.available_parsers())
+def test_parsers_2(parser):
+    assert parsers.loads('{"big": 123456789012345678901234567890, "nan": NaN}', parser)["big"] > 2 ** 64
+    with pytest.raises(ValueError):
+        parsers.loads("{not json", parser)
+
+
+def test_parsers_3():
+    with pytest.raises(KeyError):
+        parsers.get_parser("not_a_parser")
+    assert parsers.available_parsers()[-1] == "json"
+
+
+def test_from_bytes_1():
+    json_obj = JSON2Obj.from_bytes(b'{"key1": "value1", "key2": {"key2a": "value2a"}}', parser="json")
+    assert json_obj.key2.key2a == "value2a"
+    assert json_obj == JSON2Obj.from_string('{"key1": "value1", "key2": {"key2a": "value2a"}}')
+
+
+@pytest.mark.parametrize("parser", parsers.available_parsers())
+def test_json_file_parser_1(parser):
+    my_config = JsonFile("tests/files/test_file_1.json", parser=parser).load()
+    assert my_config.allow_access is True
+    assert my_config.custom.items == ["a", "b", "c"]
@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+"""
+test_paths.py
+"""
+import pytest
+
+from json2obj import JSON2Obj, paths
+from json2obj.paths import parse_path
+
+INPUT_DICT = dict(
+    a=dict(b=dict(c=[dict(d=i) for i in range(5)], empty=None)),
+    routes=[dict(name="home")],
+    **{"my-key": dict(value=1)},
+)
+
+
+def test_paths_1():
+    assert parse_path("a.b.c[3].d") == ("a", "b", "c", 3, "d")
+    assert parse_path("[0].name") == (0, "name")
+    assert parse_path("a[-1][2]") == ("a", -1, 2)
+    for path in ["", "a..b", "a[b]", "a.", "a[1"]:
+        with pytest.raises(ValueError):
+            parse_path(path)
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_paths_2(compact):
+    json_obj = JSON2Obj.from_dict(INPUT_DICT, compact=compact)
+    accessor = JSON2Obj.compile_path("a.b.c[3].d")
+    assert accessor(json_obj) == 3
+    assert accessor is JSON2Obj.compile_path("a.b.c[3].d")
+    assert JSON2Obj.get_path(json_obj, "a.b.c[-1].d") == 4
+    assert JSON2Obj.get_path(json_obj, "routes[0].name") == "home"
+    assert JSON2Obj.get_path(json_obj, "a.b.empty", "default") is None
+
+
+def test_paths_3():
+    json_obj = JSON2Obj(INPUT_DICT)
+    assert JSON2Obj.get_path(json_obj, "my-key.value") == 1
+    assert JSON2Obj.get_path(json_obj, "a.b.c[9].d") is None
+    assert JSON2Obj.get_path(json_obj, "a.missing.c", "default") == "default"
+    # A None value on the way is a missing segment.
+    assert JSON2Obj.get_path(json_obj, "a.b.empty.value", "default") == "default"
+    assert JSON2Obj.get_path(json_obj, "a[0]", "default") == "default"
+    with pytest.raises(KeyError, match=r"a\.b\.c\[9\]"):
+        JSON2Obj.compile_path("a.b.c[9].d")(json_obj)
+
+
+def test_paths_4(monkeypatch):
+    # Errors that do not come from a missing segment, like a missing env var, are raised.
+    json_obj = JSON2Obj(dict(a=dict(password=dict(env_var="PATHS_PASSWORD"))), lazy=True)
+    monkeypatch.delenv("PATHS_PASSWORD", raising=False)
+    with pytest.raises(KeyError, match="missing env var"):
+        JSON2Obj.get_path(json_obj, "a.password", "default")
+
+
+def test_paths_5(monkeypatch):
+    # At most PATH_CACHE_SIZE compiled paths are kept, and the cache starts over once it is full.
+    monkeypatch.setattr(paths, "PATH_CACHE_SIZE", 4)
+    json_obj = JSON2Obj(dict(items=list(range(10))))
+    for index in range(10):
+        assert JSON2Obj.get_path(json_obj, f"items[{index}]") == index
+        assert paths.get_path(json_obj, f"items[{index}]") == index
+        assert len(paths._ACCESSORS) <= 4
+    assert JSON2Obj.get_path(json_obj, "items[9]") == 9
+    with pytest.raises(ValueError):
+        JSON2Obj.get_path(json_obj, "items[")
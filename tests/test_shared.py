@@ -0,0 +1,93 @@
+#!/usr/bin/python3
+"""
+test_shared.py
+"""
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from json2obj import JSON2Obj
+from json2obj.layered import merge_layers
+from json2obj.shared import SharedList, SharedObj, SharedTree, encode
+
+INPUT_DICT = dict(
+    key1="value1",
+    key2=dict(key2a=[1, 2.5, dict(key2b=None, get="shadowed")], key2c=True),
+    key3=2**70,
+    key4="héllo",
+    routes=[dict(name=f"route_{i}", port=8000 + i) for i in range(50)],
+)
+
+
+def _read_in_worker(name: str) -> tuple:
+    tree = SharedTree.attach(name)
+    root = tree.root
+    return root.routes[7].name, JSON2Obj.to_dict(root)
+
+
+def test_shared_1():
+    tree = SharedTree.publish(JSON2Obj(INPUT_DICT))
+    try:
+        root = SharedTree.attach(tree.name).root
+        assert isinstance(root, SharedObj) and isinstance(root, JSON2Obj)
+        assert root.key1 == "value1"
+        assert root.key2.key2a[2].get == "shadowed"
+        assert root.key2.key2a[-2] == 2.5
+        assert root.key3 == 2**70
+        assert root.key4 == "héllo"
+        assert isinstance(root.routes, SharedList) and len(root.routes) == 50
+        assert JSON2Obj.to_dict(root) == INPUT_DICT
+        assert root == JSON2Obj(INPUT_DICT)
+        assert JSON2Obj.get_path(root, "routes[3].port") == 8003
+        assert JSON2Obj.index(root, "routes", key="name")["route_9"].port == 8009
+        assert pickle.loads(pickle.dumps(root)) == root
+        with pytest.raises(TypeError):
+            root.key1 = "value2"
+        with pytest.raises(IndexError):
+            root.routes[50]
+    finally:
+        tree.close()
+        tree.unlink()
+
+
+def test_shared_2():
+    with SharedTree.publish(INPUT_DICT) as tree:
+        try:
+            with ProcessPoolExecutor(max_workers=2) as pool:
+                results = list(pool.map(_read_in_worker, [tree.name] * 2))
+        finally:
+            tree.unlink()
+    assert results == [("route_7", INPUT_DICT)] * 2
+
+
+def test_shared_3(tmp_path):
+    path = str(tmp_path / "config.shared")
+    assert SharedTree.write(JSON2Obj(INPUT_DICT), path)
+    assert not SharedTree.write(JSON2Obj(INPUT_DICT), path)
+    with SharedTree.open(path) as tree:
+        assert tree.root.routes[49].name == "route_49"
+        assert JSON2Obj.to_dict(tree.root) == INPUT_DICT
+
+    (tmp_path / "bad.shared").write_bytes(b"not a shared tree")
+    with pytest.raises(ValueError):
+        SharedTree.open(str(tmp_path / "bad.shared"))
+    with pytest.raises(TypeError):
+        encode(dict(key1=object()))
+
+
+def test_shared_4():
+    # Every distinct key and scalar is written once.
+    records = [dict(name="same", value=1) for _ in range(1000)]
+    assert len(encode(dict(records=records))) < len(encode(dict(records=records[:1]))) + 1000 * 30
+
+
+def test_shared_5():
+    overrides = dict(key2=dict(key2c=False), routes=[dict(name="only")])
+    expected = dict(INPUT_DICT, key2=dict(INPUT_DICT["key2"], key2c=False), routes=[dict(name="only")])
+    for layered in [merge_layers(INPUT_DICT, overrides), JSON2Obj.from_layers(INPUT_DICT, overrides)]:
+        with SharedTree.publish(layered) as tree:
+            try:
+                assert JSON2Obj.to_dict(tree.root) == expected
+            finally:
+                tree.unlink()
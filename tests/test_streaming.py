@@ -0,0 +1,96 @@
+#!/usr/bin/python3
+"""
+test_streaming.py
+"""
+import io
+from os import environ
+
+import pytest
+
+from json2obj import streaming
+from json2obj.json2obj import JSON2Obj
+from json2obj.json_file import JsonFile
+
+
+def test_iter_from_file_ndjson_1(tmp_path):
+    environ["my_stream_var"] = "3"
+    file_path = tmp_path / "records.ndjson"
+    file_path.write_text('{"name": "a", "value": 1}\n\n{"name": "b", "value": {"env_var": "my_stream_var"}}\n')
+    records = list(JSON2Obj.iter_from_file(str(file_path)))
+    assert [r.name for r in records] == ["a", "b"]
+    assert records[1].value == "3"
+
+
+def test_iter_from_file_array_1(tmp_path):
+    file_path = tmp_path / "records.json"
+    file_path.write_text(' [ {"name": "a", "items": [1, 2]},\n {"name": "b", "value": 10} ] \n')
+    records = list(JsonFile(str(file_path)).iter_objects())
+    assert records == [dict(name="a", items=[1, 2]), dict(name="b", value=10)]
+
+
+def test_iter_from_file_stream_1():
+    records = list(JsonFile("tests/files/test_file_1.json").iter_objects())
+    assert len(records) == 1
+    assert records[0].custom.items == ["a", "b", "c"]
+
+
+def test_iter_from_file_not_object_1(tmp_path):
+    file_path = tmp_path / "records.json"
+    file_path.write_text("[1, 2]")
+    with pytest.raises(TypeError):
+        list(JSON2Obj.iter_from_file(str(file_path)))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 1024])
+def test_iter_records_chunks_1(chunk_size):
+    data = '[{"a": 12345, "b": "x,]y"}, [1, 2, {"c": null}], 678, "z" ]'
+    records = list(streaming.iter_records(io.StringIO(data), streaming.StreamFormats.ARRAY, chunk_size=chunk_size))
+    assert records == [dict(a=12345, b="x,]y"), [1, 2, dict(c=None)], 678, "z"]
+
+
+@pytest.mark.parametrize("data", ["[]", " [ ] "])
+def test_iter_records_empty_1(data):
+    assert list(streaming.iter_records(io.StringIO(data), streaming.StreamFormats.ARRAY, chunk_size=1)) == []
+
+
+@pytest.mark.parametrize("data", ['[{"a": 1} {"b": 2}]', '[{"a": 1}] x', '[{"a": 1},'])
+def test_iter_records_invalid_1(data):
+    with pytest.raises(ValueError):
+        list(streaming.iter_records(io.StringIO(data), streaming.StreamFormats.ARRAY, chunk_size=2))
+
+
+class _CountingFile(io.StringIO):
+    def __init__(self, data: str):
+        super().__init__(data)
+        self.read_size = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.read_size += len(chunk)
+        return chunk
+
+
+def test_iter_records_invalid_2():
+    # A malformed record is raised without reading the rest of the file.
+    data = '{"a": 1} {"b": x} ' + '{"c": "long value"} ' * 10000
+    file = _CountingFile(data)
+    records = streaming.iter_records(file, streaming.StreamFormats.STREAM, chunk_size=64)
+    assert next(records) == dict(a=1)
+    with pytest.raises(ValueError):
+        next(records)
+    assert file.read_size < 1024
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 5])
+def test_iter_records_chunks_2(chunk_size):
+    # Literals, escapes and strings cut off at the end of a chunk are read on.
+    data = '[true, false, null, -Infinity, "\\u00e9\\"x", {"a": [1.5e3]}]'
+    records = list(streaming.iter_records(io.StringIO(data), streaming.StreamFormats.ARRAY, chunk_size=chunk_size))
+    assert records == [True, False, None, float("-inf"), 'é"x', dict(a=[1500.0])]
+
+
+def test_iter_records_parser_1():
+    records = streaming.iter_records(io.StringIO("[1]"), streaming.StreamFormats.ARRAY, parser="json")
+    assert list(records) == [1]
+    with pytest.raises(ValueError):
+        streaming.iter_records(io.StringIO("[1]"), streaming.StreamFormats.ARRAY, parser="orjson")
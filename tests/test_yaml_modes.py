@@ -0,0 +1,71 @@
+#!/usr/bin/python3
+"""
+test_yaml_modes.py
+"""
+import glob
+
+import pytest
+from ruamel.yaml import YAML
+from ruamel.yaml.comments import CommentedMap
+
+from json2obj import JSON2Obj, YamlFile
+from json2obj.yaml_file import YamlModes, safe_load
+
+TYPES_DOCUMENT = """
+bool_1: true
+bool_2: False
+yes_no: [yes, no, on, off, y, n]
+octal: 0o10
+decimal: 010
+hex: 0x1F
+binary: 0b101
+underscores: 1_000
+negative: -0o7
+float_1: 1e3
+float_2: -1.5
+float_3: .inf
+date: 2001-12-14
+timestamp: 2001-12-14 21:59:43.10 -5
+null_1: ~
+null_2:
+quoted: '0x1F'
+sexagesimal: 1:20
+base: &base
+  key_a: a
+merged:
+  <<: *base
+  key_b: b
+"""
+
+
+def test_safe_load_1():
+    assert safe_load(TYPES_DOCUMENT) == YAML().load(TYPES_DOCUMENT)
+    assert safe_load(TYPES_DOCUMENT.encode("utf-8")) == YAML(typ="safe").load(TYPES_DOCUMENT)
+    assert type(safe_load(TYPES_DOCUMENT)) is dict
+
+
+def test_safe_load_2():
+    document = "%YAML 1.1\n---\nkey: yes\n"
+    assert safe_load(document) == dict(key=True)
+
+
+@pytest.mark.parametrize("path", sorted(glob.glob("tests/files/*.yaml")))
+def test_yaml_modes_1(path):
+    safe = YamlFile(path, cache=False).read_file()
+    round_trip = YamlFile(path, cache=False, mode="round_trip").read_file()
+    assert type(safe) is dict
+    assert isinstance(round_trip, CommentedMap)
+    assert safe == round_trip
+    assert YamlFile(path).load() == YamlFile(path, mode=YamlModes.ROUND_TRIP).load()
+
+
+def test_yaml_modes_2(tmp_path, monkeypatch):
+    monkeypatch.setenv("YAML_MODES_PASSWORD", "password")
+    path = tmp_path / "test.yaml"
+    path.write_text("settings:\n  password:\n    env_var: YAML_MODES_PASSWORD\n")
+    for mode in YamlModes:
+        assert YamlFile(str(path), mode=mode).load().settings.password == "password"
+
+    path.write_text("key_1: value_1\n")
+    YamlFile(str(path)).write_file(dict(key_2="value_2"), rebase=True)
+    assert JSON2Obj.to_dict(YamlFile(str(path)).load()) == dict(key_2="value_2", key_1="value_1")